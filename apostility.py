@@ -0,0 +1,276 @@
+"""
+Author: Cason Konzer
+Module: apostility
+-- Part of: citegres
+Developed for: Advance Database Concepts & Applications
+
+Function: Provides an asyncio interface over postility for concurrent imports and queries
+Version: 1.0
+Dated: October 18, 2026
+"""
+
+# IMPORTS
+import asyncio
+import concurrent.futures
+import logging
+import threading
+
+import postility
+
+# STATIC SET (LOGGER)
+pyLogger = logging.getLogger(name="apostility_debug")
+
+
+# CLASS DEFS
+class AsyncConnection:
+    """
+    A postility cursor & connection driven from asyncio, calls run in order on one worker thread
+    """
+
+    def __init__(self, cur, conn):
+        self.cur = cur
+        self.conn = conn
+        self.__worker = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="apostility"
+        )
+        self.__running = None  # token of the call on the worker, guarded by __running_lock
+        self.__running_lock = threading.Lock()
+
+    def __call(self, token, fn, *args, **kwargs):
+        """
+        Run fn on the worker with the cursor & connection current when it starts, keeping what it
+        returns before the next queued call starts, even when its awaiting coroutine was cancelled
+        """
+        with self.__running_lock:
+            self.__running = token
+        try:
+            returned = fn(self.cur, self.conn, *args, **kwargs)
+        finally:
+            with self.__running_lock:
+                self.__running = None
+        if isinstance(returned, tuple) and len(returned) == 2:
+            self.cur, self.conn = returned[0] if isinstance(returned[0], tuple) else returned
+        return returned
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        Await a postility function on the worker thread, keeping the cursor & connection it returns
+        """
+        token = object()
+        call = self.__worker.submit(self.__call, token, fn, *args, **kwargs)
+        try:
+            returned = await asyncio.wrap_future(call)
+        except asyncio.CancelledError:  # e.g. asyncio.wait_for timing out, stop it server-side too
+            with self.__running_lock:
+                if self.__running is token:
+                    self.cancel()
+            raise
+        if isinstance(returned, tuple) and len(returned) == 2 and isinstance(returned[0], tuple):
+            return returned[1]
+        return None
+
+    def cancel(self):
+        """
+        Cancel the statement running on the connection, safe to call from any thread
+        """
+        return postility.CancelHandle(self.conn).cancel()
+
+    async def close(self):
+        """
+        Kill the connection (or return it to its pool) and stop the worker thread
+        """
+        await asyncio.wrap_future(
+            self.__worker.submit(lambda: postility.kill_connection(self.cur, self.conn))
+        )
+        self.__worker.shutdown(wait=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+# BASIC DEFS
+async def create_connection(section=None):
+    """
+    Establish a connection & cursor to the database (pooled when pooling is enabled) for asyncio
+    """
+    cur, conn = await asyncio.to_thread(postility.create_connection, section)
+    return AsyncConnection(cur=cur, conn=conn)
+
+
+async def kill_connection(aconn):
+    """
+    Destroy the passed async connection, pooled connections are returned to their pool
+    """
+    await aconn.close()
+
+
+# INSERT DEFS
+async def importXML(aconn, df, **kwargs):
+    """
+    Import passed df as postility.importXML does, without blocking the event loop
+    """
+    return await aconn.run(postility.importXML, df=df, **kwargs)
+
+
+async def __batches(batches):
+    if hasattr(batches, "__aiter__"):
+        async for df in batches:
+            yield df
+    else:
+        for df in batches:
+            yield df
+
+
+async def import_batches(aconn, batches, **kwargs):
+    """
+    Import dfs from an (async) iterable of batches, each import overlapping the next batch fetch
+    """
+    pending = None
+    imported = 0
+    try:
+        async for df in __batches(batches):
+            if pending is not None:
+                await pending
+            pending = asyncio.ensure_future(importXML(aconn, df, **kwargs))
+            imported += 1
+    finally:
+        if pending is not None:
+            await pending
+    pyLogger.info(f"imported {imported} batches")
+    return imported
+
+
+async def load_snapshot(aconn, directory, **kwargs):
+    """
+    Rebuild an empty database from an export_snapshot directory, returning the loaded manifest
+    """
+    return await aconn.run(postility.load_snapshot, directory, **kwargs)
+
+
+# SELECT DEFS
+async def select_all_from_authors(aconn):
+    """
+    Select all authors
+    """
+    return await aconn.run(postility.select_all_from_authors)
+
+
+async def select_all_from_concepts(aconn):
+    """
+    Select all concepts
+    """
+    return await aconn.run(postility.select_all_from_concepts)
+
+
+async def select_all_from_openalex(aconn):
+    """
+    Select all openalex works
+    """
+    return await aconn.run(postility.select_all_from_openalex)
+
+
+async def select_all_from_citations(aconn, columnar=False):
+    """
+    Select all citations
+    """
+    return await aconn.run(postility.select_all_from_citations, columnar=columnar)
+
+
+async def select_all_from_supports(aconn, columnar=False):
+    """
+    Select all supports
+    """
+    return await aconn.run(postility.select_all_from_supports, columnar=columnar)
+
+
+async def select_all_from_supports_resolved(aconn):
+    """
+    Select all supports resolved to titles & authors
+    """
+    return await aconn.run(postility.select_all_from_supports_resolved)
+
+
+async def select_all_from_paper_concepts(aconn, columnar=False):
+    """
+    Select all paper concepts
+    """
+    return await aconn.run(postility.select_all_from_paper_concepts, columnar=columnar)
+
+
+async def select_all_from_paper_concepts_resolved(aconn):
+    """
+    Select all paper concepts resolved to titles & concepts
+    """
+    return await aconn.run(postility.select_all_from_paper_concepts_resolved)
+
+
+async def select_page(aconn, relation, **kwargs):
+    """
+    Select one keyset page of relation, returning it & the after of the next page
+    """
+    return await aconn.run(postility.select_page, relation, **kwargs)
+
+
+async def query_citationlist_full_resolve_openalex(aconn, materialized=True):
+    """
+    Select the citation edgelist resolved to openalex urls
+    """
+    return await aconn.run(
+        postility.query_citationlist_full_resolve_openalex, materialized=materialized
+    )
+
+
+async def query_citationlist_full_resolve_paper_title(aconn, materialized=True):
+    """
+    Select the citation edgelist resolved to paper titles
+    """
+    return await aconn.run(
+        postility.query_citationlist_full_resolve_paper_title, materialized=materialized
+    )
+
+
+async def query_citationlist_full_resolve_author(aconn, materialized=True):
+    """
+    Select the citation edgelist resolved to authors
+    """
+    return await aconn.run(
+        postility.query_citationlist_full_resolve_author, materialized=materialized
+    )
+
+
+async def query_citation_neighborhood(aconn, seed, **kwargs):
+    """
+    Select the k-hop citation subgraph around a paper or an author's papers
+    """
+    return await aconn.run(postility.query_citation_neighborhood, seed, **kwargs)
+
+
+async def select_top_cited(aconn, kind="paper", n=25, materialized=True):
+    """
+    Select the n most cited papers or authors
+    """
+    return await aconn.run(postility.select_top_cited, kind=kind, n=n, materialized=materialized)
+
+
+async def search_papers(aconn, query, limit=25, offset=0, fuzzy=False):
+    """
+    Search papers by title & concept words, ranked by relevance
+    """
+    return await aconn.run(postility.search_papers, query, limit=limit, offset=offset, fuzzy=fuzzy)
+
+
+async def federated_query(query, sections=None, **kwargs):
+    """
+    Run a reader against many config sections at once and merge the results
+    """
+    return await asyncio.to_thread(postility.federated_query, query, sections=sections, **kwargs)
+
+
+async def export_snapshot(aconn, directory, **kwargs):
+    """
+    Stream every table of the database to compressed parquet files in directory
+    """
+    return await aconn.run(postility.export_snapshot, directory, **kwargs)
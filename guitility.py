@@ -36,6 +36,8 @@ class ciTerminalGUI:
         self.__chromeStatus = tk.BooleanVar(value=0)
         self.__citegresStatus = tk.BooleanVar(value=0)
         self.__df = pd.DataFrame()
+        self.__pageAfter = {}  # relation -> keyset after of its next page
+        postility.update_pool_settings(pooling=True)
 
         # MENU
         menuBar = tk.Menu(self.__guiRoot)
@@ -53,6 +55,13 @@ class ciTerminalGUI:
         citegresMenu.add_command(label="Disconnect", command=self.__citegresDisconnect)
         citegresMenu.add_command(label="Reconnect", command=self.__citegresReconnect)
         citegresMenu.add_command(label="Implant Schema", command=self.__citegresImplantSchema)
+        citegresMenu.add_command(label="Migrate Schema", command=self.__citegresMigrateSchema)
+        citegresMenu.add_command(
+            label="Rebuild Resolved Citations", command=self.__citegresRebuildResolvedCitations
+        )
+        citegresMenu.add_command(
+            label="Refresh Node Stats", command=self.__citegresRefreshNodeStats
+        )
         citegresDefaultDbMenu = tk.Menu(citegresMenu, tearoff=0)
         citegresDefaultDbMenu.add_command(label="CiteGres", command=self.__citegresSetCiteGresDB)
         citegresDefaultDbMenu.add_command(
@@ -96,6 +105,10 @@ class ciTerminalGUI:
             separatorSearchLabelFrame, text="XML SEARCH", command=self.__dblpQueryXML
         )
         advancedSearchButton.pack(side=tk.RIGHT)
+        citegresSearchButton = tk.Button(
+            separatorSearchLabelFrame, text="DB SEARCH", command=self.__citegresSearch
+        )
+        citegresSearchButton.pack(side=tk.RIGHT)
 
         ## TOP SEARCH-STATUS SEPARATOR
         topSearchStatusSeparatorFrame = tk.Frame(topFrame, width=self.__BD())
@@ -226,6 +239,12 @@ class ciTerminalGUI:
             command=self.__citegresImportXML,
         )
         queryImportXmlButton.pack(side=tk.TOP, fill=tk.X)
+        queryPipelineXmlButton = tk.Button(
+            separatorQueryDBLPLabelFrame,
+            text="Explode, Extract & Import via Chrome (pipelined)",
+            command=self.__citegresImportPipeline,
+        )
+        queryPipelineXmlButton.pack(side=tk.TOP, fill=tk.X)
 
         #### AUTHORS
         queryAuthorsLabelFrame = tk.LabelFrame(separatorQueryLabelFrame, text="Authors:")
@@ -250,6 +269,12 @@ class ciTerminalGUI:
             command=self.__citegresGetSupportsAuthorsResolved,
         )
         queryGetSupportsAuthorsResolvedButton.pack(side=tk.TOP, fill=tk.X)
+        queryPageSupportsAuthorsResolvedButton = tk.Button(
+            separatorQueryAuthorsLabelFrame,
+            text="Browse Supporting Paper Authors (next page)",
+            command=self.__citegresPageSupportsAuthorsResolved,
+        )
+        queryPageSupportsAuthorsResolvedButton.pack(side=tk.TOP, fill=tk.X)
 
         #### CONCEPTS
         queryConceptsLabelFrame = tk.LabelFrame(separatorQueryLabelFrame, text="Concepts:")
@@ -274,6 +299,12 @@ class ciTerminalGUI:
             command=self.__citegresSupportsConceptsResolved,
         )
         queryGetSupportsConceptsResolvedButton.pack(side=tk.TOP, fill=tk.X)
+        queryPageSupportsConceptsResolvedButton = tk.Button(
+            separatorQueryConceptsLabelFrame,
+            text="Browse Paper Concepts (next page)",
+            command=self.__citegresPageSupportsConceptsResolved,
+        )
+        queryPageSupportsConceptsResolvedButton.pack(side=tk.TOP, fill=tk.X)
 
         #### EDGELISTS
         queryEdgelistLabelFrame = tk.LabelFrame(separatorQueryLabelFrame, text="Edgelists:")
@@ -326,6 +357,12 @@ class ciTerminalGUI:
             command=self.__networkingPaperCitationGraph,
         )
         networkingPaperCitationButton.pack(side=tk.TOP, fill=tk.X)
+        networkingFederatedPaperCitationButton = tk.Button(
+            separatorNetworkingLabelFrame,
+            text="Build Federated Paper Citation Graph",
+            command=self.__networkingFederatedPaperCitationGraph,
+        )
+        networkingFederatedPaperCitationButton.pack(side=tk.TOP, fill=tk.X)
         networkingComputeGraphMetricsButton = tk.Button(
             separatorNetworkingLabelFrame,
             text="Compute Graph Metrics",
@@ -350,6 +387,18 @@ class ciTerminalGUI:
             command=self.__networkingDisplayBetweennessCentralities,
         )
         networkingDisplayBetweennessCentralities.pack(side=tk.TOP, fill=tk.X)
+        networkingDisplayTopCitedPapers = tk.Button(
+            separatorNetworkingLabelFrame,
+            text="Display Top Cited Papers",
+            command=self.__networkingDisplayTopCitedPapers,
+        )
+        networkingDisplayTopCitedPapers.pack(side=tk.TOP, fill=tk.X)
+        networkingDisplayTopCitedAuthors = tk.Button(
+            separatorNetworkingLabelFrame,
+            text="Display Top Cited Authors",
+            command=self.__networkingDisplayTopCitedAuthors,
+        )
+        networkingDisplayTopCitedAuthors.pack(side=tk.TOP, fill=tk.X)
         networkingPlotGraph = tk.Button(
             separatorNetworkingLabelFrame,
             text="Plot Graph",
@@ -469,6 +518,17 @@ class ciTerminalGUI:
     def __citegresImplantSchema(self):
         postility.db_init(cur=self.__citegresCur, conn=self.__citegresConn)
 
+    def __citegresMigrateSchema(self):
+        postility.migrate(cur=self.__citegresCur, conn=self.__citegresConn)
+
+    def __citegresRebuildResolvedCitations(self):
+        postility.refresh_resolved_citations(
+            cur=self.__citegresCur, conn=self.__citegresConn, rebuild=True
+        )
+
+    def __citegresRefreshNodeStats(self):
+        postility.refresh_node_stats(cur=self.__citegresCur, conn=self.__citegresConn)
+
     def __citegresSetCiteGresDB(self):
         postility.update_db_selection(section="CiteGres")
         self.__setResultsField(status="Default DB has been set to: CiteGres")
@@ -515,6 +575,13 @@ class ciTerminalGUI:
         status = f"Results shown for XML query ({query}) in chrome."
         self.__setResultsField(status=status)
 
+    def __citegresSearch(self):
+        query = self.__searchQuery.get()
+        (self.__citegresCur, self.__citegresConn), results = postility.search_papers(
+            cur=self.__citegresCur, conn=self.__citegresConn, query=query, limit=100
+        )
+        self.__setResultsField(results.to_string())
+
     def __dblpQueryExtract(self):
         query = str(self.__searchQuery.get())
         self.__df = seleamility.explode_query_dblp(
@@ -561,12 +628,25 @@ class ciTerminalGUI:
 
     def __citegresImportXML(self):
         self.__citegresCur, self.__citegresConn = postility.importXML(
-            cur=self.__citegresCur, conn=self.__citegresConn, df=self.__df
+            cur=self.__citegresCur, conn=self.__citegresConn, df=self.__df, node_stats=True
         )
         # TRUNCATE may combine DROP & CREATE to keep a table and delete all of it's data... should be faster
         status = "XML search has been imported into Citegres, see console for logs..."
         self.__setResultsField(status)
 
+    def __citegresImportPipeline(self):
+        self.__citegresCur, self.__citegresConn = postility.import_pipeline(
+            cur=self.__citegresCur,
+            conn=self.__citegresConn,
+            batches=seleamility.iter_explode_query_dblp(
+                driver=self.__chromeDriver,
+                search_results=self.__searchResults,
+                use_nord=self.__nordStatus.get(),
+            ),
+        )
+        status = "XML search has been extracted and imported into Citegres, see console for logs..."
+        self.__setResultsField(status)
+
     ### AUTHORS
     def __citegresGetAuthorsAuthors(self):
         (self.__citegresCur, self.__citegresConn), status = postility.select_all_from_authors(
@@ -588,6 +668,9 @@ class ciTerminalGUI:
         )
         self.__setResultsField(status.to_string())
 
+    def __citegresPageSupportsAuthorsResolved(self):
+        self.__citegresNextPage(relation="supports_resolved")
+
     ### CONCEPTS
     def __citegresConceptsConcepts(self):
         (self.__citegresCur, self.__citegresConn), status = postility.select_all_from_concepts(
@@ -611,6 +694,19 @@ class ciTerminalGUI:
         )
         self.__setResultsField(status.to_string())
 
+    def __citegresPageSupportsConceptsResolved(self):
+        self.__citegresNextPage(relation="paper_concepts_resolved")
+
+    def __citegresNextPage(self, relation):
+        (self.__citegresCur, self.__citegresConn), (page, after) = postility.select_page(
+            cur=self.__citegresCur,
+            conn=self.__citegresConn,
+            relation=relation,
+            after=self.__pageAfter.get(relation),
+        )
+        self.__pageAfter[relation] = after  # wraps back to the first page once exhausted
+        self.__setResultsField(page.to_string())
+
     ### EDGELISTS
     def __citegresGetOpenalexIdEdgelist(self):
         (self.__citegresCur, self.__citegresConn), status = postility.select_all_from_citations(
@@ -663,6 +759,14 @@ class ciTerminalGUI:
         self.__gType = "paper"
         self.__setResultsField(status="Paper Citation Graph Built")
 
+    def __networkingFederatedPaperCitationGraph(self):
+        self.__df = postility.federated_query(query="query_citationlist_full_resolve_paper_title")
+        self.__G = netility.construct_graph_from_df(
+            df=self.__df.drop(columns="section"), directed=True
+        )
+        self.__gType = "paper"
+        self.__setResultsField(status="Federated Paper Citation Graph Built")
+
     def __networkingComputeGraphMetrics(self):
         self.__metrics = netility.compute_graph_metrics(G=self.__G)
         self.__setResultsField(status=f"{self.__gType} Graph Metrics Computed")
@@ -694,6 +798,18 @@ class ciTerminalGUI:
         ).sort_values("betweenness_centrality", ascending=False)
         self.__setResultsField(results.to_string())
 
+    def __networkingDisplayTopCitedPapers(self):
+        (self.__citegresCur, self.__citegresConn), results = postility.select_top_cited(
+            cur=self.__citegresCur, conn=self.__citegresConn, kind="paper", n=100
+        )
+        self.__setResultsField(results.to_string())
+
+    def __networkingDisplayTopCitedAuthors(self):
+        (self.__citegresCur, self.__citegresConn), results = postility.select_top_cited(
+            cur=self.__citegresCur, conn=self.__citegresConn, kind="author", n=100
+        )
+        self.__setResultsField(results.to_string())
+
     def __networkingPlotGraph(self):
         self.__pos = netility.construct_static_layout(G=self.__G, layout=self.__layout)
         netility.plot_graph(
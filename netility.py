@@ -96,6 +96,24 @@ def construct_graph_from_df(df, directed=True):
     return G
 
 
+def construct_graph_from_chunks(chunks, directed=True):
+    """
+    Utility for graph construction from an iterable of edge DataFrames (e.g. a postility stream),
+    only one chunk of raw edges is held in memory at a time
+    """
+    if directed:
+        G = nx.DiGraph()
+    else:
+        G = nx.Graph()
+    for df in chunks:
+        for (source, target), weight in df.value_counts().items():
+            if G.has_edge(source, target):
+                G[source][target]["weight"] += weight
+            else:
+                G.add_edge(source, target, weight=weight)
+    return G
+
+
 # COMPUTING DEF
 def compute_graph_metrics(
     G,
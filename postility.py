@@ -10,13 +10,41 @@ Dated: December 2, 2023
 """
 
 # IMPORTS
+import bisect
+import collections
+import concurrent.futures
+import contextlib
+import datetime
+import hashlib
+import io
+import itertools
+import json
 import logging
+import pathlib
+import queue
+import random
+import re
+import struct
 import sys
+import threading
+import time
+import weakref
 from configparser import ConfigParser
 
+import numpy as np
 import pandas as pd
 import psycopg2
 import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.pool
+
+## CONDITIONAL IMPORT
+try:  # snapshots need pyarrow, pip install citegres[snapshot]
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pacsv = pq = None
 
 # STATIC SET (LOGGER)
 logging.basicConfig(stream=sys.stdout, encoding="utf-8", level=logging.INFO)
@@ -24,11 +52,56 @@ pyLogger = logging.getLogger(name="postility_debug")
 
 # STATIC VARS (ERROR MSG & PATH)
 ERROR_FAILED_TO_EXECUTE = "ach, gute fire abend!"
+OPENALEX_URL_PREFIX = "https://openalex.org/W"  # openalex is keyed by W number
 SRC = "C:/Users/cason/OneDrive - Umich/Computer_Science/Classes/Fall_2023/CSC582-Advanced_Database_Concepts_and_Applications/Project2/ME/src"
 
 # GLOBAL VARS (CONFIG SECTION)
 DB_SELECTION = "CiteGres"
 
+# GLOBAL VARS (CONNECTION POOLS)
+POOLING = False
+POOL_MINCONN = 1
+POOL_MAXCONN = 4
+POOL_HEALTH_CHECK = True
+POOL_SETTINGS = ("pool_minconn", "pool_maxconn")  # optional per section citegres.ini overrides
+
+# GLOBAL VARS (INSTRUMENTATION)
+SQL_LOGGING = False  # mogrify & log every statement, opt-in as it costs a format & a write per row
+INSTRUMENTATION = True
+INSTRUMENTATION_SAMPLE_RATE = 1.0  # share of statements timed, counters always count
+INSTRUMENTATION_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)  # seconds
+
+# GLOBAL VARS (ID CACHE)
+ID_CACHING = True
+ID_CACHE_SIZE = 100000  # most recently used entries kept per cached table
+ID_CACHE_COLUMNS = {
+    "authors": "author",
+    "concepts": "concept",
+    "openalex": "work",
+    "papers": "title",
+}
+
+# GLOBAL VARS (PREPARED STATEMENTS)
+PREPARED_STATEMENTS = True
+PREPARED_PAGE_SIZE = 100  # EXECUTEs sent per round trip by execute_prepared_batch
+
+# GLOBAL VARS (SCHEMA)
+SCHEMA_CHECK = True  # warn once per database connected to whose schema is behind SCHEMA_VERSION
+MIGRATE_ON_CONNECT = False  # migrate such databases in place instead of only warning
+
+# GLOBAL VARS (SNAPSHOTS)
+SNAPSHOT_CHUNK_SIZE = 2**26  # bytes of COPY csv per parquet row group written by export_snapshot
+SNAPSHOT_BATCH_ROWS = 500000  # rows per COPY sent by load_snapshot
+
+# GLOBAL VARS (TIMEOUTS)
+STATEMENT_TIMEOUT = 0  # milliseconds a statement may run on new connections, 0 leaves it unbounded
+
+# GLOBAL VARS (PIPELINE)
+PIPELINE_QUEUE_SIZE = 2  # batches produced ahead of import_pipeline's importer
+
+# GLOBAL VARS (FEDERATION)
+FEDERATION_MAX_WORKERS = 8  # sections queried at once by federated_query
+
 
 # CLASS DEFS
 class LoggingCursor(psycopg2.extensions.cursor):
@@ -37,18 +110,102 @@ class LoggingCursor(psycopg2.extensions.cursor):
     """
 
     def execute(self, sql, args=None):
-        logger = logging.getLogger(name="sql_cursor_debug")
-        logger.info(f"Execute: {self.mogrify(sql, args)}")
+        if SQL_LOGGING:
+            logging.getLogger(name="sql_cursor_debug").info(f"Execute: {self.mogrify(sql, args)}")
+        self.__instrumented(psycopg2.extensions.cursor.execute, sql, args)
+
+    def copy_expert(self, sql, file, size=8192):
+        if SQL_LOGGING:
+            logging.getLogger(name="sql_cursor_debug").info(f"Copy: {sql}")
+        self.__instrumented(psycopg2.extensions.cursor.copy_expert, sql, file, size)
+
+    def __instrumented(self, method, sql, *args):
+        """
+        Run method, counting calls, rows & errors per statement and timing a sample
+        """
+        if not INSTRUMENTATION:
+            return method(self, sql, *args)
+        timed = INSTRUMENTATION_SAMPLE_RATE >= 1.0 or random.random() < INSTRUMENTATION_SAMPLE_RATE
+        started = time.perf_counter() if timed else None
         try:
-            psycopg2.extensions.cursor.execute(self, sql, args)
-            logger.info(f"Status: {self.statusmessage}")
+            method(self, sql, *args)
         except Exception as exc:
-            logger.error(f"{exc.__class__.__name__}: {exc}")
+            record_statement(sql, error=True)
+            logging.getLogger(name="sql_cursor_debug").error(f"{exc.__class__.__name__}: {exc}")
             raise
+        record_statement(
+            sql, rows=self.rowcount, seconds=time.perf_counter() - started if timed else None
+        )
+        if SQL_LOGGING:
+            logging.getLogger(name="sql_cursor_debug").info(f"Status: {self.statusmessage}")
+
+
+class CancelHandle:
+    """
+    Cancel whatever statement is running on conn, from any thread, via psycopg2's conn.cancel()
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.cancelled = False
+
+    def cancel(self):
+        if self.conn.closed:
+            return False
+        self.cancelled = True
+        self.conn.cancel()
+        pyLogger.info("cancel requested for running statement")
+        return True
+
+
+class ParquetCopySink:
+    """
+    File-like target for COPY ... TO STDOUT (FORMAT csv), parsing every chunk_size bytes with arrow
+    into a row group of a parquet file; COPY writes whole rows, so chunks never split a row
+    """
+
+    def __init__(self, path, schema, chunk_size=None, compression="zstd"):
+        self.schema = schema
+        self.chunk_size = SNAPSHOT_CHUNK_SIZE if chunk_size is None else chunk_size
+        self.writer = pq.ParquetWriter(path, schema, compression=compression)
+        self.buffer = bytearray()
+        self.rows = 0
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        table = pacsv.read_csv(
+            io.BytesIO(self.buffer),
+            read_options=pacsv.ReadOptions(column_names=self.schema.names),
+            convert_options=pacsv.ConvertOptions(
+                column_types=self.schema,
+                null_values=[""],
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=False,
+            ),
+        )
+        self.writer.write_table(table)
+        self.rows += table.num_rows
+        self.buffer = bytearray()
+
+    def close(self):
+        self.flush()
+        self.writer.close()
 
 
 # BASIC DEFS
 __db_init = [
+    "DROP TABLE IF EXISTS node_stats;",
+    "DROP TABLE IF EXISTS import_fingerprints;",
+    "DROP TABLE IF EXISTS citations_resolved_author;",
+    "DROP TABLE IF EXISTS citations_resolved_paper_title;",
+    "DROP TABLE IF EXISTS citations_resolved_openalex;",
+    "DROP TABLE IF EXISTS schema_version;",
     "DROP TABLE IF EXISTS papers_raw;",
     "DROP TABLE IF EXISTS paper_concepts;",
     "DROP TABLE IF EXISTS citations;",
@@ -74,35 +231,42 @@ __db_init = [
 ]
 
 
-def db_init(cur, conn):
+def db_init(cur, conn, schema_version=None):
     """
-    Build up tablespace for database
+    Build up tablespace for database, then migrate it to schema_version (latest by default)
     """
     for __statement in __db_init:
         try:
             cur.execute(__statement)
         except Exception as E:
             pyLogger.error(f"{str(E)} \nexception in db_init")
-    return commit_prior(cur, conn)
+    cur, conn = commit_prior(cur, conn)
+    clear_id_cache()
+    return migrate(cur=cur, conn=conn, target=schema_version)
 
 
-__clear_papers_raw = [
-    "DROP TABLE IF EXISTS papers_raw;",
-    "CREATE TABLE papers_raw (id SERIAL, doi TEXT, title TEXT, pdate DATE, author TEXT, author_id INTEGER, publisher TEXT, publisher_id INTEGER, ptype TEXT, ptype_id INTEGER, venue TEXT, venue_id INTEGER, openalex TEXT, openalex_id INTEGER, PRIMARY KEY(id));",
+__create_papers_raw = [
+    "DROP TABLE IF EXISTS pg_temp.papers_raw;",
+    "CREATE TEMP TABLE papers_raw (id SERIAL, doi TEXT, title TEXT, pdate DATE, author TEXT, publisher TEXT, ptype TEXT, venue TEXT, openalex TEXT, PRIMARY KEY(id)) ON COMMIT DROP;",
 ]
 
 
-def clear_papers_raw(
-    cur, conn
-):  # TRUNCATE may combine DROP & CREATE to keep a table and delete all of it's data... should be faster
+def create_papers_raw(cur):
     """
-    Drop & recreate papers_raw table
+    Create this session's papers_raw staging table, dropped when the transaction ends
     """
-    for __statement in __clear_papers_raw:
-        try:
-            cur.execute(__statement)
-        except Exception as E:
-            pyLogger.error(f"{str(E)} \nexception in clear_papers_raw")
+    for __statement in __create_papers_raw:
+        cur.execute(__statement)
+
+
+def clear_papers_raw(cur, conn):
+    """
+    Drop this session's papers_raw staging table
+    """
+    try:
+        cur.execute(__create_papers_raw[0])
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in clear_papers_raw")
     return commit_prior(cur, conn)
 
 
@@ -112,45 +276,170 @@ def update_db_selection(section="CiteGres"):
     """
     global DB_SELECTION
     DB_SELECTION = section
+    clear_id_cache()
     pyLogger.info(f"Database selection set to: {DB_SELECTION}")
 
 
-def config(filename=f"{SRC}/citegres.ini"):
+def update_pool_settings(pooling=True, minconn=None, maxconn=None, health_check=None):
+    """
+    Update global variables for connection pooling, sizes apply to pools opened afterwards
+    """
+    global POOLING, POOL_MINCONN, POOL_MAXCONN, POOL_HEALTH_CHECK
+    POOLING = pooling
+    POOL_MINCONN = POOL_MINCONN if minconn is None else minconn
+    POOL_MAXCONN = POOL_MAXCONN if maxconn is None else maxconn
+    POOL_HEALTH_CHECK = POOL_HEALTH_CHECK if health_check is None else health_check
+    pyLogger.info(
+        f"Connection pooling set to: {POOLING} (min {POOL_MINCONN}, max {POOL_MAXCONN}, health check {POOL_HEALTH_CHECK})"
+    )
+
+
+def update_id_cache_settings(caching=None, size=None):
+    """
+    Update global variables for the dimension id cache, shrinking caches over the new size
+    """
+    global ID_CACHING, ID_CACHE_SIZE
+    ID_CACHING = ID_CACHING if caching is None else caching
+    ID_CACHE_SIZE = ID_CACHE_SIZE if size is None else size
+    if not ID_CACHING:
+        clear_id_cache()
+    with __id_caches_lock:
+        for cache in __id_caches.values():
+            while len(cache) > ID_CACHE_SIZE:
+                cache.popitem(last=False)
+    pyLogger.info(f"Id caching set to: {ID_CACHING} (size {ID_CACHE_SIZE})")
+
+
+def update_prepared_statements(enabled=None, page_size=None):
+    """
+    Update global variables for prepared statements & batched EXECUTEs
+    """
+    global PREPARED_STATEMENTS, PREPARED_PAGE_SIZE
+    PREPARED_STATEMENTS = PREPARED_STATEMENTS if enabled is None else enabled
+    PREPARED_PAGE_SIZE = PREPARED_PAGE_SIZE if page_size is None else page_size
+    pyLogger.info(
+        f"Prepared statements set to: {PREPARED_STATEMENTS} (page size {PREPARED_PAGE_SIZE})"
+    )
+
+
+def update_instrumentation(sql_logging=None, enabled=None, sample_rate=None):
+    """
+    Update global variables for statement logging & instrumentation
+    """
+    global SQL_LOGGING, INSTRUMENTATION, INSTRUMENTATION_SAMPLE_RATE
+    SQL_LOGGING = SQL_LOGGING if sql_logging is None else sql_logging
+    INSTRUMENTATION = INSTRUMENTATION if enabled is None else enabled
+    INSTRUMENTATION_SAMPLE_RATE = (
+        INSTRUMENTATION_SAMPLE_RATE if sample_rate is None else sample_rate
+    )
+    pyLogger.info(
+        f"Instrumentation set to: {INSTRUMENTATION} (sample rate {INSTRUMENTATION_SAMPLE_RATE}, sql logging {SQL_LOGGING})"
+    )
+
+
+def update_timeout_settings(statement_timeout=None):
+    """
+    Update global variable for the statement timeout of connections opened afterwards
+    """
+    global STATEMENT_TIMEOUT
+    STATEMENT_TIMEOUT = STATEMENT_TIMEOUT if statement_timeout is None else statement_timeout
+    pyLogger.info(f"Statement timeout set to: {STATEMENT_TIMEOUT}ms")
+
+
+def update_schema_settings(check=None, migrate_on_connect=None):
+    """
+    Update global variables for the schema version check of new connections
+    """
+    global SCHEMA_CHECK, MIGRATE_ON_CONNECT
+    SCHEMA_CHECK = SCHEMA_CHECK if check is None else check
+    MIGRATE_ON_CONNECT = MIGRATE_ON_CONNECT if migrate_on_connect is None else migrate_on_connect
+    pyLogger.info(f"Schema check set to: {SCHEMA_CHECK} (migrate on connect {MIGRATE_ON_CONNECT})")
+
+
+def update_federation_settings(max_workers=None):
+    """
+    Update global variable for the number of sections federated_query runs at once
+    """
+    global FEDERATION_MAX_WORKERS
+    FEDERATION_MAX_WORKERS = FEDERATION_MAX_WORKERS if max_workers is None else max_workers
+    pyLogger.info(f"Federation set to: {FEDERATION_MAX_WORKERS} workers")
+
+
+def config(filename=None, section=None):
     """
     Parse database configuration file
     """
+    if filename is None:
+        filename = f"{SRC}/citegres.ini"
+    if section is None:
+        section = DB_SELECTION
     parser = ConfigParser()
     parser.read(filename)
     db = {}
     try:
-        params = parser.items(DB_SELECTION)
+        params = parser.items(section)
         for param in params:
             db[param[0]] = param[1]
-        pyLogger.info(f"Config set from: {DB_SELECTION}")
+        pyLogger.info(f"Config set from: {section}")
     except Exception as E:
         pyLogger.error(f"{str(E)} \nexception in config")
     return db
 
 
-def create_connection():
+def config_sections(filename=None):
+    """
+    List the database sections of the configuration file
+    """
+    if filename is None:
+        filename = f"{SRC}/citegres.ini"
+    parser = ConfigParser()
+    parser.read(filename)
+    return parser.sections()
+
+
+def __connect_params(section=None):
+    """
+    Split a config section into psycopg2 connect params & pool settings, a statement_timeout
+    (section or global) is passed to the server as a connection option
+    """
+    params = config(section=section)
+    settings = {key: int(params.pop(key)) for key in POOL_SETTINGS if key in params}
+    timeout = params.pop("statement_timeout", STATEMENT_TIMEOUT)
+    if timeout:
+        params["options"] = f"{params.get('options', '')} -c statement_timeout={timeout}".strip()
+    return params, settings
+
+
+__connection_sections = weakref.WeakKeyDictionary()  # unpooled connection -> config section
+
+
+def create_connection(section=None):
     """
-    Establish a connection & cursor to the database
+    Establish a connection & cursor to the database, checked out of a pool when pooling is enabled
     """
-    params = config()
+    if POOLING:
+        cur, conn = checkout_connection(section=section)
+        return check_schema_version(cur=cur, conn=conn) if SCHEMA_CHECK else (cur, conn)
+    params, _ = __connect_params(section=section)
     try:
         conn = psycopg2.connect(**params)
+        __connection_sections[conn] = DB_SELECTION if section is None else section
         cur = conn.cursor(cursor_factory=LoggingCursor)
         pyLogger.info(f"connected with dsn: {str(conn.dsn)}")
         pyLogger.info(f"connection status: {str(conn.status)}")
     except Exception as E:
         pyLogger.error(f"{str(E)} \nexception in create_connection")
-    return cur, conn
+    return check_schema_version(cur=cur, conn=conn) if SCHEMA_CHECK else (cur, conn)
 
 
 def kill_connection(cur, conn):
     """
-    Destroy the passed connection and cursor
+    Destroy the passed connection and cursor, pooled connections are returned to their pool
     """
+    if conn in __pooled_connections:
+        return_connection(cur=cur, conn=conn)
+        pyLogger.info("cursor closed and connection returned to pool")
+        return
     cur.close()
     conn.close()  # Closing a connection without committing the changes first will cause an implicit rollback to be performed.
     pyLogger.info("cursor and connection closed")
@@ -158,16 +447,435 @@ def kill_connection(cur, conn):
 
 def reset_connection(cur, conn):
     """
-    Reset the passed connection and cursor
+    Reset the passed connection and cursor, reconnecting to the config section it was opened for
     """
+    section = __pooled_connections.get(conn, __connection_sections.get(conn))
     kill_connection(cur=cur, conn=conn)
-    return create_connection()
+    return create_connection(section=section)
+
+
+# OPENALEX DEFS
+__openalex_work_pattern = re.compile(r"(?:^|/)W(\d+)$")
+
+
+def openalex_work(openalex_url):
+    """
+    Parse the W number of an openalex work url (or bare W id), None when it has none
+    """
+    match = __openalex_work_pattern.search(openalex_url) if isinstance(openalex_url, str) else None
+    return int(match.group(1)) if match else None
+
+
+def openalex_works(openalex_urls):
+    """
+    Parse W numbers of passed openalex work urls into a nullable Int64 series
+    """
+    urls = pd.Series(openalex_urls, dtype=object)
+    works = urls.where(urls.map(lambda url: isinstance(url, str)), None).str.extract(
+        __openalex_work_pattern, expand=False
+    )
+    return pd.to_numeric(works).astype("Int64")
+
+
+def openalex_url(work):
+    """
+    Build the openalex work url of a W number
+    """
+    return f"{OPENALEX_URL_PREFIX}{work}"
+
+
+__openalex_url_params = {"openalex_url_prefix": OPENALEX_URL_PREFIX}  # urls rebuilt in SQL
+
+
+# INSTRUMENTATION DEFS
+__statement_stats = {}  # template -> [calls, errors, rows, timed, seconds, max seconds, histogram]
+__statement_stats_lock = threading.Lock()
+
+
+def statement_template(sql):
+    """
+    Key a statement by its text, cutting inlined VALUES lists (execute_values pages) & EXECUTE
+    parameters (execute_prepared_batch pages) down to one
+    """
+    if isinstance(sql, str):
+        return sql
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", errors="replace")
+    else:
+        sql = str(sql)
+    if sql.startswith("EXECUTE "):
+        return f"{sql[: sql.find(' (')]} (...)"
+    values = sql.find(" VALUES (")
+    return f"{sql[: values + 8]}(...)" if values >= 0 else sql
+
+
+def record_statement(sql, rows=0, seconds=None, error=False):
+    """
+    Count one statement run against its template, with its latency when it was sampled
+    """
+    template = statement_template(sql)
+    with __statement_stats_lock:
+        stats = __statement_stats.get(template)
+        if stats is None:
+            stats = [0, 0, 0, 0, 0.0, 0.0, [0] * (len(INSTRUMENTATION_BUCKETS) + 1)]
+            __statement_stats[template] = stats
+        stats[0] += 1
+        if error:
+            stats[1] += 1
+            return
+        if rows > 0:
+            stats[2] += rows
+        if seconds is not None:
+            stats[3] += 1
+            stats[4] += seconds
+            stats[5] = max(stats[5], seconds)
+            stats[6][bisect.bisect_left(INSTRUMENTATION_BUCKETS, seconds)] += 1
+
+
+def reset_statement_stats():
+    """
+    Forget all recorded statement stats
+    """
+    with __statement_stats_lock:
+        __statement_stats.clear()
+
+
+def __histogram_quantile(histogram, timed, quantile):
+    """
+    Estimate a latency quantile as the upper bound of the bucket holding it, unbounded (inf) in
+    the overflow bucket past the last bound, where statement_stats reports the max instead
+    """
+    seen = 0
+    for bucket, count in enumerate(histogram):
+        seen += count
+        if seen >= quantile * timed:
+            return (
+                INSTRUMENTATION_BUCKETS[bucket] if bucket < len(INSTRUMENTATION_BUCKETS) else np.inf
+            )
+    return None
+
+
+def statement_stats():
+    """
+    Summarize recorded statement stats per template, slowest total time first
+    """
+    with __statement_stats_lock:
+        snapshot = [(template, list(stats)) for template, stats in __statement_stats.items()]
+    records = []
+    for template, (calls, errors, rows, timed, seconds, longest, histogram) in snapshot:
+        records.append(
+            {
+                "statement": " ".join(template.split()),
+                "calls": calls,
+                "errors": errors,
+                "rows": rows,
+                "timed": timed,
+                "total_ms": seconds * 1e3,
+                "mean_ms": seconds / timed * 1e3 if timed else None,
+                "p50_ms": min(__histogram_quantile(histogram, timed, 0.5), longest) * 1e3
+                if timed
+                else None,
+                "p95_ms": min(__histogram_quantile(histogram, timed, 0.95), longest) * 1e3
+                if timed
+                else None,
+                "max_ms": longest * 1e3 if timed else None,
+                "histogram": histogram,
+            }
+        )
+    records.sort(key=lambda record: record["total_ms"], reverse=True)
+    return records
+
+
+def dump_statement_stats(fmt="table", width=80):
+    """
+    Render statement stats as a fixed width table or JSON (with bucket bounds) & log it
+    """
+    records = statement_stats()
+    if fmt == "json":
+        summary = json.dumps({"buckets_s": INSTRUMENTATION_BUCKETS, "statements": records})
+    else:
+        summary = pd.DataFrame(records).drop(columns="histogram", errors="ignore")
+        if not summary.empty:
+            summary["statement"] = summary.statement.str.slice(0, width)
+        summary = summary.to_string(index=False, float_format=lambda value: f"{value:.3f}")
+    pyLogger.info(f"Statement stats:\n{summary}")
+    return summary
+
+
+@contextlib.contextmanager
+def statement_session(fmt="table"):
+    """
+    Reset statement stats on entry & dump them on exit
+    """
+    reset_statement_stats()
+    try:
+        yield
+    finally:
+        dump_statement_stats(fmt=fmt)
+
+
+# ID CACHE DEFS
+__id_caches = {  # (database dsn, value) -> id, LRU
+    table: collections.OrderedDict() for table in ID_CACHE_COLUMNS
+}
+__id_cache_counters = {
+    table: {"hits": 0, "misses": 0, "evictions": 0} for table in ID_CACHE_COLUMNS
+}
+__id_caches_lock = threading.Lock()
+
+
+def id_cache_get(conn, table, value):
+    """
+    Look up a cached id for value in table of the database conn is connected to, None on a miss
+    """
+    if not ID_CACHING:
+        return None
+    key = (conn.dsn, value)
+    with __id_caches_lock:
+        cache = __id_caches[table]
+        cached = cache.get(key)
+        if cached is None:
+            __id_cache_counters[table]["misses"] += 1
+        else:
+            cache.move_to_end(key)
+            __id_cache_counters[table]["hits"] += 1
+        return cached
+
+
+def id_cache_put(conn, table, value, value_id):
+    """
+    Cache value_id for value in table of the database conn is connected to, evicting the least
+    recently used entry when full
+    """
+    if not ID_CACHING or value_id is None or value_id is ERROR_FAILED_TO_EXECUTE:
+        return
+    key = (conn.dsn, value)
+    with __id_caches_lock:
+        cache = __id_caches[table]
+        cache[key] = value_id
+        cache.move_to_end(key)
+        while len(cache) > ID_CACHE_SIZE:
+            cache.popitem(last=False)
+            __id_cache_counters[table]["evictions"] += 1
+
+
+def clear_id_cache(table=None):
+    """
+    Invalidate cached ids of table, or of every table
+    """
+    with __id_caches_lock:
+        for cached in ID_CACHE_COLUMNS if table is None else [table]:
+            __id_caches[cached].clear()
+
+
+def id_cache_stats():
+    """
+    Size, hits, misses & evictions per cached table
+    """
+    with __id_caches_lock:
+        return {
+            table: {"size": len(__id_caches[table]), **__id_cache_counters[table]}
+            for table in ID_CACHE_COLUMNS
+        }
+
+
+def warm_id_cache(cur, conn, table, values=None):
+    """
+    Bulk load ids of passed values (or of up to ID_CACHE_SIZE rows) of table into the id cache
+    """
+    column = ID_CACHE_COLUMNS[table]
+    loaded = 0
+    try:
+        if values is None:
+            cur.execute(f"SELECT {column}, id FROM {table} LIMIT %s;", (ID_CACHE_SIZE,))
+        else:
+            cur.execute(
+                f"SELECT {column}, id FROM {table} WHERE {column} = ANY(%s);",
+                (list(dict.fromkeys(values)),),
+            )
+        for value, value_id in cur.fetchall():
+            id_cache_put(conn, table, value, value_id)
+            loaded += 1
+        pyLogger.info(f"warmed id cache with {loaded} {table} ids")
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in warm_id_cache")
+    return commit_prior(cur=cur, conn=conn), loaded
+
+
+# PREPARED STATEMENT DEFS
+__prepared_statements = {}  # template -> (name, PREPARE body, parameter count)
+__prepared_connections = weakref.WeakKeyDictionary()  # connection -> names prepared in its session
+__prepared_lock = threading.Lock()
+
+
+def __prepared_statement(sql):
+    """
+    Register a %s template under a generated name, once
+    """
+    with __prepared_lock:
+        if sql not in __prepared_statements:
+            parts = sql.strip().rstrip(";").split("%s")
+            body = "".join(f"{part}${n}" for n, part in enumerate(parts[:-1], start=1)) + parts[-1]
+            __prepared_statements[sql] = (
+                f"citegres_{len(__prepared_statements)}",
+                body,
+                len(parts) - 1,
+            )
+        return __prepared_statements[sql]
+
+
+def __execute_prepared_sql(cur, sql):
+    """
+    EXECUTE form of a template, PREPAREd on first use per connection
+    """
+    name, body, parameters = __prepared_statement(sql)
+    prepared = __prepared_connections.setdefault(cur.connection, set())
+    if name not in prepared:
+        cur.execute(f"PREPARE {name} AS {body};")
+        prepared.add(name)
+    return (
+        f"EXECUTE {name} ({', '.join(['%s'] * parameters)});" if parameters else f"EXECUTE {name};"
+    )
+
+
+def execute_prepared(cur, sql, args=()):
+    """
+    Execute a %s template as a prepared statement, parsed & planned once per connection
+    """
+    if not PREPARED_STATEMENTS:
+        return cur.execute(sql, args)
+    return cur.execute(__execute_prepared_sql(cur=cur, sql=sql), args)
+
+
+def execute_prepared_batch(cur, sql, argslist, page_size=None):
+    """
+    Execute a %s template once per args through execute_batch, PREPARED_PAGE_SIZE per round trip
+    """
+    page_size = PREPARED_PAGE_SIZE if page_size is None else page_size
+    if PREPARED_STATEMENTS:
+        sql = __execute_prepared_sql(cur=cur, sql=sql)
+    psycopg2.extras.execute_batch(cur, sql, argslist, page_size=page_size)
+
+
+def deallocate_prepared(cur, conn):
+    """
+    Drop every statement prepared in the session of passed connection
+    """
+    try:
+        cur.execute("DEALLOCATE ALL;")
+        __prepared_connections.pop(conn, None)
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in deallocate_prepared")
+    return commit_prior(cur=cur, conn=conn)
+
+
+# POOL DEFS
+__pools = {}
+__pools_lock = threading.Lock()
+__pooled_connections = weakref.WeakKeyDictionary()  # connection -> config section
+
+
+def get_pool(section=None):
+    """
+    Get the connection pool for a config section, opening it on first use
+    """
+    if section is None:
+        section = DB_SELECTION
+    with __pools_lock:
+        if section not in __pools:
+            params, settings = __connect_params(section=section)
+            __pools[section] = psycopg2.pool.ThreadedConnectionPool(
+                settings.get("pool_minconn", POOL_MINCONN),
+                settings.get("pool_maxconn", POOL_MAXCONN),
+                **params,
+            )
+            pyLogger.info(
+                f"connection pool opened for: {section} (min {__pools[section].minconn}, max {__pools[section].maxconn})"
+            )
+        return __pools[section]
+
+
+def __connection_healthy(conn):
+    """
+    Check a pooled connection is open and, when health checks are enabled, answers a ping
+    """
+    if conn.closed:
+        return False
+    if not POOL_HEALTH_CHECK:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1;")
+        conn.rollback()
+        return True
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in pool health check")
+        return False
+
+
+def checkout_connection(section=None):
+    """
+    Check a healthy connection & cursor out of the pool for a config section
+    """
+    if section is None:
+        section = DB_SELECTION
+    pool = get_pool(section=section)
+    for _attempt in range(pool.maxconn + 1):
+        conn = pool.getconn()
+        if __connection_healthy(conn):
+            __pooled_connections[conn] = section
+            pyLogger.info(f"connection checked out of pool: {section}")
+            return conn.cursor(cursor_factory=LoggingCursor), conn
+        pyLogger.info(f"discarding unhealthy pooled connection: {section}")
+        pool.putconn(conn, close=True)
+    raise psycopg2.pool.PoolError(f"no healthy connection available in pool: {section}")
+
+
+def return_connection(cur, conn):
+    """
+    Roll back & return a checked out connection to its pool, broken connections are discarded
+    """
+    section = __pooled_connections.pop(conn, None)
+    if not cur.closed:
+        cur.close()
+    discard = bool(conn.closed)
+    if not discard:
+        try:
+            if conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                clear_id_cache()  # ids cached by the uncommitted work rolled back below
+            conn.rollback()
+        except Exception as E:
+            pyLogger.error(f"{str(E)} \nexception in return_connection")
+            discard = True
+    with __pools_lock:
+        pool = __pools.get(section)
+    if pool is None or pool.closed:
+        conn.close()
+        return
+    pool.putconn(conn, close=discard)
+
+
+def close_pools(section=None):
+    """
+    Close the pool for a config section, or every pool when no section is passed
+    """
+    with __pools_lock:
+        sections = list(__pools) if section is None else [section]
+        for __section in sections:
+            pool = __pools.pop(__section, None)
+            if pool is not None:
+                pool.closeall()
+                pyLogger.info(f"connection pool closed for: {__section}")
 
 
 def commit_prior(cur, conn):
     """
-    Attempt to commit all prior cursor execute transactions
+    Attempt to commit all prior cursor execute transactions, deferred inside a transaction block
     """
+    if conn in __transactions:
+        return cur, conn
+    if conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+        clear_id_cache()  # the commit below rolls back instead
     try:
         conn.commit()
         pyLogger.info("transaction(s) committed")
@@ -175,24 +883,1001 @@ def commit_prior(cur, conn):
     except Exception as E:
         pyLogger.error(f"{str(E)} \ntransaction(s) rolled back")
         conn.rollback()
+        clear_id_cache()
         return reset_connection(cur=cur, conn=conn)
 
 
 def commit_transaction(cur, conn, transaction):
     """
-    Attempt to commit passed cursor transaction
+    Attempt to commit passed cursor transaction, deferred inside a transaction block
     """
     try:
         cur.execute(transaction)
-        conn.commit()
-        pyLogger.info("transaction committed")
-        return cur, conn
+        return commit_prior(cur=cur, conn=conn)
     except Exception as E:
+        if conn in __transactions:
+            pyLogger.error(
+                f"{str(E)} \nexception in commit_transaction, left to enclosing transaction"
+            )
+            return cur, conn
         pyLogger.error(f"{str(E)} \ntransaction rolled back")
         conn.rollback()
+        clear_id_cache()
         return reset_connection(cur=cur, conn=conn)
 
 
+# TRANSACTION DEFS
+__transactions = weakref.WeakKeyDictionary()  # connection -> names of rolled back savepoints
+
+
+@contextlib.contextmanager
+def transaction(cur, conn):
+    """
+    Run the enclosed postility calls as one transaction, commit_prior is deferred until the block
+    exits, any exception rolls the whole block back; nested blocks join the outer transaction
+    """
+    if conn in __transactions:
+        yield __transactions[conn]
+        return
+    __transactions[conn] = []
+    try:
+        yield __transactions[conn]
+        conn.commit()
+        pyLogger.info("transaction block committed")
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \ntransaction block rolled back")
+        conn.rollback()
+        clear_id_cache()  # ids inserted inside the block are gone
+        raise
+    finally:
+        rolled_back = __transactions.pop(conn, [])
+        if rolled_back:
+            pyLogger.error(f"savepoint(s) rolled back in transaction block: {rolled_back}")
+
+
+@contextlib.contextmanager
+def savepoint(cur, conn, name):
+    """
+    Run the enclosed statements under a savepoint, rolling back to it when they raise or leave the
+    transaction failed
+    """
+    cur.execute(f"SAVEPOINT {name};")
+    try:
+        yield
+    except Exception:
+        cur.execute(f"ROLLBACK TO SAVEPOINT {name};")
+        clear_id_cache()
+        raise
+    if conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+        pyLogger.error(f"statement(s) failed under savepoint {name}, rolling back to it")
+        cur.execute(f"ROLLBACK TO SAVEPOINT {name};")
+        clear_id_cache()
+        if conn in __transactions:
+            __transactions[conn].append(name)
+    cur.execute(f"RELEASE SAVEPOINT {name};")
+
+
+# TIMEOUT DEFS
+__swap_statement_timeout = """
+SELECT current_setting('statement_timeout'), set_config('statement_timeout', %s, %s);
+"""
+
+
+def __set_statement_timeout(cur, conn, timeout, local):
+    """
+    Set statement_timeout for the session, or for the open transaction only when local, returning
+    the previous timeout; a session timeout is committed right away only when nothing else is pending
+    """
+    idle = conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    cur.execute(__swap_statement_timeout, (str(timeout), local))
+    previous = cur.fetchone()[0]
+    if idle and not local:
+        conn.commit()  # a later rollback would otherwise undo the setting
+    return previous
+
+
+@contextlib.contextmanager
+def statement_timeout(cur, conn, timeout):
+    """
+    Cancel any statement of the enclosed postility calls running longer than timeout (milliseconds
+    or a postgres interval such as '30s'), restoring the previous timeout on exit; inside a
+    transaction block or with uncommitted work pending the timeout is local to that transaction,
+    never committing it
+    """
+    local = (
+        conn in __transactions
+        or conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE
+    )
+    previous = __set_statement_timeout(cur, conn, timeout, local=local)
+    try:
+        yield
+    finally:
+        if not conn.closed:  # else reset by commit_prior, the new connection never saw the timeout
+            status = conn.info.transaction_status
+            if status == psycopg2.extensions.TRANSACTION_STATUS_INERROR and conn in __transactions:
+                pyLogger.error("transaction block failed under statement_timeout, left to rollback")
+            else:
+                if status == psycopg2.extensions.TRANSACTION_STATUS_INERROR:
+                    conn.rollback()
+                    clear_id_cache()
+                if (
+                    not local
+                    or conn in __transactions
+                    or status == psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+                ):  # else the transaction ended, taking its local timeout along
+                    __set_statement_timeout(cur, conn, previous, local=local)
+
+
+# RESOLVED CITATION DEFS
+__resolve_citations = {  # insert only, like every table they join
+    "citations_resolved_openalex": """
+INSERT INTO citations_resolved_openalex (source_id, target_id, source, target)
+SELECT citations.source, citations.target,
+       %(openalex_url_prefix)s || source.work, %(openalex_url_prefix)s || target.work
+FROM {citations} citations
+JOIN openalex source ON source.id = citations.source
+JOIN openalex target ON target.id = citations.target
+WHERE NOT EXISTS (
+    SELECT 1 FROM citations_resolved_openalex resolved
+    WHERE resolved.source_id = citations.source AND resolved.target_id = citations.target)
+ON CONFLICT DO NOTHING;
+""",
+    "citations_resolved_paper_title": """
+INSERT INTO citations_resolved_paper_title (source_id, target_id, source, target)
+SELECT source.id, target.id, source.title, target.title
+FROM {citations} citations
+JOIN papers source ON source.openalex = citations.source
+JOIN papers target ON target.openalex = citations.target
+WHERE NOT EXISTS (
+    SELECT 1 FROM citations_resolved_paper_title resolved
+    WHERE resolved.source_id = source.id AND resolved.target_id = target.id)
+ON CONFLICT DO NOTHING;
+""",
+    "citations_resolved_author": """
+INSERT INTO citations_resolved_author (source_id, target_id, source, target)
+SELECT source.id, target.id, source_author.author, target_author.author
+FROM {citations} citations
+JOIN papers source ON source.openalex = citations.source
+JOIN papers target ON target.openalex = citations.target
+JOIN authors source_author ON source_author.id = source.author
+JOIN authors target_author ON target_author.id = target.author
+WHERE NOT EXISTS (
+    SELECT 1 FROM citations_resolved_author resolved
+    WHERE resolved.source_id = source.id AND resolved.target_id = target.id)
+ON CONFLICT DO NOTHING;
+""",
+}
+
+RESOLVED_CITATION_TABLES = tuple(__resolve_citations)
+
+__stage_resolve_delta = [
+    "CREATE TEMP TABLE resolve_stage (work BIGINT) ON COMMIT DROP;",
+    "DROP TABLE IF EXISTS pg_temp.resolve_delta;",
+    """
+    CREATE TEMP TABLE resolve_delta ON COMMIT DROP AS
+    WITH delta AS (SELECT openalex.id FROM resolve_stage JOIN openalex USING (work))
+    SELECT citations.source, citations.target FROM citations JOIN delta ON citations.source = delta.id
+    UNION
+    SELECT citations.source, citations.target FROM citations JOIN delta ON citations.target = delta.id;
+    """,
+    "ANALYZE resolve_delta;",
+]
+
+__analyze_resolve_citations = """
+ANALYZE citations, papers, openalex, authors;
+"""  # bulk imports leave planner stats stale, misplanning the joins into nested loops
+
+
+def refresh_resolved_citations(cur, conn, openalex_urls=None, rebuild=False, copy_format="text"):
+    """
+    Add citation edges resolvable since the last refresh to the citations_resolved_* tables,
+    only checking edges from or to openalex_urls when passed, rebuild empties & refills them
+    """
+    started = time.perf_counter()
+    citations = "citations"
+    try:
+        cur.execute(__analyze_resolve_citations)
+        if openalex_urls is not None and not rebuild:
+            __stage_and_merge(
+                cur=cur,
+                conn=conn,
+                stage="resolve_stage",
+                create_stage=__stage_resolve_delta[0],
+                df=pd.DataFrame({"work": openalex_works(openalex_urls).dropna().drop_duplicates()}),
+                merge=__stage_resolve_delta[1:],
+                copy_format=copy_format,
+            )
+            citations = "resolve_delta"
+        for table, resolve in __resolve_citations.items():
+            if rebuild:
+                cur.execute(f"TRUNCATE {table};")
+            cur.execute(resolve.format(citations=citations), __openalex_url_params)
+            pyLogger.info(f"{table} gained {cur.rowcount} edges")
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in refresh_resolved_citations")
+    pyLogger.info(f"resolved citations refreshed in {time.perf_counter() - started:.3f}s")
+    return commit_prior(cur=cur, conn=conn)
+
+
+# NODE STATS DEFS
+__node_counts = """
+WITH paper_counts AS (
+    SELECT coalesce(cited.node, citing.node) AS node,
+           coalesce(cited.citations, 0) AS cited, coalesce(citing.citations, 0) AS citing
+    FROM (SELECT target AS node, count(*) AS citations FROM citations GROUP BY target) cited
+    FULL JOIN (SELECT source AS node, count(*) AS citations FROM citations GROUP BY source) citing
+    ON citing.node = cited.node
+)
+"""  # two index ordered group bys merged, a UNION ALL re-aggregate misestimates & spills
+
+__node_stats = {  # kind -> (kind, node_id, label, in_citations, out_citations, rank) per node
+    "paper": __node_counts
+    + """
+SELECT 'paper', paper_counts.node,
+       coalesce(paper.title, %(openalex_url_prefix)s || openalex.work),
+       paper_counts.cited, paper_counts.citing,
+       rank() OVER (ORDER BY paper_counts.cited DESC)
+FROM paper_counts
+JOIN openalex ON openalex.id = paper_counts.node
+LEFT JOIN (
+    SELECT DISTINCT ON (openalex) openalex, title FROM papers ORDER BY openalex, id
+) paper ON paper.openalex = paper_counts.node
+""",
+    "author": __node_counts
+    + """
+SELECT 'author', authors.id, authors.author,
+       sum(paper_counts.cited)::BIGINT, sum(paper_counts.citing)::BIGINT,
+       rank() OVER (ORDER BY sum(paper_counts.cited) DESC)
+FROM paper_counts
+JOIN papers ON papers.openalex = paper_counts.node
+JOIN (
+    SELECT id AS paper, author FROM papers
+    UNION
+    SELECT paper, author FROM supports
+) wrote ON wrote.paper = papers.id
+JOIN authors ON authors.id = wrote.author
+GROUP BY authors.id, authors.author
+""",
+}
+
+NODE_STATS_KINDS = tuple(__node_stats)
+
+__insert_node_stats = """
+INSERT INTO node_stats (kind, node_id, label, in_citations, out_citations, rank)
+"""
+
+__delete_node_stats = """
+DELETE FROM node_stats;
+"""  # not TRUNCATE, readers keep seeing the previous stats until the refresh commits
+
+__select_node_stats = """
+SELECT label, in_citations, out_citations, rank
+FROM node_stats
+WHERE kind = %s
+ORDER BY rank, label
+LIMIT %s;
+"""
+
+__select_node_stats_live = """
+SELECT label, in_citations, out_citations, rank
+FROM ({stats}) stats (kind, node_id, label, in_citations, out_citations, rank)
+ORDER BY rank, label
+LIMIT %(n)s;
+"""
+
+
+def refresh_node_stats(cur, conn):
+    """
+    Recount in & out citations and citation ranks of every paper & author into node_stats
+    """
+    started = time.perf_counter()
+    try:
+        cur.execute(__delete_node_stats)
+        for kind, stats in __node_stats.items():
+            cur.execute(__insert_node_stats + stats, __openalex_url_params)
+            pyLogger.info(f"node_stats counted {cur.rowcount} {kind} nodes")
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in refresh_node_stats")
+    pyLogger.info(f"node_stats refreshed in {time.perf_counter() - started:.3f}s")
+    return commit_prior(cur=cur, conn=conn)
+
+
+def select_top_cited(cur, conn, kind="paper", n=25, materialized=True):
+    """
+    Select the n most cited papers or authors with in & out citation counts & rank,
+    read from node_stats, or aggregated over citations when materialized is False
+    """
+    if kind not in __node_stats:
+        raise ValueError(f"kind must be one of {NODE_STATS_KINDS}, got {kind!r}")
+    try:
+        if materialized:
+            cur.execute(__select_node_stats, (kind, n))
+        else:
+            cur.execute(
+                __select_node_stats_live.format(stats=__node_stats[kind]),
+                {**__openalex_url_params, "n": n},
+            )
+        top_cited = pd.DataFrame(
+            cur.fetchall(), columns=[kind, "in_citations", "out_citations", "rank"]
+        )
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in select_top_cited")
+        top_cited = ERROR_FAILED_TO_EXECUTE
+    return commit_prior(cur=cur, conn=conn), top_cited
+
+
+# SEARCH DEFS
+SEARCH_CONFIG = "english"  # text search configuration of papers.search
+
+__paper_search_document = """
+UPDATE papers SET search =
+    setweight(to_tsvector('{config}', papers.title), 'A')
+    || setweight(to_tsvector('{config}', coalesce(documents.concepts, '')), 'B')
+FROM (
+    SELECT papers.id, string_agg(concepts.concept, ' ' ORDER BY concepts.concept) AS concepts
+    FROM papers
+    LEFT JOIN paper_concepts ON paper_concepts.paper = papers.id
+    LEFT JOIN concepts ON concepts.id = paper_concepts.concept
+    {where}
+    GROUP BY papers.id
+) documents
+WHERE papers.id = documents.id;
+"""  # titles weigh A, concepts B
+
+__paper_search_where = {
+    "rebuild": "",
+    "unindexed": "WHERE papers.search IS NULL",
+    "delta": "WHERE papers.title IN (SELECT title FROM search_stage)",
+}
+
+__create_search_stage = "CREATE TEMP TABLE search_stage (title TEXT) ON COMMIT DROP;"
+
+__search_papers = """
+SELECT papers.title, papers.doi, papers.pdate, ts_rank_cd(papers.search, query) AS rank
+FROM papers, websearch_to_tsquery('{config}', %(query)s) query
+WHERE papers.search @@ query
+ORDER BY rank DESC, papers.id
+LIMIT %(limit)s OFFSET %(offset)s;
+"""
+
+__search_papers_fuzzy = """
+SELECT papers.title, papers.doi, papers.pdate, similarity(papers.title, %(query)s) AS rank
+FROM papers
+WHERE papers.title %% %(query)s
+ORDER BY rank DESC, papers.id
+LIMIT %(limit)s OFFSET %(offset)s;
+"""
+
+__enable_fuzzy_search = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+    "CREATE INDEX IF NOT EXISTS papers_title_trgm_idx ON papers USING GIN (title gin_trgm_ops);",
+]
+
+
+def refresh_paper_search(cur, conn, titles=None, rebuild=False, copy_format="text"):
+    """
+    Index titles & concepts of papers without a search document, or of passed titles,
+    into papers.search, rebuild reindexes every paper
+    """
+    started = time.perf_counter()
+    where = "rebuild" if rebuild else "unindexed" if titles is None else "delta"
+    try:
+        if where == "delta":
+            __stage_and_merge(
+                cur=cur,
+                conn=conn,
+                stage="search_stage",
+                create_stage=__create_search_stage,
+                df=pd.DataFrame({"title": pd.Series(titles, dtype=object).drop_duplicates()}),
+                merge=[],
+                copy_format=copy_format,
+            )
+        cur.execute(
+            __paper_search_document.format(config=SEARCH_CONFIG, where=__paper_search_where[where])
+        )
+        pyLogger.info(f"indexed {cur.rowcount} papers for search")
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in refresh_paper_search")
+    pyLogger.info(f"paper search refreshed in {time.perf_counter() - started:.3f}s")
+    return commit_prior(cur=cur, conn=conn)
+
+
+def search_papers(cur, conn, query, limit=25, offset=0, fuzzy=False):
+    """
+    Search papers by title & concept words (web search syntax) ranked by ts_rank_cd, a page of limit
+    results from offset, fuzzy ranks titles by trigram similarity instead (see enable_fuzzy_search)
+    """
+    try:
+        cur.execute(
+            __search_papers_fuzzy if fuzzy else __search_papers.format(config=SEARCH_CONFIG),
+            {"query": query, "limit": limit, "offset": offset},
+        )
+        results = pd.DataFrame(cur.fetchall(), columns=["title", "doi", "pdate", "rank"])
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in search_papers")
+        results = ERROR_FAILED_TO_EXECUTE
+    return commit_prior(cur=cur, conn=conn), results
+
+
+def enable_fuzzy_search(cur, conn):
+    """
+    Install pg_trgm & a trigram index on papers.title for search_papers(fuzzy=True), needs the
+    extension to be available to the server & privileges to create it
+    """
+    try:
+        for __statement in __enable_fuzzy_search:
+            cur.execute(__statement)
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in enable_fuzzy_search")
+    return commit_prior(cur=cur, conn=conn)
+
+
+# MIGRATION DEFS
+__create_schema_version = """
+CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at TIMESTAMPTZ NOT NULL DEFAULT now());
+"""
+
+__select_schema_version = """
+SELECT COALESCE(MAX(version), 0) FROM schema_version;
+"""
+
+__select_schema_built = """
+SELECT to_regclass('schema_version') IS NOT NULL, to_regclass('papers') IS NOT NULL;
+"""
+
+__insert_schema_version = """
+INSERT INTO schema_version (version, name) VALUES (%s, %s);
+"""
+
+__schema_migrations = [  # (version, name, statements), append only, never edit an applied entry
+    (
+        1,
+        "resolve_join_indexes",
+        [
+            "CREATE INDEX IF NOT EXISTS papers_openalex_idx ON papers (openalex);",
+            "CREATE INDEX IF NOT EXISTS papers_author_idx ON papers (author);",
+            "CREATE INDEX IF NOT EXISTS citations_target_idx ON citations (target);",
+            "CREATE INDEX IF NOT EXISTS supports_author_idx ON supports (author);",
+            "CREATE INDEX IF NOT EXISTS paper_concepts_concept_idx ON paper_concepts (concept);",
+            "ANALYZE papers, citations, supports, paper_concepts;",
+        ],
+    ),
+    (
+        2,
+        "unlogged_papers_raw",
+        [
+            "ALTER TABLE papers_raw SET UNLOGGED;",
+        ],
+    ),
+    (
+        3,
+        "resolved_citation_tables",
+        [
+            "CREATE TABLE citations_resolved_openalex (source_id INTEGER, target_id INTEGER, source TEXT NOT NULL, target TEXT NOT NULL, PRIMARY KEY(source_id, target_id));",
+            "CREATE TABLE citations_resolved_paper_title (source_id INTEGER, target_id INTEGER, source TEXT NOT NULL, target TEXT NOT NULL, PRIMARY KEY(source_id, target_id));",
+            "CREATE TABLE citations_resolved_author (source_id INTEGER, target_id INTEGER, source TEXT NOT NULL, target TEXT NOT NULL, PRIMARY KEY(source_id, target_id));",
+            """
+INSERT INTO citations_resolved_openalex (source_id, target_id, source, target)
+SELECT citations.source, citations.target, source.openalex_url, target.openalex_url
+FROM citations
+JOIN openalex source ON source.id = citations.source
+JOIN openalex target ON target.id = citations.target;
+""",
+            """
+INSERT INTO citations_resolved_paper_title (source_id, target_id, source, target)
+SELECT source.id, target.id, source.title, target.title
+FROM citations
+JOIN papers source ON source.openalex = citations.source
+JOIN papers target ON target.openalex = citations.target;
+""",
+            """
+INSERT INTO citations_resolved_author (source_id, target_id, source, target)
+SELECT source.id, target.id, source_author.author, target_author.author
+FROM citations
+JOIN papers source ON source.openalex = citations.source
+JOIN papers target ON target.openalex = citations.target
+JOIN authors source_author ON source_author.id = source.author
+JOIN authors target_author ON target_author.id = target.author;
+""",
+        ],
+    ),
+    (
+        4,
+        "openalex_work_keys",
+        [
+            "ALTER TABLE openalex ADD COLUMN work BIGINT;",
+            "UPDATE openalex SET work = substring(openalex_url FROM '(?:^|/)W([0-9]+)$')::BIGINT;",
+            "ALTER TABLE openalex ALTER COLUMN work SET NOT NULL;",
+            "ALTER TABLE openalex ADD CONSTRAINT openalex_work_key UNIQUE (work);",
+            "ALTER TABLE openalex DROP COLUMN openalex_url;",
+        ],
+    ),
+    (
+        5,
+        "import_fingerprints",
+        [
+            "CREATE TABLE import_fingerprints (title TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, imported_at TIMESTAMPTZ NOT NULL DEFAULT now());",
+        ],
+    ),
+    (
+        6,
+        "node_stats",
+        [
+            "CREATE TABLE node_stats (kind TEXT NOT NULL, node_id INTEGER NOT NULL, label TEXT NOT NULL, in_citations BIGINT NOT NULL, out_citations BIGINT NOT NULL, rank BIGINT NOT NULL, PRIMARY KEY(kind, node_id));",
+            "CREATE INDEX node_stats_kind_rank ON node_stats (kind, rank);",
+            *(__insert_node_stats + stats for stats in __node_stats.values()),
+        ],
+    ),
+    (
+        7,
+        "paper_search",
+        [
+            "ALTER TABLE papers ADD COLUMN search tsvector;",
+            __paper_search_document.format(config=SEARCH_CONFIG, where=""),
+            "CREATE INDEX papers_search_idx ON papers USING GIN (search);",
+        ],
+    ),
+    (
+        8,
+        "session_papers_raw",
+        [
+            "DROP TABLE IF EXISTS papers_raw;",
+        ],
+    ),
+]
+
+SCHEMA_VERSION = __schema_migrations[-1][0]
+
+
+def select_schema_version(cur, conn):
+    """
+    Select the applied schema version, 0 for a database built before migrations existed
+    """
+    try:
+        cur.execute(__create_schema_version)
+        cur.execute(__select_schema_version)
+        schema_version = cur.fetchone()[0]
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in select_schema_version")
+        schema_version = ERROR_FAILED_TO_EXECUTE
+    return commit_prior(cur=cur, conn=conn), schema_version
+
+
+def migrate(cur, conn, target=None):
+    """
+    Apply forward schema migrations in place up to target (latest by default), each in its own
+    transaction; stops at the first failing migration
+    """
+    if target is None:
+        target = SCHEMA_VERSION
+    (cur, conn), current = select_schema_version(cur=cur, conn=conn)
+    if current is ERROR_FAILED_TO_EXECUTE:
+        return cur, conn
+    for version, name, statements in __schema_migrations:
+        if version <= current or version > target:
+            continue
+        try:
+            with transaction(cur=cur, conn=conn):
+                for __statement in statements:
+                    cur.execute(__statement, __openalex_url_params)
+                cur.execute(__insert_schema_version, (version, name))
+            pyLogger.info(f"schema migrated to version {version} ({name})")
+        except Exception as E:
+            pyLogger.error(f"{str(E)} \nexception in migrate, schema left at version {current}")
+            break
+        current = version
+    return cur, conn
+
+
+__schema_checked = set()  # dsns whose schema version was checked on connect
+
+
+def check_schema_version(cur, conn):
+    """
+    Warn once per database when its schema is behind SCHEMA_VERSION, as materialized readers &
+    imports need the latest migrations; a built schema is migrated instead if MIGRATE_ON_CONNECT
+    """
+    if conn.dsn in __schema_checked:
+        return cur, conn
+    try:
+        cur.execute(__select_schema_built)
+        versioned, built = cur.fetchone()
+        current = 0
+        if versioned:
+            cur.execute(__select_schema_version)
+            current = cur.fetchone()[0]
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in check_schema_version")
+        return commit_prior(cur=cur, conn=conn)
+    cur, conn = commit_prior(cur=cur, conn=conn)
+    __schema_checked.add(conn.dsn)
+    if current >= SCHEMA_VERSION:
+        return cur, conn
+    if not built:
+        pyLogger.warning("database has no citegres schema, run db_init before using it")
+    elif MIGRATE_ON_CONNECT:
+        pyLogger.warning(f"schema version {current} is behind {SCHEMA_VERSION}, migrating")
+        return migrate(cur=cur, conn=conn)
+    else:
+        pyLogger.warning(
+            f"schema version {current} is behind {SCHEMA_VERSION}, run migrate before reading materialized tables or importing"
+        )
+    return cur, conn
+
+
+# COPY DEFS
+COPY_FORMATS = ("text", "binary")
+
+__copy_from_stdin = {
+    "text": "COPY {table} ({columns}) FROM STDIN WITH (FORMAT text, ENCODING 'UTF8');",
+    "binary": "COPY {table} ({columns}) FROM STDIN WITH (FORMAT binary);",
+}
+
+__select_column_types = """
+SELECT attname, format_type(atttypid, atttypmod)
+FROM pg_attribute
+WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped;
+"""
+
+__copy_text_escapes = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+__copy_binary_header = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+__copy_binary_trailer = struct.pack(">h", -1)
+__copy_binary_null = struct.pack(">i", -1)
+__copy_binary_epoch = datetime.date(2000, 1, 1)
+
+
+def __copy_binary_date(value):
+    if not isinstance(value, datetime.date):
+        value = datetime.date.fromisoformat(str(value))
+    return struct.pack(">i", (value - __copy_binary_epoch).days)
+
+
+__copy_binary_dtypes = {  # fixed width types decoded straight into NumPy
+    "smallint": np.dtype(">i2"),
+    "integer": np.dtype(">i4"),
+    "bigint": np.dtype(">i8"),
+    "real": np.dtype(">f4"),
+    "double precision": np.dtype(">f8"),
+}
+__copy_to_stdout = "COPY {table} ({columns}) TO STDOUT WITH (FORMAT binary);"
+
+__copy_binary_encoders = {
+    "text": lambda value: str(value).encode("utf-8"),
+    "integer": lambda value: struct.pack(">i", int(value)),
+    "bigint": lambda value: struct.pack(">q", int(value)),
+    "date": __copy_binary_date,
+}
+
+
+def dataframe_to_copy_text(df):
+    """
+    Serialize passed df into a UTF-8 COPY text format buffer, None & "NULL" are written as \\N
+    """
+    columns = []
+    for column in df.columns:
+        values = [
+            None if null or value == "NULL" else (value if value.__class__ is str else str(value))
+            for value, null in zip(df[column].tolist(), df[column].isna().tolist(), strict=True)
+        ]
+        present = "".join(filter(None, values))
+        if any(special in present for special in "\\\t\n\r"):
+            values = [
+                None if value is None else value.translate(__copy_text_escapes) for value in values
+            ]
+        columns.append(["\\N" if value is None else value for value in values])
+    if len(df) == 0 or not columns:
+        return io.BytesIO()
+    return io.BytesIO(
+        ("\n".join(["\t".join(row) for row in zip(*columns, strict=True)]) + "\n").encode("utf-8")
+    )
+
+
+def dataframe_to_copy_binary(df, types):
+    """
+    Serialize passed df into a COPY binary format buffer, types are postgres type names per column
+    """
+    try:
+        encoders = [__copy_binary_encoders[ptype] for ptype in types]
+    except KeyError as E:
+        raise ValueError(f"no COPY binary encoder for type {E}") from E
+    columns = []
+    for column, encode in zip(df.columns, encoders, strict=True):
+        fields = []
+        for value, null in zip(df[column].tolist(), df[column].isna().tolist(), strict=True):
+            if null or (value.__class__ is str and value == "NULL"):
+                fields.append(__copy_binary_null)
+            else:
+                data = encode(value)
+                fields.append(struct.pack(">i", len(data)) + data)
+        columns.append(fields)
+    field_count = struct.pack(">h", len(encoders))
+    buffer = io.BytesIO()
+    buffer.write(__copy_binary_header)
+    buffer.write(b"".join([field_count + b"".join(row) for row in zip(*columns, strict=True)]))
+    buffer.write(__copy_binary_trailer)
+    buffer.seek(0)
+    return buffer
+
+
+def copy_from_df(cur, conn, table, df, copy_format="text"):
+    """
+    Stream passed df into table through COPY ... FROM STDIN, df columns must match table columns
+    """
+    if copy_format not in COPY_FORMATS:
+        raise ValueError(f"copy_format must be one of {COPY_FORMATS}, got {copy_format!r}")
+    started = time.perf_counter()
+    if copy_format == "binary":
+        cur.execute(__select_column_types, (table,))
+        column_types = dict(cur.fetchall())
+        buffer = dataframe_to_copy_binary(df, [column_types[column] for column in df.columns])
+    else:
+        buffer = dataframe_to_copy_text(df)
+    cur.copy_expert(
+        __copy_from_stdin[copy_format].format(table=table, columns=", ".join(df.columns)),
+        buffer,
+    )
+    elapsed = time.perf_counter() - started
+    stats = {
+        "table": table,
+        "rows": len(df),
+        "seconds": elapsed,
+        "rows_per_sec": len(df) / elapsed if elapsed > 0 else float("inf"),
+    }
+    pyLogger.info(
+        f"copied {stats['rows']} rows into {table} ({copy_format}) in {elapsed:.3f}s, {stats['rows_per_sec']:,.0f} rows/sec"
+    )
+    return stats
+
+
+def copy_binary_to_arrays(buffer, types):
+    """
+    Decode a COPY binary buffer of NOT NULL fixed width columns into one native NumPy array each
+    """
+    try:
+        dtypes = [__copy_binary_dtypes[ptype] for ptype in types]
+    except KeyError as E:
+        raise ValueError(f"no COPY binary decoder for type {E}") from E
+    data = memoryview(buffer)
+    if bytes(data[:11]) != __copy_binary_header[:11]:
+        raise ValueError("not a COPY binary buffer")
+    (extension,) = struct.unpack(">i", data[15:19])
+    body = data[19 + extension : len(data) - len(__copy_binary_trailer)]
+    row = np.dtype(
+        [("fields", ">i2")]
+        + [
+            field
+            for n, dtype in enumerate(dtypes)
+            for field in ((f"length{n}", ">i4"), (f"value{n}", dtype))
+        ]
+    )
+    if len(body) % row.itemsize:
+        raise ValueError("COPY binary rows are not fixed width, NULLs or variable width columns")
+    rows = np.frombuffer(body, dtype=row)
+    if len(rows) and not (rows["fields"] == len(dtypes)).all():
+        raise ValueError("COPY binary field count does not match passed types")
+    for n, dtype in enumerate(dtypes):
+        if not (rows[f"length{n}"] == dtype.itemsize).all():
+            raise ValueError(
+                "COPY binary rows are not fixed width, NULLs or variable width columns"
+            )
+    return [rows[f"value{n}"].astype(dtype.newbyteorder("=")) for n, dtype in enumerate(dtypes)]
+
+
+def select_columnar(cur, conn, table, columns, names=None):
+    """
+    Select NOT NULL numeric columns of table through COPY ... TO STDOUT binary into NumPy columns
+    """
+    try:
+        cur.execute(__select_column_types, (table,))
+        column_types = dict(cur.fetchall())
+        buffer = io.BytesIO()
+        cur.copy_expert(__copy_to_stdout.format(table=table, columns=", ".join(columns)), buffer)
+        arrays = copy_binary_to_arrays(
+            buffer.getbuffer(), [column_types[column] for column in columns]
+        )
+        selected = pd.DataFrame(
+            dict(zip(columns if names is None else names, arrays, strict=True)), copy=False
+        )
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in select_columnar")
+        selected = ERROR_FAILED_TO_EXECUTE
+    return commit_prior(cur=cur, conn=conn), selected
+
+
+__drop_stage = "DROP TABLE IF EXISTS pg_temp.{stage};"
+
+
+def __stage_and_merge(cur, conn, stage, create_stage, df, merge, copy_format="text"):
+    """
+    COPY passed df into a fresh ON COMMIT DROP temp table, then run the merge statements against it
+    """
+    cur.execute(__drop_stage.format(stage=stage))
+    cur.execute(create_stage)
+    stats = copy_from_df(cur=cur, conn=conn, table=stage, df=df, copy_format=copy_format)
+    for __statement in merge:
+        cur.execute(__statement)
+    return stats
+
+
+__copy_dimension = [
+    "CREATE TEMP TABLE {table}_stage ({column} {column_type}) ON COMMIT DROP;",
+    "INSERT INTO {table} ({column}) SELECT DISTINCT {column} FROM {table}_stage WHERE {column} IS NOT NULL ON CONFLICT ({column}) DO NOTHING;",
+]
+
+
+def copy_dimension(cur, conn, table, column, values, copy_format="text", column_type="TEXT"):
+    """
+    Bulk insert passed values into a (id, column) dimension table through a COPY staging table
+    """
+    create_stage, merge_stage = (
+        __statement.format(table=table, column=column, column_type=column_type)
+        for __statement in __copy_dimension
+    )
+    try:
+        __stage_and_merge(
+            cur=cur,
+            conn=conn,
+            stage=f"{table}_stage",
+            create_stage=create_stage,
+            df=pd.DataFrame({column: pd.Series(values, dtype=object).drop_duplicates()}),
+            merge=[merge_stage],
+            copy_format=copy_format,
+        )
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in copy_dimension ({table})")
+    return commit_prior(cur=cur, conn=conn)
+
+
+def __df_authors(df):
+    return df.authors[df.authors.map(lambda authors: isinstance(authors, list))].explode()
+
+
+def __df_concepts(df):
+    return df.concepts[df.concepts.map(lambda concepts: isinstance(concepts, list))].explode()
+
+
+def __df_openalex_works(df):
+    referenced_works = df.referenced_works[
+        df.referenced_works.map(lambda referenced_works: isinstance(referenced_works, list))
+    ].explode()
+    return openalex_works(pd.concat([referenced_works, df.openalex_id], ignore_index=True)).dropna()
+
+
+def copy_authors(cur, conn, df, copy_format="text"):
+    """
+    Bulk insert all authors from passed df into database with COPY
+    """
+    return copy_dimension(
+        cur=cur,
+        conn=conn,
+        table="authors",
+        column="author",
+        values=__df_authors(df),
+        copy_format=copy_format,
+    )
+
+
+def copy_concepts(cur, conn, df, copy_format="text"):
+    """
+    Bulk insert all concepts from passed df into database with COPY
+    """
+    return copy_dimension(
+        cur=cur,
+        conn=conn,
+        table="concepts",
+        column="concept",
+        values=__df_concepts(df),
+        copy_format=copy_format,
+    )
+
+
+def copy_openalexs(cur, conn, df, copy_format="text"):
+    """
+    Bulk insert all openalex works from passed df into database with COPY
+    """
+    return copy_dimension(
+        cur=cur,
+        conn=conn,
+        table="openalex",
+        column="work",
+        values=__df_openalex_works(df),
+        copy_format=copy_format,
+        column_type="BIGINT",
+    )
+
+
+def copy_papers_raw(cur, conn, df, copy_format="text"):
+    """
+    Bulk stage all paper entries from passed df in papers_raw with COPY, then normalize them to papers
+    """
+    papers_raw = pd.DataFrame(
+        {
+            "doi": df.doi,
+            "title": df.title,
+            "pdate": df.publication_date,
+            "author": df.authors.map(
+                lambda authors: authors[0] if isinstance(authors, list) and authors else None
+            ),
+            "publisher": df.publisher,
+            "ptype": df.type,
+            "venue": df.venue,
+            "openalex": df.openalex_id,
+        }
+    )
+    try:
+        create_papers_raw(cur=cur)
+        copy_from_df(cur=cur, conn=conn, table="papers_raw", df=papers_raw, copy_format=copy_format)
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in copy_papers_raw")
+        return commit_prior(cur=cur, conn=conn)
+    return papers_raw_to_papers(cur=cur, conn=conn)
+
+
+# UPSERT DEFS
+UPSERT_PAGE_SIZE = 1000
+
+__upsert_dimension = """
+INSERT INTO {table} ({column}) VALUES %s ON CONFLICT ({column}) DO NOTHING RETURNING id;
+"""
+
+
+def upsert_dimension(cur, conn, table, column, values):
+    """
+    Insert passed values into a (id, column) dimension table with ON CONFLICT DO NOTHING,
+    returns the ids of newly inserted rows without reading the existing table
+    """
+    values = pd.Series(values, dtype=object).dropna()
+    values = values[values != "NULL"].drop_duplicates().sort_values()
+    try:
+        inserted = psycopg2.extras.execute_values(
+            cur,
+            __upsert_dimension.format(table=table, column=column),
+            [(value,) for value in values],
+            page_size=UPSERT_PAGE_SIZE,
+            fetch=True,
+        )
+        inserted_ids = [row[0] for row in inserted]
+        pyLogger.info(f"upserted {len(values)} {column} values, {len(inserted_ids)} new")
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in upsert_dimension ({table})")
+        inserted_ids = ERROR_FAILED_TO_EXECUTE
+    return commit_prior(cur=cur, conn=conn), inserted_ids
+
+
+def upsert_authors(cur, conn, df):
+    """
+    Upsert all authors from passed df into database
+    """
+    (cur, conn), _ = upsert_dimension(
+        cur=cur, conn=conn, table="authors", column="author", values=__df_authors(df)
+    )
+    return cur, conn
+
+
+def upsert_concepts(cur, conn, df):
+    """
+    Upsert all concepts from passed df into database
+    """
+    (cur, conn), _ = upsert_dimension(
+        cur=cur, conn=conn, table="concepts", column="concept", values=__df_concepts(df)
+    )
+    return cur, conn
+
+
+def upsert_openalexs(cur, conn, df):
+    """
+    Upsert all openalex works from passed df into database
+    """
+    (cur, conn), _ = upsert_dimension(
+        cur=cur,
+        conn=conn,
+        table="openalex",
+        column="work",
+        values=[int(work) for work in __df_openalex_works(df)],
+    )
+    return cur, conn
+
+
 # INSERT DEFS
 __insert_author = """
 INSERT INTO authors (author) VALUES (%s);
@@ -212,12 +1897,17 @@ def insert_authors(cur, conn, df):
         for author in authors:
             all_authors.append(author)
     all_authors = pd.Series(all_authors)
-    for author in all_authors[~all_authors.isin(values=current_authors.author)].unique():
-        try:
-            cur.execute(__insert_author, (None if author == "NULL" else author,))
-        except Exception as E:
-            pyLogger.error(f"{str(E)} \nexception in insert_authors")
-            break
+    try:
+        execute_prepared_batch(
+            cur=cur,
+            sql=__insert_author,
+            argslist=[
+                (None if author == "NULL" else author,)
+                for author in all_authors[~all_authors.isin(values=current_authors.author)].unique()
+            ],
+        )
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in insert_authors")
     return commit_prior(cur=cur, conn=conn)
 
 
@@ -239,43 +1929,47 @@ def insert_concepts(cur, conn, df):
         for concept in concepts:
             all_concepts.append(concept)
     all_concepts = pd.Series(all_concepts)
-    for concept in all_concepts[~all_concepts.isin(values=current_concepts.concept)].unique():
-        try:
-            cur.execute(__insert_concept, (None if concept == "NULL" else concept,))
-        except Exception as E:
-            pyLogger.error(f"{str(E)} \nexception in insert_concepts")
-            break
+    try:
+        execute_prepared_batch(
+            cur=cur,
+            sql=__insert_concept,
+            argslist=[
+                (None if concept == "NULL" else concept,)
+                for concept in all_concepts[
+                    ~all_concepts.isin(values=current_concepts.concept)
+                ].unique()
+            ],
+        )
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in insert_concepts")
     return commit_prior(cur=cur, conn=conn)
 
 
 __insert_openalex = """
-INSERT INTO openalex (openalex_url) VALUES (%s);
+INSERT INTO openalex (work) VALUES (%s);
 """
 
 
 def insert_openalexs(cur, conn, df):
     """
-    Insert all openalex urls from passed df into database
+    Insert all openalex works from passed df into database
     """
-    (cur, conn), current_openalex_urls = select_openalex_url_from_openalex(cur=cur, conn=conn)
-    if current_openalex_urls is ERROR_FAILED_TO_EXECUTE:
+    (cur, conn), current_works = select_work_from_openalex(cur=cur, conn=conn)
+    if current_works is ERROR_FAILED_TO_EXECUTE:
         logging.error(ERROR_FAILED_TO_EXECUTE)
         return commit_prior(cur=cur, conn=conn)
-    all_openalex_urls = []
-    for referenced_works in df.referenced_works[df.referenced_works != "NULL"]:
-        for referenced_work in referenced_works:
-            all_openalex_urls.append(referenced_work)
-    for openalex_url in df.openalex_id[df.openalex_id != "NULL"]:
-        all_openalex_urls.append(openalex_url)
-    all_openalex_urls = pd.Series(all_openalex_urls)
-    for openalex_url in all_openalex_urls[
-        ~all_openalex_urls.isin(values=current_openalex_urls.openalex_url)
-    ].unique():
-        try:
-            cur.execute(__insert_openalex, (None if openalex_url == "NULL" else openalex_url,))
-        except Exception as E:
-            pyLogger.error(f"{str(E)} \nexception in insert_openalexs")
-            break
+    all_works = __df_openalex_works(df)
+    try:
+        execute_prepared_batch(
+            cur=cur,
+            sql=__insert_openalex,
+            argslist=[
+                (int(work),)
+                for work in all_works[~all_works.isin(values=current_works.work)].unique()
+            ],
+        )
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in insert_openalexs")
     return commit_prior(cur=cur, conn=conn)
 
 
@@ -286,8 +1980,9 @@ INSERT INTO papers_raw (doi, title, pdate, author, publisher, ptype, venue, open
 
 def insert_papers_raw(cur, conn, df):
     """
-    Insert all paper entries from passed df into database
+    Stage all paper entries from passed df in papers_raw, then normalize them to papers
     """
+    rows = []
     for row in df[
         [
             "doi",
@@ -308,186 +2003,726 @@ def insert_papers_raw(cur, conn, df):
         ptype = row[5]
         venue = row[6]
         openalex = row[7]
-        try:
-            cur.execute(
-                __insert_paper_raw,
-                tuple(
-                    None if v == "NULL" else v
-                    for v in [doi, title, pdate, author, publisher, ptype, venue, openalex]
-                ),
+        rows.append(
+            tuple(
+                None if v == "NULL" else v
+                for v in [doi, title, pdate, author, publisher, ptype, venue, openalex]
             )
-        except Exception as E:
-            pyLogger.error(f"{str(E)} \nexception in insert_papers_raw")
-            break
-    return commit_prior(cur=cur, conn=conn)
+        )
+    try:
+        create_papers_raw(cur=cur)
+        execute_prepared_batch(cur=cur, sql=__insert_paper_raw, argslist=rows)
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in insert_papers_raw")
+        return commit_prior(cur=cur, conn=conn)
+    return papers_raw_to_papers(cur=cur, conn=conn)
 
 
 __papers_raw_to_papers = [
-    "INSERT INTO publishers (publisher)    SELECT DISTINCT publisher FROM papers_raw WHERE ((papers_raw.publisher NOT IN (SELECT publisher FROM publishers)) AND (papers_raw.publisher IS NOT NULL));",
-    "INSERT INTO types      (ptype)        SELECT DISTINCT ptype     FROM papers_raw WHERE ((papers_raw.ptype NOT IN (SELECT ptype FROM types)) AND (papers_raw.ptype IS NOT NULL));",
-    "INSERT INTO venues     (venue)        SELECT DISTINCT venue     FROM papers_raw WHERE ((papers_raw.venue NOT IN (SELECT venue FROM venues)) AND (papers_raw.venue IS NOT NULL));",
-    "UPDATE papers_raw SET author_id    = (SELECT authors.id         FROM authors    WHERE authors.author        = papers_raw.author);",
-    "UPDATE papers_raw SET publisher_id = (SELECT publishers.id      FROM publishers WHERE publishers.publisher  = papers_raw.publisher);",
-    "UPDATE papers_raw SET ptype_id     = (SELECT types.id           FROM types      WHERE types.ptype           = papers_raw.ptype);",
-    "UPDATE papers_raw SET venue_id     = (SELECT venues.id          FROM venues     WHERE venues.venue          = papers_raw.venue);",
-    "UPDATE papers_raw SET openalex_id  = (SELECT openalex.id        FROM openalex   WHERE openalex.openalex_url = papers_raw.openalex);",
-    "INSERT INTO papers (doi, title, pdate, author, publisher, ptype, venue, openalex) SELECT doi, title, pdate, author_id, publisher_id, ptype_id, venue_id, openalex_id FROM papers_raw WHERE papers_raw.title NOT IN (SELECT title FROM papers);",
+    "INSERT INTO publishers (publisher) SELECT DISTINCT r.publisher FROM papers_raw r WHERE r.publisher IS NOT NULL AND NOT EXISTS (SELECT 1 FROM publishers d WHERE d.publisher = r.publisher) ON CONFLICT (publisher) DO NOTHING;",
+    "INSERT INTO types      (ptype)     SELECT DISTINCT r.ptype     FROM papers_raw r WHERE r.ptype     IS NOT NULL AND NOT EXISTS (SELECT 1 FROM types      d WHERE d.ptype     = r.ptype)     ON CONFLICT (ptype)     DO NOTHING;",
+    "INSERT INTO venues     (venue)     SELECT DISTINCT r.venue     FROM papers_raw r WHERE r.venue     IS NOT NULL AND NOT EXISTS (SELECT 1 FROM venues     d WHERE d.venue     = r.venue)     ON CONFLICT (venue)     DO NOTHING;",
+    """
+INSERT INTO papers (doi, title, pdate, author, publisher, ptype, venue, openalex)
+SELECT r.doi, r.title, r.pdate, authors.id, publishers.id, types.id, venues.id, openalex.id
+FROM papers_raw r
+JOIN authors ON authors.author = r.author
+LEFT JOIN publishers ON publishers.publisher = r.publisher
+LEFT JOIN types ON types.ptype = r.ptype
+LEFT JOIN venues ON venues.venue = r.venue
+LEFT JOIN openalex ON openalex.work = substring(r.openalex FROM '(?:^|/)W([0-9]+)$')::BIGINT
+WHERE r.title IS NOT NULL AND NOT EXISTS (SELECT 1 FROM papers p WHERE p.title = r.title)
+ORDER BY r.id
+ON CONFLICT (title) DO NOTHING;
+""",
 ]
 
 
 def papers_raw_to_papers(cur, conn):
     """
-    Normalize papers_raw table to papers
+    Normalize papers_raw staged in the open transaction to papers with one joined insert, committing
+    drops papers_raw; rows without a known author are skipped, the first staged row wins a repeated title
     """
     for __statement in __papers_raw_to_papers:
         try:
             cur.execute(__statement)
         except Exception as E:
             pyLogger.error(f"{str(E)} \nexception in papers_raw_to_papers")
-    return clear_papers_raw(cur=cur, conn=conn)
+    return commit_prior(cur=cur, conn=conn)
 
 
-__insert_support = """
-INSERT INTO supports VALUES (%s, %s);
-"""
+def __explode_pairs(df, key, values, skip_first=False):
+    """
+    Explode a list-valued column of df into distinct (key, value) pairs, dropping NULL entries
+    """
+    pairs = df[[key, values]][df[values].map(lambda value: isinstance(value, list))]
+    if skip_first:
+        pairs = pairs.assign(**{values: pairs[values].map(lambda value: value[1:])})
+    pairs = pairs.explode(values).dropna()
+    pairs = pairs[(pairs[key] != "NULL") & (pairs[values] != "NULL")]
+    return pairs.drop_duplicates(ignore_index=True)
+
+
+__insert_supports = [
+    "CREATE TEMP TABLE supports_stage (title TEXT, author TEXT) ON COMMIT DROP;",
+    "INSERT INTO authors (author) SELECT DISTINCT author FROM supports_stage ON CONFLICT (author) DO NOTHING;",
+    """
+    INSERT INTO supports (paper, author)
+    SELECT DISTINCT papers.id, authors.id
+    FROM supports_stage
+    JOIN papers ON papers.title = supports_stage.title
+    JOIN authors ON authors.author = supports_stage.author
+    ON CONFLICT DO NOTHING;
+    """,
+]
 
 
-def insert_supports(cur, conn, df):
+def insert_supports(cur, conn, df, copy_format="text"):
     """
-    Insert all supporting authors from passed df into database
+    Insert all supporting authors from passed df into database, resolving ids server-side
     """
-    (cur, conn), current_supports = select_all_from_supports(cur=cur, conn=conn)
-    paper_ids = []
-    author_ids = []
-    for row in df[["title", "authors"]].values:
-        title = row[0]
-        authors = row[1]
-        (cur, conn), paper_id = select_id_from_papers_where_title_is(
-            cur=cur, conn=conn, title=title
+    pairs = __explode_pairs(df=df, key="title", values="authors", skip_first=True)
+    try:
+        __stage_and_merge(
+            cur=cur,
+            conn=conn,
+            stage="supports_stage",
+            create_stage=__insert_supports[0],
+            df=pairs.rename(columns={"authors": "author"}),
+            merge=__insert_supports[1:],
+            copy_format=copy_format,
         )
-        if paper_id is ERROR_FAILED_TO_EXECUTE:
-            logging.error(ERROR_FAILED_TO_EXECUTE)
-            continue
-        if len(authors) > 1:
-            for author in authors[1:]:
-                (cur, conn), author_id = select_id_from_authors_where_author_is(
-                    cur=cur, conn=conn, author=author
-                )
-                if author_id is ERROR_FAILED_TO_EXECUTE:
-                    logging.error(ERROR_FAILED_TO_EXECUTE)
-                    continue
-                paper_ids.append(paper_id)
-                author_ids.append(author_id)
-    for paper_id, author_id in set(zip(paper_ids, author_ids, strict=False)):
-        if ~(
-            (current_supports.paper_id == paper_id) & (current_supports.author_id == author_id)
-        ).any():
-            try:
-                cur.execute(__insert_support, (paper_id, author_id))
-            except Exception as E:
-                pyLogger.error(f"{str(E)} \nexception in insert_supports")
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in insert_supports")
     return commit_prior(cur=cur, conn=conn)
 
 
-__insert_paper_concept = """
-INSERT INTO paper_concepts VALUES (%s, %s);
-"""
+__insert_paper_concepts = [
+    "CREATE TEMP TABLE paper_concepts_stage (title TEXT, concept TEXT) ON COMMIT DROP;",
+    "INSERT INTO concepts (concept) SELECT DISTINCT concept FROM paper_concepts_stage ON CONFLICT (concept) DO NOTHING;",
+    """
+    INSERT INTO paper_concepts (paper, concept)
+    SELECT DISTINCT papers.id, concepts.id
+    FROM paper_concepts_stage
+    JOIN papers ON papers.title = paper_concepts_stage.title
+    JOIN concepts ON concepts.concept = paper_concepts_stage.concept
+    ON CONFLICT DO NOTHING;
+    """,
+]
 
 
-def insert_paper_concepts(cur, conn, df):
+def insert_paper_concepts(cur, conn, df, copy_format="text"):
     """
-    Insert all paper-concept pairs from passed df into database
+    Insert all paper-concept pairs from passed df into database, resolving ids server-side
     """
-    (cur, conn), current_paper_concepts = select_all_from_paper_concepts(cur=cur, conn=conn)
-    paper_ids = []
-    concept_ids = []
-    for row in df[["title", "concepts"]][(df.concepts != "NULL")].values:
-        title = row[0]
-        concepts = row[1]
-        (cur, conn), paper_id = select_id_from_papers_where_title_is(
-            cur=cur, conn=conn, title=title
+    pairs = __explode_pairs(df=df, key="title", values="concepts", skip_first=True)
+    try:
+        __stage_and_merge(
+            cur=cur,
+            conn=conn,
+            stage="paper_concepts_stage",
+            create_stage=__insert_paper_concepts[0],
+            df=pairs.rename(columns={"concepts": "concept"}),
+            merge=__insert_paper_concepts[1:],
+            copy_format=copy_format,
         )
-        if paper_id is ERROR_FAILED_TO_EXECUTE:
-            logging.error(ERROR_FAILED_TO_EXECUTE)
-            continue
-        if len(concepts) > 0:
-            for concept in concepts[1:]:
-                (cur, conn), concept_id = select_id_from_concepts_where_concept_is(
-                    cur=cur, conn=conn, concept=concept
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in insert_paper_concepts")
+    return commit_prior(cur=cur, conn=conn)
+
+
+__insert_citations = [
+    "CREATE TEMP TABLE citations_stage (source BIGINT, target BIGINT) ON COMMIT DROP;",
+    """
+    INSERT INTO openalex (work)
+    SELECT source FROM citations_stage UNION SELECT target FROM citations_stage
+    ON CONFLICT (work) DO NOTHING;
+    """,
+    """
+    INSERT INTO citations (source, target)
+    SELECT DISTINCT sources.id, targets.id
+    FROM citations_stage
+    JOIN openalex sources ON sources.work = citations_stage.source
+    JOIN openalex targets ON targets.work = citations_stage.target
+    ON CONFLICT DO NOTHING;
+    """,
+]
+
+
+def insert_citations(cur, conn, df, copy_format="text"):
+    """
+    Insert all citations by openalex passed df into database, resolving ids server-side
+    """
+    pairs = __explode_pairs(df=df, key="openalex_id", values="referenced_works")
+    pairs = pd.DataFrame(
+        {
+            "source": openalex_works(pairs.openalex_id),
+            "target": openalex_works(pairs.referenced_works),
+        }
+    ).dropna()
+    try:
+        __stage_and_merge(
+            cur=cur,
+            conn=conn,
+            stage="citations_stage",
+            create_stage=__insert_citations[0],
+            df=pairs,
+            merge=__insert_citations[1:],
+            copy_format=copy_format,
+        )
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in insert_citations")
+    return commit_prior(cur=cur, conn=conn)
+
+
+# FACTORIZE DEFS
+FACTORIZE_DIMENSIONS = {  # table: key column & its type, in the order factorize_import assigns ids
+    "authors": ("author", "TEXT"),
+    "concepts": ("concept", "TEXT"),
+    "publishers": ("publisher", "TEXT"),
+    "types": ("ptype", "TEXT"),
+    "venues": ("venue", "TEXT"),
+    "openalex": ("work", "BIGINT"),
+    "papers": ("title", "TEXT"),
+}
+
+FACTORIZE_LINKS = {  # link table: its columns & the dimension each references
+    "supports": (("paper", "papers"), ("author", "authors")),
+    "paper_concepts": (("paper", "papers"), ("concept", "concepts")),
+    "citations": (("source", "openalex"), ("target", "openalex")),
+}
+
+__factorize_lock = "LOCK TABLE authors, concepts, publishers, types, venues, openalex, papers IN SHARE ROW EXCLUSIVE MODE;"
+__create_factorize_keys = "CREATE TEMP TABLE {table}_keys (key {column_type}) ON COMMIT DROP;"
+__select_factorize_keys = "SELECT keys.key, {table}.id FROM {table}_keys keys JOIN {table} ON {table}.{column} = keys.key;"
+__reserve_ids = "COPY (SELECT nextval(pg_get_serial_sequence('{table}', 'id')) FROM generate_series(1, {n})) TO STDOUT WITH (FORMAT binary);"
+__create_factorize_links = "CREATE TEMP TABLE {table}_links (LIKE {table}) ON COMMIT DROP;"
+__merge_factorize_links = "INSERT INTO {table} SELECT * FROM {table}_links ON CONFLICT DO NOTHING;"
+
+
+def __factorize(values):
+    """
+    Codes & uniques of values, None, NA & "NULL" are coded -1
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    if not pd.api.types.is_numeric_dtype(values):
+        values = values.mask(values == "NULL")
+    return pd.factorize(values)
+
+
+def __explode_positions(column):
+    """
+    Explode a list-valued column into its row, position in the list & value, non-lists are skipped
+    """
+    values = column[column.map(lambda value: isinstance(value, list))].explode()
+    return pd.DataFrame(
+        {
+            "row": values.index.to_numpy(),
+            "position": values.groupby(level=0).cumcount().to_numpy(),
+            "value": values.to_numpy(),
+        }
+    )
+
+
+def __coded_links(**codes):
+    """
+    Distinct rows of equal length code arrays, dropping rows with a missing (-1) code
+    """
+    links = pd.DataFrame(codes)
+    return links[(links >= 0).all(axis=1)].drop_duplicates(ignore_index=True)
+
+
+def factorize_records(df):
+    """
+    Factorize passed df into the uniques of every dimension table & integer coded papers, supports,
+    paper_concepts & citations, codes index the uniques & -1 marks a missing value
+    """
+    df = df.reset_index(drop=True)
+    authors = __explode_positions(df.authors)
+    concepts = __explode_positions(df.concepts)
+    references = __explode_positions(df.referenced_works)
+    author_codes, author_uniques = __factorize(authors.value)
+    concept_codes, concept_uniques = __factorize(concepts.value)
+    work_codes, work_uniques = __factorize(
+        pd.concat(
+            [openalex_works(df.openalex_id), openalex_works(references.value)], ignore_index=True
+        )
+    )
+    source_codes, target_codes = work_codes[: len(df)], work_codes[len(df) :]
+    title_codes, title_uniques = __factorize(df.title)
+    publisher_codes, publisher_uniques = __factorize(df.publisher)
+    type_codes, type_uniques = __factorize(df.type)
+    venue_codes, venue_uniques = __factorize(df.venue)
+    lead = authors.position.to_numpy() == 0
+    first_authors = np.full(len(df), -1)
+    first_authors[authors.row.to_numpy()[lead]] = author_codes[lead]
+    papers = pd.DataFrame(
+        {
+            "title": title_codes,
+            "doi": df.doi,
+            "pdate": df.publication_date,
+            "author": first_authors,
+            "publisher": publisher_codes,
+            "ptype": type_codes,
+            "venue": venue_codes,
+            "openalex": source_codes,
+        }
+    )
+    papers = papers[(papers.title >= 0) & (papers.author >= 0)].drop_duplicates(
+        subset="title", ignore_index=True
+    )  # papers need a title & a first author, the first row wins a repeated title
+    supporting = authors.position.to_numpy() > 0
+    conceptual = concepts.position.to_numpy() > 0
+    uniques = {
+        "authors": author_uniques,
+        "concepts": concept_uniques,
+        "publishers": publisher_uniques,
+        "types": type_uniques,
+        "venues": venue_uniques,
+        "openalex": work_uniques,
+        "papers": title_uniques,
+    }
+    facts = {
+        "papers": papers,
+        "supports": __coded_links(
+            paper=title_codes[authors.row.to_numpy()[supporting]],
+            author=author_codes[supporting],
+        ),
+        "paper_concepts": __coded_links(
+            paper=title_codes[concepts.row.to_numpy()[conceptual]],
+            concept=concept_codes[conceptual],
+        ),
+        "citations": __coded_links(
+            source=source_codes[references.row.to_numpy()], target=target_codes
+        ),
+    }
+    return uniques, facts
+
+
+def __ids_of(ids, codes):
+    """
+    Nullable Int64 ids of codes, NA where the code is missing or was not assigned an id
+    """
+    found = np.append(ids, -1)[np.asarray(codes)]
+    return pd.arrays.IntegerArray(found, found < 0)
+
+
+def __assign_ids(cur, conn, table, keys, insertable=None, copy_format="text"):
+    """
+    Ids of keys in table, existing keys keep theirs & new ones (where insertable) get ids reserved
+    from the table's sequence, -1 elsewhere; also returns the mask of reserved ids
+    """
+    column, column_type = FACTORIZE_DIMENSIONS[table]
+    __stage_and_merge(
+        cur=cur,
+        conn=conn,
+        stage=f"{table}_keys",
+        create_stage=__create_factorize_keys.format(table=table, column_type=column_type),
+        df=pd.DataFrame({"key": keys}),
+        merge=[],
+        copy_format=copy_format,
+    )
+    cur.execute(__select_factorize_keys.format(table=table, column=column))
+    known = cur.fetchall()
+    ids = np.full(len(keys), -1, dtype=np.int64)
+    if known:
+        known_keys, known_ids = zip(*known, strict=True)
+        ids[pd.Index(keys).get_indexer(known_keys)] = known_ids
+    reserved = ids < 0
+    if insertable is not None:
+        reserved &= insertable
+    if reserved.any():
+        buffer = io.BytesIO()
+        cur.copy_expert(__reserve_ids.format(table=table, n=int(reserved.sum())), buffer)
+        ids[reserved] = copy_binary_to_arrays(buffer.getbuffer(), ["bigint"])[0]
+    return ids, reserved
+
+
+def __copy_links(cur, conn, table, links, ids, reserved, copy_format="text"):
+    """
+    COPY coded links into table, straight in when they reference a newly reserved id, else through
+    a stage merged with ON CONFLICT DO NOTHING
+    """
+    columns = FACTORIZE_LINKS[table]
+    linked = pd.DataFrame(
+        {column: __ids_of(ids[dimension], links[column]) for column, dimension in columns}
+    )
+    fresh = np.logical_or.reduce(
+        [np.append(reserved[dimension], False)[links[column]] for column, dimension in columns]
+    )
+    present = linked.notna().all(axis=1).to_numpy()
+    copy_from_df(
+        cur=cur, conn=conn, table=table, df=linked[present & fresh], copy_format=copy_format
+    )
+    __stage_and_merge(
+        cur=cur,
+        conn=conn,
+        stage=f"{table}_links",
+        create_stage=__create_factorize_links.format(table=table),
+        df=linked[present & ~fresh],
+        merge=[__merge_factorize_links.format(table=table)],
+        copy_format=copy_format,
+    )
+
+
+def factorize_import(cur, conn, df, copy_format="text"):
+    """
+    Normalize passed df client-side with factorize_records, then COPY every dimension & link table
+    & papers with ids reserved from their sequences, dimension tables are locked until committed
+    """
+    started = time.perf_counter()
+    uniques, facts = factorize_records(df)
+    try:
+        cur.execute(__factorize_lock)
+        ids, reserved = {}, {}
+        for table, (column, _) in FACTORIZE_DIMENSIONS.items():
+            insertable = None
+            if table == "papers":
+                insertable = np.zeros(len(uniques[table]), dtype=bool)
+                insertable[facts["papers"].title.to_numpy()] = True
+            ids[table], reserved[table] = __assign_ids(
+                cur=cur,
+                conn=conn,
+                table=table,
+                keys=uniques[table],
+                insertable=insertable,
+                copy_format=copy_format,
+            )
+            if table != "papers":
+                copy_from_df(
+                    cur=cur,
+                    conn=conn,
+                    table=table,
+                    df=pd.DataFrame(
+                        {
+                            "id": ids[table][reserved[table]],
+                            column: uniques[table][reserved[table]],
+                        }
+                    ),
+                    copy_format=copy_format,
                 )
-                if concept_id is ERROR_FAILED_TO_EXECUTE:
-                    logging.error(ERROR_FAILED_TO_EXECUTE)
-                    continue
-                paper_ids.append(paper_id)
-                concept_ids.append(concept_id)
-    for paper_id, concept_id in set(zip(paper_ids, concept_ids, strict=False)):
-        if ~(
-            (current_paper_concepts.paper == paper_id)
-            & (current_paper_concepts.concept == concept_id)
-        ).any():
-            try:
-                cur.execute(__insert_paper_concept, (paper_id, concept_id))
-            except Exception as E:
-                pyLogger.error(f"{str(E)} \nexception in insert_paper_concepts")
+        papers = facts["papers"][reserved["papers"][facts["papers"].title.to_numpy()]]
+        papers = pd.DataFrame(
+            {
+                "id": ids["papers"][papers.title.to_numpy()],
+                "doi": papers.doi.to_numpy(),
+                "title": uniques["papers"][papers.title.to_numpy()],
+                "pdate": papers.pdate.to_numpy(),
+                **{
+                    column: __ids_of(ids[table], papers[column])
+                    for column, table in (
+                        ("author", "authors"),
+                        ("publisher", "publishers"),
+                        ("ptype", "types"),
+                        ("venue", "venues"),
+                        ("openalex", "openalex"),
+                    )
+                },
+            }
+        )
+        copy_from_df(cur=cur, conn=conn, table="papers", df=papers, copy_format=copy_format)
+        for table in FACTORIZE_LINKS:
+            __copy_links(
+                cur=cur,
+                conn=conn,
+                table=table,
+                links=facts[table],
+                ids=ids,
+                reserved=reserved,
+                copy_format=copy_format,
+            )
+        pyLogger.info(
+            f"factorized {len(df)} records into {', '.join(f'{int(reserved[table].sum())} {table}' for table in FACTORIZE_DIMENSIONS)}"
+        )
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in factorize_import")
+    pyLogger.info(f"factorize_import finished in {time.perf_counter() - started:.3f}s")
     return commit_prior(cur=cur, conn=conn)
 
 
-__insert_citation = """
-INSERT INTO citations VALUES (%s, %s);
+# FINGERPRINT DEFS
+FINGERPRINT_COLUMNS = (  # scraped fields a re-import can change, lists marked True are order free
+    ("openalex_id", False),
+    ("referenced_works", True),
+    ("authors", False),
+    ("concepts", True),
+)  # papers are insert-only, so doi, dates, publisher, type, venue & first author never change
+
+__create_fingerprint_stage = (
+    "CREATE TEMP TABLE fingerprint_stage (title TEXT, fingerprint TEXT) ON COMMIT DROP;"
+)
+
+__select_changed_fingerprints = """
+SELECT stage.title
+FROM fingerprint_stage stage
+LEFT JOIN import_fingerprints known ON known.title = stage.title
+WHERE known.fingerprint IS DISTINCT FROM stage.fingerprint;
+"""
+
+__record_fingerprints = """
+INSERT INTO import_fingerprints (title, fingerprint)
+SELECT stage.title, stage.fingerprint
+FROM fingerprint_stage stage
+JOIN papers ON papers.title = stage.title
+ON CONFLICT (title) DO UPDATE SET fingerprint = EXCLUDED.fingerprint, imported_at = now();
+"""
+
+__clear_import_fingerprints = """
+TRUNCATE import_fingerprints;
 """
 
 
-def insert_citations(cur, conn, df):
+def record_fingerprints(df):
     """
-    Insert all citations by openalex passed df into database
+    Hash FINGERPRINT_COLUMNS of each scraped record into a (title, fingerprint) df
     """
-    (cur, conn), current_citations = select_all_from_citations(cur=cur, conn=conn)
-    sources = []
-    targets = []
-    for row in df[["openalex_id", "referenced_works"]][
-        ((df.openalex_id != "NULL") & (df.referenced_works != "NULL"))
-    ].values:
-        source_openalex = row[0]
-        (cur, conn), source = select_id_from_openalex_where_openalex_url_is(
-            cur=cur, conn=conn, openalex_url=source_openalex
+    columns = [column for column, _ in FINGERPRINT_COLUMNS if column in df.columns]
+    unordered = {column for column, order_free in FINGERPRINT_COLUMNS if order_free}
+    fingerprints = []
+    for row in df[columns].itertuples(index=False, name=None):
+        record = [
+            sorted(map(str, value)) if column in unordered and isinstance(value, list) else value
+            for column, value in zip(columns, row, strict=True)
+        ]
+        fingerprints.append(
+            hashlib.blake2b(
+                json.dumps(record, default=str).encode("utf-8"), digest_size=16
+            ).hexdigest()
         )
-        if source is ERROR_FAILED_TO_EXECUTE:
-            logging.error(ERROR_FAILED_TO_EXECUTE)
-            continue
-        target_openalexs = row[1]
-        if len(target_openalexs) > 0:
-            for target_openalex in pd.Series(target_openalexs).unique():
-                (cur, conn), target = select_id_from_openalex_where_openalex_url_is(
-                    cur=cur, conn=conn, openalex_url=target_openalex
-                )
-                if target is ERROR_FAILED_TO_EXECUTE:
-                    logging.error(ERROR_FAILED_TO_EXECUTE)
-                    continue
-                sources.append(source)
-                targets.append(target)
-    for source, target in set(zip(sources, targets, strict=False)):
-        if ~((current_citations.source == source) & (current_citations.target == target)).any():
-            try:
-                cur.execute(__insert_citation, (source, target))
-            except Exception as E:
-                pyLogger.error(f"{str(E)} \nexception in insert_citations")
+    return pd.DataFrame({"title": df.title.tolist(), "fingerprint": fingerprints})
+
+
+def select_changed_records(cur, conn, df, copy_format="text"):
+    """
+    Keep only records of passed df whose fingerprint is new or differs from the last import
+    """
+    try:
+        __stage_and_merge(
+            cur=cur,
+            conn=conn,
+            stage="fingerprint_stage",
+            create_stage=__create_fingerprint_stage,
+            df=record_fingerprints(df),
+            merge=[],
+            copy_format=copy_format,
+        )
+        cur.execute(__select_changed_fingerprints)
+        changed = {title for (title,) in cur.fetchall()}
+        changed_records = df[df.title.isin(changed)].reset_index(drop=True)
+        pyLogger.info(f"{len(changed_records)} of {len(df)} records new or changed")
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in select_changed_records")
+        changed_records = ERROR_FAILED_TO_EXECUTE
+    return commit_prior(cur=cur, conn=conn), changed_records
+
+
+def insert_fingerprints(cur, conn, df, copy_format="text"):
+    """
+    Record fingerprints of records from passed df that made it into papers, so unchanged re-imports
+    are skipped
+    """
+    try:
+        __stage_and_merge(
+            cur=cur,
+            conn=conn,
+            stage="fingerprint_stage",
+            create_stage=__create_fingerprint_stage,
+            df=record_fingerprints(df),
+            merge=[__record_fingerprints],
+            copy_format=copy_format,
+        )
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in insert_fingerprints")
     return commit_prior(cur=cur, conn=conn)
 
 
-def importXML(cur, conn, df):
+def clear_import_fingerprints(cur, conn):
     """
-    Chain insert & normalization statements to import web scrapped search results into database
+    Forget every import fingerprint, the next delta import reprocesses all records
     """
+    try:
+        cur.execute(__clear_import_fingerprints)
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in clear_import_fingerprints")
+    return commit_prior(cur=cur, conn=conn)
+
+
+def importXML(
+    cur,
+    conn,
+    df,
+    bulk=False,
+    copy_format="text",
+    upsert=False,
+    transactional=False,
+    stats=None,
+    delta=False,
+    factorize=False,
+    node_stats=False,
+):
+    """
+    Chain insert & normalization statements to import web scrapped search results into database,
+    bulk stages authors, concepts, openalex works & papers through COPY (text or binary),
+    upsert inserts authors, concepts & openalex works with ON CONFLICT instead of anti-joins (not
+    with bulk or factorize, which stage them through COPY),
+    transactional runs every stage in one transaction with a savepoint per stage,
+    stats ("table" or "json") dumps per statement stats of this import when done,
+    delta only processes records whose fingerprint is new or changed since they were last imported,
+    factorize normalizes the whole df client-side & COPYs every table against reserved ids instead,
+    every mode indexes the imported papers for search_papers, then ends by adding edges from or to
+    them to citations_resolved_*, node_stats recounts node_stats in full afterwards (opt-in, as the
+    recount covers every node rather than those the import touched)
+    """
+    if upsert and (bulk or factorize):
+        raise ValueError("upsert cannot be combined with bulk or factorize")
+    if stats is not None:
+        with statement_session(fmt=stats):
+            return importXML(
+                cur=cur,
+                conn=conn,
+                df=df,
+                bulk=bulk,
+                copy_format=copy_format,
+                upsert=upsert,
+                transactional=transactional,
+                delta=delta,
+                factorize=factorize,
+                node_stats=node_stats,
+            )
+    started = time.perf_counter()
     df.drop_duplicates(subset="title", inplace=True, ignore_index=True)  # remove non-unique titles
     df.fillna(value="NULL", inplace=True)
-    cur, conn = insert_authors(cur=cur, conn=conn, df=df)
-    cur, conn = insert_concepts(cur=cur, conn=conn, df=df)
-    cur, conn = insert_openalexs(cur=cur, conn=conn, df=df)
-    cur, conn = insert_papers_raw(cur=cur, conn=conn, df=df)
-    cur, conn = papers_raw_to_papers(cur=cur, conn=conn)
-    cur, conn = insert_supports(cur=cur, conn=conn, df=df)
-    cur, conn = insert_paper_concepts(cur=cur, conn=conn, df=df)
-    cur, conn = insert_citations(cur=cur, conn=conn, df=df)
+    if delta:
+        (cur, conn), changed = select_changed_records(
+            cur=cur, conn=conn, df=df, copy_format=copy_format
+        )
+        if changed is ERROR_FAILED_TO_EXECUTE:
+            logging.error(ERROR_FAILED_TO_EXECUTE)  # without fingerprints import every record
+        elif changed.empty:
+            pyLogger.info(f"importXML skipped {len(df)} unchanged records")
+            return cur, conn
+        else:
+            df = changed
+    copied = {"df": df, "copy_format": copy_format}
+    if factorize:
+        stages = [("factorize", factorize_import, copied)]
+    elif bulk:
+        stages = [
+            ("authors", copy_authors, copied),
+            ("concepts", copy_concepts, copied),
+            ("openalex", copy_openalexs, copied),
+            ("papers", copy_papers_raw, copied),
+        ]
+    elif upsert:
+        stages = [
+            ("authors", upsert_authors, {"df": df}),
+            ("concepts", upsert_concepts, {"df": df}),
+            ("openalex", upsert_openalexs, {"df": df}),
+            ("papers", insert_papers_raw, {"df": df}),
+        ]
+    else:
+        stages = [
+            ("authors", insert_authors, {"df": df}),
+            ("concepts", insert_concepts, {"df": df}),
+            ("openalex", insert_openalexs, {"df": df}),
+            ("papers", insert_papers_raw, {"df": df}),
+        ]
+    if not factorize:
+        stages += [
+            ("supports", insert_supports, copied),
+            ("paper_concepts", insert_paper_concepts, copied),
+            ("citations", insert_citations, copied),
+        ]
+    stages += [
+        ("search", refresh_paper_search, {"titles": df.title, "copy_format": copy_format}),
+        (
+            "resolved_citations",
+            refresh_resolved_citations,
+            {"openalex_urls": df.openalex_id, "copy_format": copy_format},
+        ),
+    ]
+    if node_stats:
+        stages += [("node_stats", refresh_node_stats, {})]
+    if delta:
+        stages += [("fingerprints", insert_fingerprints, copied)]
+    if transactional:
+        try:
+            with transaction(cur=cur, conn=conn) as rolled_back:
+                for name, stage, kwargs in stages:
+                    if name == "fingerprints" and rolled_back:
+                        pyLogger.error(
+                            f"fingerprints not recorded, stage(s) rolled back: {rolled_back}"
+                        )
+                        continue
+                    with savepoint(cur=cur, conn=conn, name=name):
+                        cur, conn = stage(cur=cur, conn=conn, **kwargs)
+        except Exception as E:
+            pyLogger.error(f"{str(E)} \nexception in importXML, import rolled back")
+    else:
+        for _name, stage, kwargs in stages:
+            cur, conn = stage(cur=cur, conn=conn, **kwargs)
+    elapsed = time.perf_counter() - started
+    pyLogger.info(
+        f"importXML processed {len(df)} records in {elapsed:.3f}s, {len(df) / elapsed:,.0f} rows/sec"
+    )
+    return cur, conn
+
+
+# PIPELINE DEFS
+def __offer(batches, item, stop):
+    """
+    Put item on the bounded batches queue, giving up once stop is set
+    """
+    while not stop.is_set():
+        try:
+            batches.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def import_pipeline(cur, conn, batches, queue_size=None, node_stats=True, **kwargs):
+    """
+    Import dfs from an iterable of batches (e.g. seleamility.iter_explode_query_dblp) produced on a
+    background thread through a bounded queue, importXML committing each batch (with kwargs) while
+    the next is produced; a failing producer stops the pipeline after the batches already imported,
+    node_stats recounts node_stats once after the last batch
+    """
+    queue_size = PIPELINE_QUEUE_SIZE if queue_size is None else queue_size
+    pending = queue.Queue(maxsize=max(queue_size, 1))
+    stop = threading.Event()
+    done = object()
+
+    def produce():
+        try:
+            for df in batches:
+                if not __offer(pending, df, stop):
+                    return
+        except Exception as E:
+            pyLogger.error(f"{str(E)} \nexception in import_pipeline producer")
+        __offer(pending, done, stop)
+
+    started = time.perf_counter()
+    imported = records = 0
+    producer = threading.Thread(target=produce, name="citegres-pipeline", daemon=True)
+    producer.start()
+    try:
+        while True:
+            df = pending.get()
+            if df is done:
+                break
+            records += len(df)
+            cur, conn = importXML(cur=cur, conn=conn, df=df, **kwargs)
+            imported += 1
+    finally:
+        stop.set()
+        producer.join()
+    if node_stats and imported:
+        cur, conn = refresh_node_stats(cur=cur, conn=conn)
+    pyLogger.info(
+        f"import_pipeline imported {imported} batches, {records} records in {time.perf_counter() - started:.3f}s"
+    )
     return cur, conn
 
 
@@ -565,7 +2800,7 @@ def select_concept_from_concepts(cur, conn):
 
 
 __query_openalexlist_full = """
-SELECT * FROM openalex;
+SELECT id, %(openalex_url_prefix)s || work FROM openalex;
 """
 
 
@@ -574,7 +2809,7 @@ def select_all_from_openalex(cur, conn):
     Select all from openalex
     """
     try:
-        cur.execute(__query_openalexlist_full)
+        cur.execute(__query_openalexlist_full, __openalex_url_params)
         openalexlist_full = pd.DataFrame(cur.fetchall(), columns=["id", "openalex_url"])
     except Exception as E:
         pyLogger.error(f"{str(E)} \nexception in select_all_from_openalex")
@@ -583,16 +2818,34 @@ def select_all_from_openalex(cur, conn):
 
 
 __query_openalexlist_openalex_url = """
-SELECT openalex_url FROM openalex;
+SELECT %(openalex_url_prefix)s || work FROM openalex;
 """
 
 
+__query_openalexlist_work = """
+SELECT work FROM openalex;
+"""
+
+
+def select_work_from_openalex(cur, conn):
+    """
+    Select all openalex work numbers
+    """
+    try:
+        cur.execute(__query_openalexlist_work)
+        openalexlist_work = pd.DataFrame(cur.fetchall(), columns=["work"])
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in select_work_from_openalex")
+        openalexlist_work = ERROR_FAILED_TO_EXECUTE
+    return commit_prior(cur=cur, conn=conn), openalexlist_work
+
+
 def select_openalex_url_from_openalex(cur, conn):
     """
     Select all openalex urls
     """
     try:
-        cur.execute(__query_openalexlist_openalex_url)
+        cur.execute(__query_openalexlist_openalex_url, __openalex_url_params)
         openalexlist_openalex_url = pd.DataFrame(cur.fetchall(), columns=["openalex_url"])
     except Exception as E:
         pyLogger.error(f"{str(E)} \nexception in select_openalex_url_from_openalex")
@@ -605,10 +2858,12 @@ SELECT * FROM citations;
 """
 
 
-def select_all_from_citations(cur, conn):
+def select_all_from_citations(cur, conn, columnar=False):
     """
-    Query id to id references
+    Query id to id references, columnar reads NumPy columns through COPY binary
     """
+    if columnar:
+        return select_columnar(cur=cur, conn=conn, table="citations", columns=["source", "target"])
     try:
         cur.execute(__query_citationlist_full)
         citationlist_full = pd.DataFrame(cur.fetchall(), columns=["source", "target"])
@@ -620,23 +2875,33 @@ def select_all_from_citations(cur, conn):
 
 __query_citationlist_full_resolve_openalex = """
 WITH sourced AS (
-    SELECT openalex.openalex_url AS source, citations.target AS target
+    SELECT %(openalex_url_prefix)s || openalex.work AS source, citations.target AS target
     FROM citations
     JOIN openalex
     ON citations.source = openalex.id)
-SELECT sourced.source AS source, openalex.openalex_url AS target
+SELECT sourced.source AS source, %(openalex_url_prefix)s || openalex.work AS target
 FROM sourced
 JOIN openalex
 ON sourced.target = openalex.id;
 """
 
 
-def query_citationlist_full_resolve_openalex(cur, conn):
+__select_citations_resolved_openalex = """
+SELECT source, target FROM citations_resolved_openalex;
+"""
+
+
+def query_citationlist_full_resolve_openalex(cur, conn, materialized=True):
     """
-    Query url to url references
+    Query url to url references, from citations_resolved_openalex unless materialized is False
     """
     try:
-        cur.execute(__query_citationlist_full_resolve_openalex)
+        cur.execute(
+            __select_citations_resolved_openalex
+            if materialized
+            else __query_citationlist_full_resolve_openalex,
+            __openalex_url_params,
+        )
         citationlist_full_openalex_resolved = pd.DataFrame(
             cur.fetchall(), columns=["source", "target"]
         )
@@ -659,12 +2924,21 @@ ON sourced.target = papers.openalex;
 """
 
 
-def query_citationlist_full_resolve_paper_title(cur, conn):
+__select_citations_resolved_paper_title = """
+SELECT source, target FROM citations_resolved_paper_title;
+"""
+
+
+def query_citationlist_full_resolve_paper_title(cur, conn, materialized=True):
     """
-    Query paper to paper references
+    Query paper to paper references, from citations_resolved_paper_title unless materialized is False
     """
     try:
-        cur.execute(__query_citationlist_full_resolve_paper_title)
+        cur.execute(
+            __select_citations_resolved_paper_title
+            if materialized
+            else __query_citationlist_full_resolve_paper_title
+        )
         citationlist_full_paper_title_resolved = pd.DataFrame(
             cur.fetchall(), columns=["source", "target"]
         )
@@ -692,12 +2966,21 @@ ON sourced.target = alex_to_author.openalex;
 """
 
 
-def query_citationlist_full_resolve_author(cur, conn):
+__select_citations_resolved_author = """
+SELECT source, target FROM citations_resolved_author;
+"""
+
+
+def query_citationlist_full_resolve_author(cur, conn, materialized=True):
     """
-    Query author to author references
+    Query author to author references, from citations_resolved_author unless materialized is False
     """
     try:
-        cur.execute(__query_citationlist_full_resolve_author)
+        cur.execute(
+            __select_citations_resolved_author
+            if materialized
+            else __query_citationlist_full_resolve_author
+        )
         citationlist_full_author_resolved = pd.DataFrame(
             cur.fetchall(), columns=["source", "target"]
         )
@@ -712,10 +2995,18 @@ SELECT * FROM supports;
 """
 
 
-def select_all_from_supports(cur, conn):
+def select_all_from_supports(cur, conn, columnar=False):
     """
-    Select all from supports
+    Select all from supports, columnar reads NumPy columns through COPY binary
     """
+    if columnar:
+        return select_columnar(
+            cur=cur,
+            conn=conn,
+            table="supports",
+            columns=["paper", "author"],
+            names=["paper_id", "author_id"],
+        )
     try:
         cur.execute(__query_supportslist_full)
         supportlist_full = pd.DataFrame(cur.fetchall(), columns=["paper_id", "author_id"])
@@ -750,10 +3041,14 @@ SELECT * FROM paper_concepts;
 """
 
 
-def select_all_from_paper_concepts(cur, conn):
+def select_all_from_paper_concepts(cur, conn, columnar=False):
     """
-    Select all from paper_concepts
+    Select all from paper_concepts, columnar reads NumPy columns through COPY binary
     """
+    if columnar:
+        return select_columnar(
+            cur=cur, conn=conn, table="paper_concepts", columns=["paper", "concept"]
+        )
     try:
         cur.execute(__query_paperconceptslist_full)
         paperconceptslist_full = pd.DataFrame(cur.fetchall(), columns=["paper", "concept"])
@@ -791,16 +3086,20 @@ SELECT id FROM authors WHERE authors.author = %s
 
 def select_id_from_authors_where_author_is(cur, conn, author):
     """
-    Select author id for a given name
+    Select author id for a given name, inserting unknown names, cached
     """
+    author_id = id_cache_get(conn, "authors", author)
+    if author_id is not None:
+        return (cur, conn), author_id
     try:
-        cur.execute(__select_id_from_authors_where_author_is, (author,))
+        execute_prepared(cur=cur, sql=__select_id_from_authors_where_author_is, args=(author,))
         author_id = cur.fetchone()[0]
+        id_cache_put(conn, "authors", author, author_id)
         return commit_prior(cur=cur, conn=conn), author_id
     except Exception as E:
         pyLogger.error(f"{str(E)} \nexception in select_id_from_authors_where_author_is")
         cur, conn = commit_prior(cur=cur, conn=conn)
-        cur.execute(__insert_author, (None if author == "NULL" else author,))
+        execute_prepared(cur=cur, sql=__insert_author, args=(None if author == "NULL" else author,))
         return select_id_from_authors_where_author_is(cur=cur, conn=conn, author=author)
 
 
@@ -811,11 +3110,15 @@ SELECT id FROM papers WHERE papers.title = %s
 
 def select_id_from_papers_where_title_is(cur, conn, title):
     """
-    Select paper id for a given title
+    Select paper id for a given title, cached
     """
+    paper_id = id_cache_get(conn, "papers", title)
+    if paper_id is not None:
+        return (cur, conn), paper_id
     try:
-        cur.execute(__select_id_from_papers_where_title_is, (title,))
+        execute_prepared(cur=cur, sql=__select_id_from_papers_where_title_is, args=(title,))
         paper_id = cur.fetchone()[0]
+        id_cache_put(conn, "papers", title, paper_id)
     except Exception as E:
         pyLogger.error(f"{str(E)} \nexception in select_id_from_papers_where_title_is")
         paper_id = ERROR_FAILED_TO_EXECUTE
@@ -823,22 +3126,32 @@ def select_id_from_papers_where_title_is(cur, conn, title):
 
 
 __select_id_from_openalex_where_openalex_url_is = """
-SELECT id FROM openalex WHERE openalex.openalex_url = %s
+SELECT id FROM openalex WHERE openalex.work = %s
 """
 
 
 def select_id_from_openalex_where_openalex_url_is(cur, conn, openalex_url):
     """
-    Select openalex id for a given url
+    Select openalex id for a given url, inserting unknown urls, cached
     """
+    work = openalex_work(openalex_url)
+    if work is None:
+        pyLogger.error(
+            f"no openalex work in {openalex_url} \nexception in select_id_from_openalex_where_openalex_url_is"
+        )
+        return (cur, conn), ERROR_FAILED_TO_EXECUTE
+    openalex_id = id_cache_get(conn, "openalex", work)
+    if openalex_id is not None:
+        return (cur, conn), openalex_id
     try:
-        cur.execute(__select_id_from_openalex_where_openalex_url_is, (openalex_url,))
+        execute_prepared(cur=cur, sql=__select_id_from_openalex_where_openalex_url_is, args=(work,))
         openalex_id = cur.fetchone()[0]
+        id_cache_put(conn, "openalex", work, openalex_id)
         return commit_prior(cur=cur, conn=conn), openalex_id
     except Exception as E:
         pyLogger.error(f"{str(E)} \nexception in select_id_from_openalex_where_openalex_url_is")
         cur, conn = commit_prior(cur=cur, conn=conn)
-        cur.execute(__insert_openalex, (None if openalex_url == "NULL" else openalex_url,))
+        execute_prepared(cur=cur, sql=__insert_openalex, args=(work,))
         return select_id_from_openalex_where_openalex_url_is(
             cur=cur, conn=conn, openalex_url=openalex_url
         )
@@ -851,14 +3164,799 @@ SELECT id FROM concepts WHERE concepts.concept = %s
 
 def select_id_from_concepts_where_concept_is(cur, conn, concept):
     """
-    Select concept id for a given concept
+    Select concept id for a given concept, inserting unknown concepts, cached
     """
+    concept_id = id_cache_get(conn, "concepts", concept)
+    if concept_id is not None:
+        return (cur, conn), concept_id
     try:
-        cur.execute(__select_id_from_concepts_where_concept_is, (concept,))
+        execute_prepared(cur=cur, sql=__select_id_from_concepts_where_concept_is, args=(concept,))
         concept_id = cur.fetchone()[0]
+        id_cache_put(conn, "concepts", concept, concept_id)
         return commit_prior(cur=cur, conn=conn), concept_id
     except Exception as E:
         pyLogger.error(f"{str(E)} \nexception in select_id_from_concepts_where_concept_is")
         cur, conn = commit_prior(cur=cur, conn=conn)
-        cur.execute(__insert_concept, (None if concept == "NULL" else concept,))
+        execute_prepared(
+            cur=cur, sql=__insert_concept, args=(None if concept == "NULL" else concept,)
+        )
         return select_id_from_concepts_where_concept_is(cur=cur, conn=conn, concept=concept)
+
+
+# NEIGHBORHOOD DEFS
+NEIGHBORHOOD_DIRECTIONS = ("forward", "backward", "both")
+
+__neighborhood_seeds = {
+    "openalex": "SELECT id FROM openalex WHERE work = %(seed)s",
+    "paper_title": "SELECT openalex FROM papers WHERE title = %(seed)s AND openalex IS NOT NULL",
+    "author": """
+    SELECT papers.openalex
+    FROM authors
+    JOIN papers ON papers.author = authors.id
+    WHERE authors.author = %(seed)s AND papers.openalex IS NOT NULL
+    UNION
+    SELECT papers.openalex
+    FROM authors
+    JOIN supports ON supports.author = authors.id
+    JOIN papers ON papers.id = supports.paper
+    WHERE authors.author = %(seed)s AND papers.openalex IS NOT NULL
+    """,
+}
+
+__neighborhood_steps = {  # lateral step from a frontier node, fanout edges per node & direction
+    "forward": """
+    SELECT citations.source, citations.target, citations.target AS next
+    FROM citations WHERE citations.source = hood.node
+    ORDER BY citations.target LIMIT %(fanout)s
+    """,
+    "backward": """
+    SELECT citations.source, citations.target, citations.source AS next
+    FROM citations WHERE citations.target = hood.node
+    ORDER BY citations.source LIMIT %(fanout)s
+    """,
+}
+
+__neighborhood_resolve = {
+    "openalex": """
+SELECT %(openalex_url_prefix)s || source.work, %(openalex_url_prefix)s || target.work, edges.depth
+FROM edges
+JOIN openalex source ON source.id = edges.source
+JOIN openalex target ON target.id = edges.target
+""",
+    "paper_title": """
+SELECT source.title, target.title, edges.depth
+FROM edges
+JOIN papers source ON source.openalex = edges.source
+JOIN papers target ON target.openalex = edges.target
+""",
+    "author": """
+SELECT source_author.author, target_author.author, edges.depth
+FROM edges
+JOIN papers source ON source.openalex = edges.source
+JOIN papers target ON target.openalex = edges.target
+JOIN authors source_author ON source_author.id = source.author
+JOIN authors target_author ON target_author.id = target.author
+""",
+}
+
+__query_citation_neighborhood = """
+WITH RECURSIVE hood (node, depth, source, target) AS (
+    SELECT seeds.id, 0, NULL::INTEGER, NULL::INTEGER FROM ({seeds}) seeds (id)
+    UNION
+    SELECT step.next, hood.depth + 1, step.source, step.target
+    FROM hood
+    CROSS JOIN LATERAL ({steps}) step
+    WHERE hood.depth < %(depth)s
+),
+edges AS (
+    SELECT source, target, min(depth) AS depth
+    FROM hood WHERE source IS NOT NULL
+    GROUP BY source, target
+    ORDER BY depth, source, target
+    LIMIT %(max_edges)s
+)
+{resolve}
+ORDER BY 3, 1, 2;
+"""
+
+
+def query_citation_neighborhood(
+    cur,
+    conn,
+    seed,
+    seed_type="openalex",
+    direction="forward",
+    depth=2,
+    fanout=None,
+    max_edges=None,
+    resolve="openalex",
+):
+    """
+    Select the k-hop citation subgraph around a paper (openalex url or title) or an author's papers,
+    forward follows references, backward follows citing papers, fanout caps edges per node & hop
+    """
+    if direction not in NEIGHBORHOOD_DIRECTIONS:
+        raise ValueError(f"direction must be one of {NEIGHBORHOOD_DIRECTIONS}, got {direction!r}")
+    if seed_type not in __neighborhood_seeds:
+        raise ValueError(
+            f"seed_type must be one of {tuple(__neighborhood_seeds)}, got {seed_type!r}"
+        )
+    if resolve not in __neighborhood_resolve:
+        raise ValueError(f"resolve must be one of {tuple(__neighborhood_resolve)}, got {resolve!r}")
+    if seed_type == "openalex":
+        seed = openalex_work(seed)
+    steps = [
+        __neighborhood_steps[step]
+        for step in ("forward", "backward")
+        if direction in (step, "both")
+    ]
+    query = __query_citation_neighborhood.format(
+        seeds=__neighborhood_seeds[seed_type],
+        steps=" UNION ALL ".join(f"({step})" for step in steps),
+        resolve=__neighborhood_resolve[resolve],
+    )
+    try:
+        cur.execute(
+            query,
+            {
+                **__openalex_url_params,
+                "seed": seed,
+                "depth": depth,
+                "fanout": fanout,
+                "max_edges": max_edges,
+            },
+        )
+        neighborhood = pd.DataFrame(cur.fetchall(), columns=["source", "target", "depth"])
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in query_citation_neighborhood")
+        neighborhood = ERROR_FAILED_TO_EXECUTE
+    return commit_prior(cur=cur, conn=conn), neighborhood
+
+
+# FEDERATION DEFS
+def __federated_section(query, section, kwargs):
+    """
+    Run query on a connection of its own to section, None when it fails
+    """
+    try:
+        cur, conn = create_connection(section=section)
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in federated_query ({section})")
+        return None
+    try:
+        (cur, conn), result = query(cur=cur, conn=conn, **kwargs)
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in federated_query ({section})")
+        result = ERROR_FAILED_TO_EXECUTE
+    finally:
+        kill_connection(cur=cur, conn=conn)
+    if isinstance(result, str) and result == ERROR_FAILED_TO_EXECUTE:
+        return None
+    return pd.DataFrame(result)
+
+
+def federated_query(query, sections=None, dedupe=True, max_workers=None, **kwargs):
+    """
+    Run a reader (or its name) such as query_citationlist_full_resolve_paper_title against every
+    section (all in citegres.ini by default) concurrently, each on its own connection, & concat the
+    results with a section column, dedupe drops rows an earlier section already returned
+    """
+    if isinstance(query, str):
+        query = globals().get(query)
+    if not callable(query):
+        raise ValueError(f"query must be a postility reader or its name, got {query!r}")
+    if sections is None:
+        sections = config_sections()
+    if max_workers is None:
+        max_workers = FEDERATION_MAX_WORKERS
+    started = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max(min(len(sections), max_workers), 1), thread_name_prefix="federated"
+    ) as executor:
+        results = list(
+            executor.map(lambda section: __federated_section(query, section, kwargs), sections)
+        )
+    frames = [
+        result.assign(section=section)
+        for section, result in zip(sections, results, strict=True)
+        if result is not None
+    ]
+    if not frames:
+        return ERROR_FAILED_TO_EXECUTE
+    merged = pd.concat(frames, ignore_index=True)
+    if dedupe:
+        merged = merged.drop_duplicates(
+            subset=[column for column in merged.columns if column != "section"], ignore_index=True
+        )
+    pyLogger.info(
+        f"federated {getattr(query, '__name__', query)} over {len(frames)}/{len(sections)} sections, {len(merged)} rows in {time.perf_counter() - started:.3f}s"
+    )
+    return merged
+
+
+# STREAM DEFS
+STREAM_ITERSIZE = 10000
+
+__stream_names = itertools.count()
+
+
+def stream_query(cur, conn, query, columns, itersize=None, params=None):
+    """
+    Yield DataFrame chunks of at most itersize rows from a named server-side cursor running query
+    with params, the connection must not be committed by the consumer until the stream is exhausted
+    or closed; an exhausted stream returns the cursor & connection left by its commit (reset if the
+    commit failed) as its StopIteration value, e.g. through yield from
+    """
+    if itersize is None:
+        itersize = STREAM_ITERSIZE
+    stream = conn.cursor(
+        name=f"postility_stream_{next(__stream_names)}", cursor_factory=LoggingCursor
+    )
+    stream.itersize = itersize
+    try:
+        stream.execute(query, params)
+        while True:
+            rows = stream.fetchmany(itersize)
+            if not rows:
+                break
+            yield pd.DataFrame(rows, columns=columns)
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in stream_query")
+        raise
+    finally:
+        if not conn.closed:
+            stream.close()
+            cur, conn = commit_prior(cur=cur, conn=conn)
+    return cur, conn
+
+
+def stream_all_from_citations(cur, conn, itersize=None):
+    """
+    Stream id to id references in DataFrame chunks
+    """
+    return stream_query(
+        cur=cur,
+        conn=conn,
+        query=__query_citationlist_full,
+        columns=["source", "target"],
+        itersize=itersize,
+    )
+
+
+def stream_citationlist_full_resolve_openalex(cur, conn, itersize=None, materialized=True):
+    """
+    Stream url to url references in DataFrame chunks, from citations_resolved_openalex unless
+    materialized is False
+    """
+    return stream_query(
+        cur=cur,
+        conn=conn,
+        query=__select_citations_resolved_openalex
+        if materialized
+        else __query_citationlist_full_resolve_openalex,
+        columns=["source", "target"],
+        itersize=itersize,
+        params=__openalex_url_params,
+    )
+
+
+def stream_citationlist_full_resolve_paper_title(cur, conn, itersize=None, materialized=True):
+    """
+    Stream paper to paper references in DataFrame chunks, from citations_resolved_paper_title unless
+    materialized is False
+    """
+    return stream_query(
+        cur=cur,
+        conn=conn,
+        query=__select_citations_resolved_paper_title
+        if materialized
+        else __query_citationlist_full_resolve_paper_title,
+        columns=["source", "target"],
+        itersize=itersize,
+    )
+
+
+def stream_citationlist_full_resolve_author(cur, conn, itersize=None, materialized=True):
+    """
+    Stream author to author references in DataFrame chunks, from citations_resolved_author unless
+    materialized is False
+    """
+    return stream_query(
+        cur=cur,
+        conn=conn,
+        query=__select_citations_resolved_author
+        if materialized
+        else __query_citationlist_full_resolve_author,
+        columns=["source", "target"],
+        itersize=itersize,
+    )
+
+
+def stream_all_from_supports(cur, conn, itersize=None):
+    """
+    Stream all from supports in DataFrame chunks
+    """
+    return stream_query(
+        cur=cur,
+        conn=conn,
+        query=__query_supportslist_full,
+        columns=["paper_id", "author_id"],
+        itersize=itersize,
+    )
+
+
+def stream_all_from_supports_resolved(cur, conn, itersize=None):
+    """
+    Stream all from supports resolving paper and author ids in DataFrame chunks
+    """
+    return stream_query(
+        cur=cur,
+        conn=conn,
+        query=__query_supportslist_full_resolved,
+        columns=["paper", "author"],
+        itersize=itersize,
+    )
+
+
+def stream_all_from_paper_concepts(cur, conn, itersize=None):
+    """
+    Stream all from paper_concepts in DataFrame chunks
+    """
+    return stream_query(
+        cur=cur,
+        conn=conn,
+        query=__query_paperconceptslist_full,
+        columns=["paper", "concept"],
+        itersize=itersize,
+    )
+
+
+def stream_all_from_paper_concepts_resolved(cur, conn, itersize=None):
+    """
+    Stream all from paper_concepts resolving paper and concept ids in DataFrame chunks
+    """
+    return stream_query(
+        cur=cur,
+        conn=conn,
+        query=__query_paperconceptslist_full_resolved,
+        columns=["paper", "concept"],
+        itersize=itersize,
+    )
+
+
+# PAGE DEFS
+PAGE_SIZE = 100
+
+__pages = {  # relation: FROM clause, {column: expression}, sortable (NOT NULL) columns, unique key
+    "authors": {
+        "from": "authors",
+        "columns": {"id": "authors.id", "author": "authors.author"},
+        "sortable": ("id", "author"),
+        "key": ("id",),
+    },
+    "concepts": {
+        "from": "concepts",
+        "columns": {"id": "concepts.id", "concept": "concepts.concept"},
+        "sortable": ("id", "concept"),
+        "key": ("id",),
+    },
+    "openalex": {
+        "from": "(SELECT id, %s || work AS openalex_url FROM openalex) openalex",
+        "args": (OPENALEX_URL_PREFIX,),  # bound ahead of the filters, keyset & limit
+        "columns": {"id": "openalex.id", "openalex_url": "openalex.openalex_url"},
+        "sortable": ("id",),
+        "key": ("id",),
+    },
+    "papers": {
+        "from": "papers",
+        "columns": {
+            "id": "papers.id",
+            "doi": "papers.doi",
+            "title": "papers.title",
+            "pdate": "papers.pdate",
+            "author": "papers.author",
+            "publisher": "papers.publisher",
+            "ptype": "papers.ptype",
+            "venue": "papers.venue",
+            "openalex": "papers.openalex",
+        },
+        "sortable": ("id", "title", "author"),
+        "key": ("id",),
+    },
+    "citations": {
+        "from": "citations",
+        "columns": {"source": "citations.source", "target": "citations.target"},
+        "sortable": ("source", "target"),
+        "key": ("source", "target"),
+    },
+    "supports": {
+        "from": "supports",
+        "columns": {"paper_id": "supports.paper", "author_id": "supports.author"},
+        "sortable": ("paper_id", "author_id"),
+        "key": ("paper_id", "author_id"),
+    },
+    "supports_resolved": {
+        "from": "supports S",  # names looked up per row of the page, a join would scan from the start
+        "columns": {
+            "paper_id": "S.paper",
+            "author_id": "S.author",
+            "paper": "(SELECT title FROM papers WHERE papers.id = S.paper)",
+            "author": "(SELECT author FROM authors WHERE authors.id = S.author)",
+        },
+        "sortable": ("paper_id", "author_id"),  # a name sort would evaluate every row's lookup
+        "key": ("paper_id", "author_id"),
+    },
+    "paper_concepts": {
+        "from": "paper_concepts",
+        "columns": {"paper": "paper_concepts.paper", "concept": "paper_concepts.concept"},
+        "sortable": ("paper", "concept"),
+        "key": ("paper", "concept"),
+    },
+    "paper_concepts_resolved": {
+        "from": "paper_concepts PC",
+        "columns": {
+            "paper_id": "PC.paper",
+            "concept_id": "PC.concept",
+            "paper": "(SELECT title FROM papers WHERE papers.id = PC.paper)",
+            "concept": "(SELECT concept FROM concepts WHERE concepts.id = PC.concept)",
+        },
+        "sortable": ("paper_id", "concept_id"),
+        "key": ("paper_id", "concept_id"),
+    },
+}
+PAGE_RELATIONS = tuple(__pages)
+
+__query_page = """
+SELECT {columns}
+FROM {relation}
+WHERE {where}
+ORDER BY {order}
+LIMIT %s;
+"""
+
+
+def page_keyset(relation, sort=None):
+    """
+    Columns a page of relation is ordered & resumed by, the sort columns then its unique key
+    """
+    if relation not in __pages:
+        raise ValueError(f"relation must be one of {PAGE_RELATIONS}, got {relation!r}")
+    page = __pages[relation]
+    sort = () if sort is None else (sort,) if isinstance(sort, str) else tuple(sort)
+    for column in sort:
+        if column not in page["sortable"]:
+            raise ValueError(f"sort must be drawn from {page['sortable']}, got {column!r}")
+    return tuple(dict.fromkeys(sort + page["key"]))
+
+
+def select_page(
+    cur, conn, relation, after=None, limit=None, sort=None, descending=False, filters=None
+):
+    """
+    Select the limit rows of relation following the keyset after (None for the first page), seeking
+    an index instead of scanning past earlier pages; filters match columns to a value or a list,
+    returns the page & the after of the next page (None after a short page)
+    """
+    keyset = page_keyset(relation, sort=sort)
+    page = __pages[relation]
+    if limit is None:
+        limit = PAGE_SIZE
+    where, args = [], list(page.get("args", ()))
+    for column, value in (filters or {}).items():
+        if column not in page["columns"]:
+            raise ValueError(f"filters must be drawn from {tuple(page['columns'])}, got {column!r}")
+        if isinstance(value, (list, tuple, set)):
+            where.append(f"{page['columns'][column]} = ANY(%s)")
+            args.append(list(value))
+        else:
+            where.append(f"{page['columns'][column]} = %s")
+            args.append(value)
+    ordered = [page["columns"][column] for column in keyset]
+    if after is not None:
+        after = tuple(after) if isinstance(after, (list, tuple)) else (after,)
+        if len(after) != len(keyset):
+            raise ValueError(f"after must hold a value for each of {keyset}, got {after!r}")
+        where.append(
+            f"({', '.join(ordered)}) {'<' if descending else '>'} ({', '.join(['%s'] * len(after))})"
+        )
+        args.extend(after)
+    query = __query_page.format(
+        columns=", ".join(
+            f"{expression} AS {column}" for column, expression in page["columns"].items()
+        ),
+        relation=page["from"],
+        where=" AND ".join(where) or "TRUE",
+        order=", ".join(f"{expression}{' DESC' if descending else ''}" for expression in ordered),
+    )
+    try:
+        cur.execute(query, [*args, limit])
+        fetched = cur.fetchall()
+        rows = pd.DataFrame(fetched, columns=list(page["columns"]))
+        following = None
+        if len(fetched) == limit:
+            last = dict(zip(page["columns"], fetched[-1], strict=True))
+            following = tuple(last[column] for column in keyset)
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in select_page ({relation})")
+        rows, following = ERROR_FAILED_TO_EXECUTE, None
+    return commit_prior(cur=cur, conn=conn), (rows, following)
+
+
+def select_page_from_authors(cur, conn, **kwargs):
+    """
+    Select one keyset page of authors, sortable by id or author
+    """
+    return select_page(cur=cur, conn=conn, relation="authors", **kwargs)
+
+
+def select_page_from_concepts(cur, conn, **kwargs):
+    """
+    Select one keyset page of concepts, sortable by id or concept
+    """
+    return select_page(cur=cur, conn=conn, relation="concepts", **kwargs)
+
+
+def select_page_from_openalex(cur, conn, **kwargs):
+    """
+    Select one keyset page of openalex ids & urls
+    """
+    return select_page(cur=cur, conn=conn, relation="openalex", **kwargs)
+
+
+def select_page_from_papers(cur, conn, **kwargs):
+    """
+    Select one keyset page of papers, sortable by id, title or author id
+    """
+    return select_page(cur=cur, conn=conn, relation="papers", **kwargs)
+
+
+def select_page_from_citations(cur, conn, **kwargs):
+    """
+    Select one keyset page of id to id references
+    """
+    return select_page(cur=cur, conn=conn, relation="citations", **kwargs)
+
+
+def select_page_from_supports(cur, conn, **kwargs):
+    """
+    Select one keyset page of supports
+    """
+    return select_page(cur=cur, conn=conn, relation="supports", **kwargs)
+
+
+def select_page_from_supports_resolved(cur, conn, **kwargs):
+    """
+    Select one keyset page of supports with paper titles & author names alongside their ids,
+    sortable by paper_id or author_id
+    """
+    return select_page(cur=cur, conn=conn, relation="supports_resolved", **kwargs)
+
+
+def select_page_from_paper_concepts(cur, conn, **kwargs):
+    """
+    Select one keyset page of paper_concepts
+    """
+    return select_page(cur=cur, conn=conn, relation="paper_concepts", **kwargs)
+
+
+def select_page_from_paper_concepts_resolved(cur, conn, **kwargs):
+    """
+    Select one keyset page of paper_concepts with paper titles & concept names alongside their ids,
+    sortable by paper_id or concept_id
+    """
+    return select_page(cur=cur, conn=conn, relation="paper_concepts_resolved", **kwargs)
+
+
+# SNAPSHOT DEFS
+SNAPSHOT_TABLES = (  # in load order, referenced tables first
+    "authors",
+    "publishers",
+    "concepts",
+    "types",
+    "venues",
+    "openalex",
+    "papers",
+    "supports",
+    "citations",
+    "paper_concepts",
+    "citations_resolved_openalex",
+    "citations_resolved_paper_title",
+    "citations_resolved_author",
+    "node_stats",
+    "import_fingerprints",
+)
+SNAPSHOT_MANIFEST = "snapshot.json"
+
+__snapshot_arrow_types = {  # postgres types kept typed in parquet, others are stored as text
+    "smallint": "int16",
+    "integer": "int32",
+    "bigint": "int64",
+    "double precision": "float64",
+    "text": "string",
+    "date": "date32",
+}
+
+__select_snapshot_tables = "SELECT table_name FROM unnest(%s::TEXT[]) table_name WHERE to_regclass(table_name) IS NOT NULL;"
+__select_snapshot_columns = """
+SELECT attname, format_type(atttypid, atttypmod)
+FROM pg_attribute
+WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+ORDER BY attnum;
+"""
+__begin_snapshot = "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY;"
+__copy_snapshot_out = "COPY {table} ({columns}) TO STDOUT WITH (FORMAT csv);"
+__copy_snapshot_in = "COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv);"
+__select_snapshot_constraints = """
+SELECT conrelid::regclass::TEXT, quote_ident(conname), pg_get_constraintdef(oid)
+FROM pg_constraint
+WHERE contype IN ('p', 'u', 'f') AND conrelid = ANY(%s::regclass[])
+ORDER BY contype = 'f', conrelid::regclass::TEXT, conname;
+"""  # keys before the foreign keys that reference them
+__select_snapshot_indexes = """
+SELECT indexrelid::regclass::TEXT, pg_get_indexdef(indexrelid)
+FROM pg_index
+WHERE indrelid = ANY(%s::regclass[])
+AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE pg_constraint.conindid = pg_index.indexrelid);
+"""
+__select_snapshot_rows = "SELECT EXISTS (SELECT 1 FROM {table});"
+__drop_snapshot_constraint = "ALTER TABLE {table} DROP CONSTRAINT {name};"
+__add_snapshot_constraint = "ALTER TABLE {table} ADD CONSTRAINT {name} {definition};"
+__drop_snapshot_index = "DROP INDEX {name};"
+__reset_snapshot_sequence = "SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 1), max(id) IS NOT NULL) FROM {table};"
+
+
+def __require_pyarrow(fn):
+    if pa is None:
+        raise ImportError(f"{fn} needs pyarrow, pip install citegres[snapshot]")
+
+
+def __arrow_type(column_type):
+    if column_type == "timestamp with time zone":
+        return pa.timestamp("us", tz="UTC")
+    return getattr(pa, __snapshot_arrow_types.get(column_type, "string"))()
+
+
+def __detach_snapshot_keys(cur, tables):
+    """
+    Drop keys, foreign keys & indexes of tables, returns the statements that rebuild them in bulk
+    """
+    cur.execute(__select_snapshot_constraints, (tables,))
+    constraints = cur.fetchall()
+    cur.execute(__select_snapshot_indexes, (tables,))
+    indexes = cur.fetchall()
+    for table, name, _ in reversed(constraints):
+        cur.execute(__drop_snapshot_constraint.format(table=table, name=name))
+    for name, _ in indexes:
+        cur.execute(__drop_snapshot_index.format(name=name))
+    keys = [
+        __add_snapshot_constraint.format(table=table, name=name, definition=definition)
+        for table, name, definition in constraints
+    ]
+    foreign = [statement for statement in keys if " FOREIGN KEY " in statement]
+    return (
+        [statement for statement in keys if statement not in foreign]
+        + [f"{definition};" for _, definition in indexes]
+        + foreign
+    )
+
+
+def export_snapshot(cur, conn, directory, compression="zstd", chunk_size=None):
+    """
+    Stream every snapshot table of the database through COPY into compressed parquet files in
+    directory, from one consistent read only transaction, & write a snapshot.json manifest
+    """
+    __require_pyarrow("export_snapshot")
+    started = time.perf_counter()
+    directory = pathlib.Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    (cur, conn), schema_version = select_schema_version(cur=cur, conn=conn)
+    manifest = {"schema_version": schema_version, "compression": compression, "tables": {}}
+    try:
+        cur.execute(__begin_snapshot)
+        cur.execute(__select_snapshot_tables, (list(SNAPSHOT_TABLES),))
+        tables = {table for (table,) in cur.fetchall()}
+        for table in (table for table in SNAPSHOT_TABLES if table in tables):
+            cur.execute(__select_snapshot_columns, (table,))
+            columns = cur.fetchall()
+            sink = ParquetCopySink(
+                path=directory / f"{table}.parquet",
+                schema=pa.schema([(name, __arrow_type(ptype)) for name, ptype in columns]),
+                chunk_size=chunk_size,
+                compression=compression,
+            )
+            try:
+                cur.copy_expert(
+                    __copy_snapshot_out.format(
+                        table=table, columns=", ".join(name for name, _ in columns)
+                    ),
+                    sink,
+                )
+            finally:
+                sink.close()
+            manifest["tables"][table] = {
+                "rows": sink.rows,
+                "columns": {name: ptype for name, ptype in columns},
+            }
+        (directory / SNAPSHOT_MANIFEST).write_text(json.dumps(manifest, indent=2))
+        pyLogger.info(
+            f"exported {sum(t['rows'] for t in manifest['tables'].values())} rows of {len(manifest['tables'])} tables to {directory} in {time.perf_counter() - started:.3f}s"
+        )
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in export_snapshot")
+        manifest = ERROR_FAILED_TO_EXECUTE
+    return commit_prior(cur=cur, conn=conn), manifest
+
+
+def load_snapshot(cur, conn, directory, batch_rows=None):
+    """
+    Rebuild an empty database at the snapshot's schema version & bulk load the parquet files of an
+    export_snapshot directory with COPY in one transaction, keys, foreign keys & indexes are dropped
+    while loading & rebuilt after, id sequences move past the loaded ids, then the schema is
+    migrated to the latest version; returns the manifest of the loaded snapshot
+    """
+    __require_pyarrow("load_snapshot")
+    started = time.perf_counter()
+    directory = pathlib.Path(directory)
+    manifest = json.loads((directory / SNAPSHOT_MANIFEST).read_text())
+    if manifest["schema_version"] > SCHEMA_VERSION:
+        raise ValueError(
+            f"snapshot schema version must be at most {SCHEMA_VERSION}, got {manifest['schema_version']!r}"
+        )
+    (cur, conn), current = select_schema_version(cur=cur, conn=conn)
+    if current is ERROR_FAILED_TO_EXECUTE:
+        return (cur, conn), ERROR_FAILED_TO_EXECUTE
+    occupied = []
+    try:
+        cur.execute(__select_snapshot_tables, (list(SNAPSHOT_TABLES),))
+        for (table,) in cur.fetchall():
+            cur.execute(__select_snapshot_rows.format(table=table))
+            if cur.fetchone()[0]:
+                occupied.append(table)
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in load_snapshot")
+        return commit_prior(cur=cur, conn=conn), ERROR_FAILED_TO_EXECUTE
+    cur, conn = commit_prior(cur=cur, conn=conn)
+    if occupied:
+        raise ValueError(f"load_snapshot needs an empty database, got rows in {occupied}")
+    if current > manifest["schema_version"]:
+        raise ValueError(
+            f"snapshot schema version must be at least the database's {current}, got {manifest['schema_version']!r}"
+        )
+    batch_rows = SNAPSHOT_BATCH_ROWS if batch_rows is None else batch_rows
+    cur, conn = db_init(cur=cur, conn=conn, schema_version=manifest["schema_version"])
+    loaded = manifest
+    try:
+        with transaction(cur=cur, conn=conn):
+            rebuild = __detach_snapshot_keys(cur=cur, tables=list(manifest["tables"]))
+            for table, snapshot in manifest["tables"].items():
+                copy_in = __copy_snapshot_in.format(
+                    table=table, columns=", ".join(snapshot["columns"])
+                )
+                for batch in pq.ParquetFile(directory / f"{table}.parquet").iter_batches(
+                    batch_size=batch_rows
+                ):
+                    buffer = io.BytesIO()
+                    pacsv.write_csv(
+                        batch,
+                        buffer,
+                        write_options=pacsv.WriteOptions(
+                            include_header=False, quoting_style="needed"
+                        ),
+                    )
+                    buffer.seek(0)
+                    cur.copy_expert(copy_in, buffer)
+                if "id" in snapshot["columns"]:
+                    cur.execute(__reset_snapshot_sequence.format(table=table))
+            for __statement in rebuild:
+                cur.execute(__statement)
+        pyLogger.info(
+            f"loaded {sum(t['rows'] for t in manifest['tables'].values())} rows of {len(manifest['tables'])} tables from {directory} in {time.perf_counter() - started:.3f}s"
+        )
+    except Exception as E:
+        pyLogger.error(f"{str(E)} \nexception in load_snapshot")
+        loaded = ERROR_FAILED_TO_EXECUTE
+    clear_id_cache()
+    cur, conn = commit_prior(cur=cur, conn=conn)
+    if loaded is not ERROR_FAILED_TO_EXECUTE:
+        cur, conn = migrate(cur=cur, conn=conn)
+    return (cur, conn), loaded
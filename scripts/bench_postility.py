@@ -0,0 +1,897 @@
+"""
+Benchmarks for postility import & query paths against a local Postgres section.
+
+Each subcommand connects through postility (using citegres.ini from --config-dir),
+WIPES the selected section with db_init, loads synthetic search results and prints timings.
+Never point this at a section holding data you want to keep.
+
+Usage:
+    python scripts/bench_postility.py copy --section citegrestmp --rows 100000
+"""
+
+# IMPORTS
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import apostility  # noqa: E402
+import netility  # noqa: E402
+import postility  # noqa: E402
+
+
+# SYNTHETIC DATA DEFS
+def synthetic_df(rows, authors_per_paper=3, concepts_per_paper=3, refs_per_paper=5, seed=0):
+    """
+    Build a DataFrame shaped like seleamility.explode_query_dblp output
+    """
+    rng = random.Random(seed)
+    n_authors = max(rows // 2, 1)
+    n_concepts = max(rows // 20, 1)
+    n_works = rows * 2
+    records = {
+        "title": [],
+        "authors": [],
+        "doi": [],
+        "publication_date": [],
+        "publisher": [],
+        "type": [],
+        "venue": [],
+        "key": [],
+        "openalex_id": [],
+        "concepts": [],
+        "referenced_works": [],
+    }
+    for i in range(rows):
+        records["title"].append(f"Synthetic paper {i}")
+        records["authors"].append(
+            [f"Author {rng.randrange(n_authors)}" for _ in range(authors_per_paper)]
+        )
+        records["doi"].append(f"10.0000/synthetic.{i}")
+        records["publication_date"].append(
+            f"{rng.randint(1990, 2023)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        )
+        records["publisher"].append(f"Publisher {rng.randrange(50)}")
+        records["type"].append(rng.choice(["Journal Articles", "Conference and Workshop Papers"]))
+        records["venue"].append(f"Venue {rng.randrange(500)}")
+        records["key"].append(f"journals/synthetic/{i}")
+        records["openalex_id"].append(f"https://openalex.org/W{i}")
+        records["concepts"].append(
+            [f"Concept {rng.randrange(n_concepts)}" for _ in range(concepts_per_paper)]
+        )
+        records["referenced_works"].append(
+            [f"https://openalex.org/W{rng.randrange(n_works)}" for _ in range(refs_per_paper)]
+        )
+    return pd.DataFrame(records)
+
+
+# BENCHMARK DEFS
+def fresh_section(section):
+    """
+    Connect to section and rebuild its schema
+    """
+    postility.update_db_selection(section=section)
+    cur, conn = postility.create_connection()
+    return postility.db_init(cur=cur, conn=conn)
+
+
+def timed(label, rows, fn, **kwargs):
+    """
+    Run fn(**kwargs) once and print its wall time & throughput
+    """
+    started = time.perf_counter()
+    result = fn(**kwargs)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<40} {elapsed:>10.3f}s {rows / elapsed:>14,.0f} rows/sec")
+    return result, elapsed
+
+
+def bench_copy(args):
+    """
+    Row-by-row insert_papers_raw vs COPY text & binary copy_papers_raw
+    """
+    df = synthetic_df(args.rows).fillna(value="NULL")
+    cur, conn = fresh_section(args.section)
+    (cur, conn), row_time = timed(
+        "insert_papers_raw (row-by-row)",
+        args.rows,
+        postility.insert_papers_raw,
+        cur=cur,
+        conn=conn,
+        df=df,
+    )
+    for copy_format in postility.COPY_FORMATS:
+        (cur, conn), copy_time = timed(
+            f"copy_papers_raw ({copy_format})",
+            args.rows,
+            postility.copy_papers_raw,
+            cur=cur,
+            conn=conn,
+            df=df,
+            copy_format=copy_format,
+        )
+        print(f"{'speedup':<40} {row_time / copy_time:>10.1f}x")
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_upsert(args):
+    """
+    Anti-join insert_* vs ON CONFLICT upsert_* for dimensions against pre-seeded tables
+    """
+    df = synthetic_df(args.rows).fillna(value="NULL")
+    for seeded in (0, args.rows * 10):
+        for label, stages in (
+            (
+                "insert_* (download + isin)",
+                ("insert_authors", "insert_concepts", "insert_openalexs"),
+            ),
+            ("upsert_* (ON CONFLICT)", ("upsert_authors", "upsert_concepts", "upsert_openalexs")),
+        ):
+            cur, conn = fresh_section(args.section)
+            for table, column, values, column_type in (
+                ("authors", "author", [f"seeded author {i}" for i in range(seeded)], "TEXT"),
+                ("concepts", "concept", [f"seeded concept {i}" for i in range(seeded)], "TEXT"),
+                ("openalex", "work", range(10**9, 10**9 + seeded), "BIGINT"),
+            ):
+                cur, conn = postility.copy_dimension(
+                    cur=cur,
+                    conn=conn,
+                    table=table,
+                    column=column,
+                    values=values,
+                    column_type=column_type,
+                )
+            started = time.perf_counter()
+            for stage in stages:
+                cur, conn = getattr(postility, stage)(cur=cur, conn=conn, df=df)
+            elapsed = time.perf_counter() - started
+            print(f"{label:<30} {seeded:>10,} seeded rows {elapsed:>10.3f}s")
+            postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_pool(args):
+    """
+    Reconnect & section switch cost with fresh connections vs per-section pools
+    """
+    sections = [args.section, *args.switch_sections]
+    for pooling in (False, True):
+        postility.update_pool_settings(pooling=pooling)
+        for label, targets in (("reconnect", [args.section]), ("section switch", sections)):
+            postility.update_db_selection(section=args.section)
+            cur, conn = postility.create_connection()
+            started = time.perf_counter()
+            for i in range(args.cycles):
+                postility.update_db_selection(section=targets[i % len(targets)])
+                cur, conn = postility.reset_connection(cur=cur, conn=conn)
+            elapsed = time.perf_counter() - started
+            postility.kill_connection(cur=cur, conn=conn)
+            mode = "pooled" if pooling else "fresh"
+            print(f"{mode + ' ' + label:<30} {elapsed / args.cycles * 1e6:>12,.0f} us/cycle")
+    postility.close_pools()
+
+
+__seed_citations = [
+    "INSERT INTO openalex (work) SELECT i FROM generate_series(1, %(works)s) i;",
+    "INSERT INTO citations SELECT DISTINCT 1 + (random() * (%(works)s - 1))::int, 1 + (random() * (%(works)s - 1))::int FROM generate_series(1, %(rows)s);",
+]
+
+
+def seed_citations(cur, conn, rows):
+    """
+    Fill openalex & citations with about rows random edges directly in SQL
+    """
+    for statement in __seed_citations:
+        cur.execute(statement, {"works": max(rows // 5, 2), "rows": rows})
+    return postility.commit_prior(cur=cur, conn=conn)
+
+
+def bench_stream(args):
+    """
+    Peak client memory of select_all_from_citations vs stream_all_from_citations
+    """
+    cur, conn = fresh_section(args.section)
+    cur, conn = seed_citations(cur=cur, conn=conn, rows=args.rows)
+    tracemalloc.start()
+    started = time.perf_counter()
+    (cur, conn), citations = postility.select_all_from_citations(cur=cur, conn=conn)
+    edges = len(citations)
+    del citations
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    print(f"{'select_all_from_citations':<40} {elapsed:>8.3f}s {peak / 2**20:>10.1f} MiB peak")
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    streamed = 0
+    for chunk in postility.stream_all_from_citations(cur=cur, conn=conn, itersize=args.itersize):
+        streamed += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{'stream_all_from_citations':<40} {elapsed:>8.3f}s {peak / 2**20:>10.1f} MiB peak")
+    print(f"{'edges (select / stream)':<40} {edges:,} / {streamed:,}")
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_columnar(args):
+    """
+    Time & peak client memory of select_all_from_citations, row tuples vs COPY binary columns
+    """
+    cur, conn = fresh_section(args.section)
+    cur, conn = seed_citations(cur=cur, conn=conn, rows=args.rows)
+    for label, columnar in (("rows (fetchall)", False), ("columnar (COPY binary)", True)):
+        tracemalloc.start()
+        started = time.perf_counter()
+        (cur, conn), citations = postility.select_all_from_citations(
+            cur=cur, conn=conn, columnar=columnar
+        )
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = citations.memory_usage(index=True, deep=True).sum()
+        print(
+            f"{label:<30} {elapsed:>8.3f}s {peak / 2**20:>10.1f} MiB peak {size / 2**20:>8.1f} MiB frame {len(citations):>12,} edges"
+        )
+        del citations
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_delta(args):
+    """
+    Re-importing a refreshed query in full vs as a fingerprinted delta, unchanged & 1% changed
+    """
+    df = synthetic_df(args.rows).fillna(value="NULL")
+    changed = df.copy()
+    edited = changed.sample(frac=0.01, random_state=0).index
+    changed.loc[edited, "doi"] = changed.loc[edited, "doi"] + ".v2"
+    for label, delta in (("full re-import", False), ("delta re-import", True)):
+        cur, conn = fresh_section(args.section)
+        cur, conn = postility.importXML(cur=cur, conn=conn, df=df.copy(), bulk=True, delta=True)
+        for refreshed, batch in (("unchanged", df), ("1% changed", changed)):
+            cur, conn = timed(
+                f"{label} ({refreshed})",
+                args.rows,
+                postility.importXML,
+                cur=cur,
+                conn=conn,
+                df=batch.copy(),
+                bulk=True,
+                delta=delta,
+            )[0]
+        postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_neighborhood(args):
+    """
+    k-hop neighborhood of one paper with recursive CTEs vs loading every edge into networkx
+    """
+    cur, conn = fresh_section(args.section)
+    cur, conn = seed_citations(cur=cur, conn=conn, rows=args.rows)
+    cur.execute("ANALYZE;")
+    cur.execute("SELECT work FROM openalex ORDER BY id LIMIT 1;")
+    seed = postility.openalex_url(cur.fetchone()[0])
+    started = time.perf_counter()
+    (cur, conn), citations = postility.select_all_from_citations(cur=cur, conn=conn, columnar=True)
+    G = netility.construct_graph_from_df(citations)
+    loaded = time.perf_counter() - started
+    print(f"{'load all edges into networkx':<40} {loaded:>8.3f}s {G.number_of_edges():>12,} edges")
+    for depth in (1, 2, 3):
+        for fanout in (None, 10):
+            best = float("inf")
+            for _ in range(max(args.cycles // 20, 1)):
+                started = time.perf_counter()
+                (cur, conn), hood = postility.query_citation_neighborhood(
+                    cur=cur, conn=conn, seed=seed, direction="both", depth=depth, fanout=fanout
+                )
+                best = min(best, time.perf_counter() - started)
+            label = f"neighborhood depth {depth} (fanout {fanout})"
+            print(f"{label:<40} {best * 1e3:>8.1f}ms {len(hood):>12,} edges")
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_nodestats(args):
+    """
+    Top cited papers from node_stats vs live SQL aggregates vs networkx degrees of all edges
+    """
+    cur, conn = fresh_section(args.section)
+    cur, conn = seed_citations(cur=cur, conn=conn, rows=args.rows)
+    cur.execute("ANALYZE;")
+    cur, conn = timed(
+        "refresh_node_stats", args.rows, postility.refresh_node_stats, cur=cur, conn=conn
+    )[0]
+    for label, materialized in (("top 25 (node_stats)", True), ("top 25 (live aggregate)", False)):
+        best = float("inf")
+        for _ in range(max(args.cycles // 20, 1)):
+            started = time.perf_counter()
+            (cur, conn), top = postility.select_top_cited(
+                cur=cur, conn=conn, kind="paper", n=25, materialized=materialized
+            )
+            best = min(best, time.perf_counter() - started)
+        print(f"{label:<40} {best * 1e3:>10.1f} ms")
+    started = time.perf_counter()
+    (cur, conn), citations = postility.select_all_from_citations(cur=cur, conn=conn, columnar=True)
+    G = netility.construct_graph_from_df(citations)
+    metrics = netility.compute_graph_metrics(G=G, betweenness_centralities=False)
+    ranked = sorted(zip(metrics["in_degrees"], G.nodes(), strict=True), reverse=True)[:25]
+    print(f"{'top 25 (networkx in degrees)':<40} {(time.perf_counter() - started) * 1e3:>10.1f} ms")
+    assert [cited for cited, _ in ranked] == top.in_citations.tolist()
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+__search_scan = """
+SELECT papers.title, papers.doi, papers.pdate FROM papers
+LEFT JOIN paper_concepts ON paper_concepts.paper = papers.id
+LEFT JOIN concepts ON concepts.id = paper_concepts.concept
+WHERE papers.title ILIKE %(pattern)s OR concepts.concept ILIKE %(pattern)s
+GROUP BY papers.id ORDER BY papers.id LIMIT 25;
+"""
+
+
+def bench_search(args):
+    """
+    Title & concept search through the papers.search GIN index vs an ILIKE scan of the joins
+    """
+    df = synthetic_df(args.rows).fillna(value="NULL")
+    cur, conn = fresh_section(args.section)
+    cur, conn = timed(
+        "importXML (bulk, indexes search)",
+        args.rows,
+        postility.importXML,
+        cur=cur,
+        conn=conn,
+        df=df,
+        bulk=True,
+    )[0]
+    cur.execute("ANALYZE;")
+    term = f"{args.rows - 1}"
+    best = {"search_papers (tsvector)": float("inf"), "ILIKE scan": float("inf")}
+    for _ in range(max(args.cycles // 20, 1)):
+        started = time.perf_counter()
+        (cur, conn), found = postility.search_papers(cur=cur, conn=conn, query=term)
+        best["search_papers (tsvector)"] = min(
+            best["search_papers (tsvector)"], time.perf_counter() - started
+        )
+        started = time.perf_counter()
+        cur.execute(__search_scan, {"pattern": f"%{term}%"})
+        scanned = cur.fetchall()
+        best["ILIKE scan"] = min(best["ILIKE scan"], time.perf_counter() - started)
+    for label, elapsed in best.items():
+        print(f"{label:<40} {elapsed * 1e3:>10.1f} ms")
+    assert f"Synthetic paper {term}" in found.title.tolist()
+    assert any(title == f"Synthetic paper {term}" for title, _, _ in scanned)
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_federated(args):
+    """
+    Paper title edgelists of --section & --switch-sections fetched one after another vs federated_query
+    """
+    sections = [args.section, *args.switch_sections]
+    for seed, section in enumerate(sections):
+        cur, conn = fresh_section(section)
+        cur, conn = postility.importXML(
+            cur=cur,
+            conn=conn,
+            df=synthetic_df(args.rows, seed=seed).fillna(value="NULL"),
+            bulk=True,
+        )
+        postility.kill_connection(cur=cur, conn=conn)
+    started = time.perf_counter()
+    serial = []
+    for section in sections:
+        cur, conn = postility.create_connection(section=section)
+        (cur, conn), edges = postility.query_citationlist_full_resolve_paper_title(
+            cur=cur, conn=conn
+        )
+        serial.append(edges)
+        postility.kill_connection(cur=cur, conn=conn)
+    serial = pd.concat(serial, ignore_index=True).drop_duplicates()
+    elapsed = time.perf_counter() - started
+    print(f"{'serial over ' + str(len(sections)) + ' sections':<40} {elapsed:>10.3f}s")
+    merged, elapsed = timed(
+        f"federated_query over {len(sections)} sections",
+        len(serial),
+        postility.federated_query,
+        query="query_citationlist_full_resolve_paper_title",
+        sections=sections,
+    )
+    assert len(merged) == len(serial)
+
+
+def bench_factorize(args):
+    """
+    Bulk importXML normalizing server-side vs factorized client-side, fresh & half overlapping
+    """
+    fresh = synthetic_df(args.rows).fillna(value="NULL")
+    overlapping = synthetic_df(args.rows, seed=1).iloc[args.rows // 2 :].fillna(value="NULL")
+    for label, factorize in (("bulk", False), ("factorize", True)):
+        cur, conn = fresh_section(args.section)
+        for batch, df in (("fresh", fresh), ("overlapping", overlapping)):
+            cur, conn = timed(
+                f"importXML {label} ({batch})",
+                len(df),
+                postility.importXML,
+                cur=cur,
+                conn=conn,
+                df=df.copy(),
+                bulk=True,
+                factorize=factorize,
+            )[0]
+        postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_snapshot(args):
+    """
+    Rebuilding a section by re-importing its records vs export_snapshot & load_snapshot
+    """
+    df = synthetic_df(args.rows).fillna(value="NULL")
+    cur, conn = fresh_section(args.section)
+    cur, conn = timed(
+        "importXML (bulk)", args.rows, postility.importXML, cur=cur, conn=conn, df=df, bulk=True
+    )[0]
+    with tempfile.TemporaryDirectory() as directory:
+        ((cur, conn), manifest), _ = timed(
+            "export_snapshot",
+            args.rows,
+            postility.export_snapshot,
+            cur=cur,
+            conn=conn,
+            directory=directory,
+        )
+        size = sum(path.stat().st_size for path in Path(directory).iterdir())
+        print(f"{'snapshot size':<40} {size / 2**20:>9.1f}M")
+        postility.kill_connection(cur=cur, conn=conn)
+        cur, conn = fresh_section(args.section)
+        ((cur, conn), _), _ = timed(
+            "load_snapshot",
+            args.rows,
+            postility.load_snapshot,
+            cur=cur,
+            conn=conn,
+            directory=directory,
+        )
+    for table, snapshot in manifest["tables"].items():
+        cur.execute(f"SELECT count(*) FROM {table};")
+        assert cur.fetchone()[0] == snapshot["rows"], table
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_pipeline(args, batches=10, latency=1.0):
+    """
+    Scrape-then-import one batch at a time vs import_pipeline, with simulated fetch latency
+    """
+    df = synthetic_df(args.rows).fillna(value="NULL")
+    size = -(-args.rows // batches)
+
+    def fetched():
+        for start in range(0, args.rows, size):
+            time.sleep(latency)
+            yield df.iloc[start : start + size].copy()
+
+    cur, conn = fresh_section(args.section)
+    started = time.perf_counter()
+    for batch in fetched():
+        cur, conn = postility.importXML(cur=cur, conn=conn, df=batch, bulk=True)
+    elapsed = time.perf_counter() - started
+    print(f"{'serial fetch & import':<40} {elapsed:>10.3f}s")
+    postility.kill_connection(cur=cur, conn=conn)
+    cur, conn = fresh_section(args.section)
+    cur, conn = timed(
+        "import_pipeline",
+        args.rows,
+        postility.import_pipeline,
+        cur=cur,
+        conn=conn,
+        batches=fetched(),
+        bulk=True,
+    )[0]
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_page(args, limit=100, repeats=20):
+    """
+    Reading supports_resolved whole vs one OFFSET page vs one keyset select_page, shallow to deep
+    """
+    cur, conn = fresh_section(args.section)
+    cur, conn = postility.importXML(
+        cur=cur, conn=conn, df=synthetic_df(args.rows).fillna(value="NULL"), bulk=True
+    )
+    ((cur, conn), full), _ = timed(
+        "select_all_from_supports_resolved",
+        args.rows,
+        postility.select_all_from_supports_resolved,
+        cur=cur,
+        conn=conn,
+    )
+    for label, position in (("first", 0), ("middle", len(full) // 2), ("last", len(full) - limit)):
+        after = None
+        if position:
+            cur.execute(
+                "SELECT paper, author FROM supports ORDER BY paper, author OFFSET %s LIMIT 1;",
+                (position - 1,),
+            )
+            after = cur.fetchone()
+        started = time.perf_counter()
+        for _ in range(repeats):
+            cur.execute(__offset_page, (limit, position))
+            cur.fetchall()
+        elapsed = (time.perf_counter() - started) / repeats
+        print(f"{'OFFSET page (' + label + ')':<40} {elapsed * 1000:>9.2f}ms")
+        started = time.perf_counter()
+        for _ in range(repeats):
+            (cur, conn), _ = postility.select_page(
+                cur=cur, conn=conn, relation="supports_resolved", after=after, limit=limit
+            )
+        elapsed = (time.perf_counter() - started) / repeats
+        print(f"{'select_page (' + label + ')':<40} {elapsed * 1000:>9.2f}ms")
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+__offset_page = """
+SELECT S.paper, S.author, P.title, A.author
+FROM supports S JOIN papers P ON P.id = S.paper JOIN authors A ON A.id = S.author
+ORDER BY S.paper, S.author
+LIMIT %s OFFSET %s;
+"""
+
+
+__resolve_queries = (
+    ("query_citationlist_full_resolve_openalex", {"materialized": False}),
+    ("query_citationlist_full_resolve_paper_title", {"materialized": False}),
+    ("query_citationlist_full_resolve_author", {"materialized": False}),
+    ("select_all_from_supports_resolved", {}),
+    ("select_all_from_paper_concepts_resolved", {}),
+)
+
+__resolve_lookups = {
+    "cited by (citations.target)": "SELECT source FROM citations WHERE target = %s;",
+    "papers of openalex (papers.openalex)": "SELECT id FROM papers WHERE openalex = %s;",
+    "papers of author (supports.author)": "SELECT paper FROM supports WHERE author = %s;",
+    "papers of concept (paper_concepts.concept)": "SELECT paper FROM paper_concepts WHERE concept = %s;",
+}
+
+
+def bench_resolve(args):
+    """
+    Resolve query latency on the base schema vs after migrate() adds the join indexes
+    """
+    df = synthetic_df(args.rows).fillna(value="NULL")
+    postility.update_db_selection(section=args.section)
+    cur, conn = postility.create_connection()
+    cur, conn = postility.db_init(cur=cur, conn=conn, schema_version=0)
+    cur, conn = postility.importXML(cur=cur, conn=conn, df=df, bulk=True)
+    cur.execute("ANALYZE;")
+    cur, conn = postility.commit_prior(cur=cur, conn=conn)
+    for migrated in (False, True):
+        if migrated:
+            cur, conn = postility.migrate(cur=cur, conn=conn)
+        (cur, conn), schema_version = postility.select_schema_version(cur=cur, conn=conn)
+        for query, kwargs in __resolve_queries:
+            best = float("inf")
+            for _ in range(args.cycles):
+                started = time.perf_counter()
+                (cur, conn), resolved = getattr(postility, query)(cur=cur, conn=conn, **kwargs)
+                best = min(best, time.perf_counter() - started)
+            label = f"v{schema_version} {query}"
+            print(f"{label:<56} {best * 1e3:>10.1f} ms {len(resolved):>10,} rows")
+        rng = random.Random(0)
+        for label, lookup in __resolve_lookups.items():
+            keys = [rng.randint(1, max(args.rows // 20, 1)) for _ in range(args.cycles * 100)]
+            started = time.perf_counter()
+            for key in keys:
+                cur.execute(lookup, (key,))
+                cur.fetchall()
+            elapsed = time.perf_counter() - started
+            cur, conn = postility.commit_prior(cur=cur, conn=conn)
+            label = f"v{schema_version} {label}"
+            print(f"{label:<56} {elapsed / len(keys) * 1e6:>10,.0f} us/lookup")
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_edges(args):
+    """
+    Resolved citation edgelists from the live joins vs citations_resolved_*, plus refresh cost
+    """
+    cur, conn = fresh_section(args.section)
+    cur, conn = postility.importXML(
+        cur=cur, conn=conn, df=synthetic_df(args.rows).fillna(value="NULL"), bulk=True
+    )
+    delta = synthetic_df(max(args.rows // 100, 1), seed=1).fillna(value="NULL")
+    delta["title"] = delta.title.str.replace("Synthetic", "Delta", regex=False)
+    delta["openalex_id"] = [f"https://openalex.org/W{args.rows * 2 + i}" for i in range(len(delta))]
+    cur, conn = postility.importXML(cur=cur, conn=conn, df=delta, bulk=True)
+    for label, kwargs in (
+        ("refresh (rebuild)", {"rebuild": True}),
+        ("refresh (full anti-join, nothing new)", {}),
+        ("refresh (delta of last import)", {"openalex_urls": delta.openalex_id}),
+    ):
+        cur, conn = timed(
+            label, args.rows, postility.refresh_resolved_citations, cur=cur, conn=conn, **kwargs
+        )[0]
+    for kind in ("openalex", "paper_title", "author"):
+        for materialized in (False, True):
+            best = float("inf")
+            for _ in range(args.cycles):
+                started = time.perf_counter()
+                (cur, conn), edges = getattr(postility, f"query_citationlist_full_resolve_{kind}")(
+                    cur=cur, conn=conn, materialized=materialized
+                )
+                best = min(best, time.perf_counter() - started)
+            label = f"resolve {kind} ({'materialized' if materialized else 'live joins'})"
+            print(f"{label:<40} {best * 1e3:>10.1f} ms {len(edges):>10,} edges")
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_normalize(args):
+    """
+    copy_papers_raw staging & normalizing a batch, into an empty papers table & again as a re-import
+    """
+    cur, conn = fresh_section(args.section)
+    for label, df in (
+        ("copy_papers_raw (empty papers)", synthetic_df(args.rows, seed=0)),
+        ("copy_papers_raw (re-import)", synthetic_df(args.rows, seed=1)),
+    ):
+        df = df.fillna(value="NULL")
+        for stage in ("copy_authors", "copy_openalexs"):
+            cur, conn = getattr(postility, stage)(cur=cur, conn=conn, df=df)
+        cur.execute("ANALYZE;")
+        cur, conn = postility.commit_prior(cur=cur, conn=conn)
+        cur, conn = timed(label, args.rows, postility.copy_papers_raw, cur=cur, conn=conn, df=df)[0]
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_instrument(args):
+    """
+    Row-by-row insert_papers_raw with full SQL logging vs sampled & unsampled instrumentation
+    """
+    df = synthetic_df(args.rows).fillna(value="NULL")
+    sql_logger = logging.getLogger(name="sql_cursor_debug")
+    sql_logger.propagate = False
+    with open(os.devnull, "w") as devnull:
+        sql_logger.addHandler(logging.StreamHandler(devnull))
+        cur, conn = fresh_section(args.section)
+        for label, settings in (
+            ("off", {"sql_logging": False, "enabled": False}),
+            ("sql logging (pre-instrumentation default)", {"sql_logging": True, "enabled": False}),
+            (
+                "instrumented, every statement timed",
+                {"sql_logging": False, "enabled": True, "sample_rate": 1.0},
+            ),
+            (
+                "instrumented, 1% timed",
+                {"sql_logging": False, "enabled": True, "sample_rate": 0.01},
+            ),
+        ):
+            postility.update_instrumentation(**settings)
+            logging.disable(logging.NOTSET if settings["sql_logging"] else logging.INFO)
+            postility.reset_statement_stats()
+            (cur, conn), _ = timed(
+                label, args.rows, postility.insert_papers_raw, cur=cur, conn=conn, df=df
+            )
+        logging.disable(logging.NOTSET if args.verbose else logging.INFO)
+        print(postility.dump_statement_stats(width=60))
+        postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_idcache(args):
+    """
+    Repeated author id lookups without the id cache, with a cold cache & with a warmed cache
+    """
+    df = synthetic_df(args.rows).fillna(value="NULL")
+    cur, conn = fresh_section(args.section)
+    cur, conn = postility.copy_authors(cur=cur, conn=conn, df=df)
+    authors = sorted({author for authors in df.authors for author in authors})
+    rng = random.Random(0)
+    lookups = rng.choices(
+        authors, weights=[1 / (rank + 1) for rank in range(len(authors))], k=args.rows
+    )
+    for label, caching, warm in (
+        ("no cache", False, False),
+        ("cold cache", True, False),
+        ("warmed cache", True, True),
+    ):
+        postility.update_id_cache_settings(caching=caching)
+        postility.clear_id_cache()
+        if warm:
+            cur, conn = postility.warm_id_cache(cur=cur, conn=conn, table="authors")[0]
+        before = postility.id_cache_stats()["authors"]
+        started = time.perf_counter()
+        for author in lookups:
+            (cur, conn), _ = postility.select_id_from_authors_where_author_is(
+                cur=cur, conn=conn, author=author
+            )
+        elapsed = time.perf_counter() - started
+        after = postility.id_cache_stats()["authors"]
+        hits = after["hits"] - before["hits"]
+        print(
+            f"{label:<20} {elapsed:>8.3f}s {elapsed / len(lookups) * 1e6:>8.1f} us/lookup {hits / len(lookups):>8.1%} hits"
+        )
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_openalex(args):
+    """
+    Bulk import into openalex & citations, then openalex table and key index size
+    """
+    cur, conn = fresh_section(args.section)
+    for label, seed in (("importXML bulk (empty)", 0), ("importXML bulk (re-import)", 1)):
+        df = synthetic_df(args.rows, seed=seed).fillna(value="NULL")
+        cur, conn = timed(
+            label, args.rows, postility.importXML, cur=cur, conn=conn, df=df, bulk=True
+        )[0]
+    cur.execute(
+        "SELECT pg_table_size('openalex'), pg_indexes_size('openalex'), count(*) FROM openalex;"
+    )
+    table_size, index_size, rows = cur.fetchone()
+    print(f"{'openalex table':<40} {table_size / 2**20:>10.1f} MiB {rows:>10,} rows")
+    print(f"{'openalex indexes':<40} {index_size / 2**20:>10.1f} MiB")
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_prepared(args):
+    """
+    Per-call latency of id lookups & insert_papers_raw, plain vs prepared, row by row vs batched
+    """
+    df = synthetic_df(args.rows).fillna(value="NULL")
+    cur, conn = fresh_section(args.section)
+    cur, conn = postility.copy_authors(cur=cur, conn=conn, df=df)
+    authors = [authors[0] for authors in df.authors]
+    batch = postility.PREPARED_PAGE_SIZE
+    postility.update_id_cache_settings(caching=False)
+    for label, enabled in (("lookup (plain)", False), ("lookup (prepared)", True)):
+        postility.update_prepared_statements(enabled=enabled)
+        started = time.perf_counter()
+        for author in authors:
+            (cur, conn), _ = postility.select_id_from_authors_where_author_is(
+                cur=cur, conn=conn, author=author
+            )
+        elapsed = time.perf_counter() - started
+        print(f"{label:<40} {elapsed:>8.3f}s {elapsed / len(authors) * 1e6:>8.1f} us/call")
+    postility.update_id_cache_settings(caching=True)
+    for label, enabled, page_size in (
+        ("insert_papers_raw (plain, row by row)", False, 1),
+        ("insert_papers_raw (prepared, row by row)", True, 1),
+        ("insert_papers_raw (plain, batched)", False, batch),
+        ("insert_papers_raw (prepared, batched)", True, batch),
+    ):
+        postility.update_prepared_statements(enabled=enabled, page_size=page_size)
+        started = time.perf_counter()
+        cur, conn = postility.insert_papers_raw(cur=cur, conn=conn, df=df)
+        elapsed = time.perf_counter() - started
+        print(f"{label:<40} {elapsed:>8.3f}s {elapsed / len(df) * 1e6:>8.1f} us/row")
+    postility.update_prepared_statements(enabled=True, page_size=batch)
+    postility.kill_connection(cur=cur, conn=conn)
+
+
+def bench_async(args):
+    """
+    Batched imports after a simulated fetch, awaited in turn vs pipelined, & concurrent resolves
+    """
+    batches = 10
+    size = max(args.rows // batches, 1)
+    df = synthetic_df(size * batches).fillna(value="NULL")
+    chunks = [df.iloc[n * size : (n + 1) * size] for n in range(batches)]
+    cur, conn = fresh_section(args.section)
+    started = time.perf_counter()
+    cur, conn = postility.importXML(cur=cur, conn=conn, df=chunks[0], bulk=True)
+    fetch = time.perf_counter() - started  # simulated fetch as slow as one import
+    postility.kill_connection(cur=cur, conn=conn)
+
+    async def fetched(chunks):
+        for chunk in chunks:
+            await asyncio.sleep(fetch)
+            yield chunk
+
+    async def sequential(aconn, chunks):
+        async for chunk in fetched(chunks):
+            await apostility.importXML(aconn, chunk, bulk=True)
+
+    async def pipelined(aconn, chunks):
+        await apostility.import_batches(aconn, fetched(chunks), bulk=True)
+
+    async def resolves(connections):
+        aconns = [await apostility.create_connection(section=args.section) for _ in range(3)]
+        queries = [
+            apostility.query_citationlist_full_resolve_openalex,
+            apostility.query_citationlist_full_resolve_paper_title,
+            apostility.query_citationlist_full_resolve_author,
+        ]
+        started = time.perf_counter()
+        if connections == 1:
+            for query in queries:
+                await query(aconns[0], materialized=False)
+        else:
+            await asyncio.gather(
+                *(
+                    query(aconn, materialized=False)
+                    for query, aconn in zip(queries, aconns, strict=True)
+                )
+            )
+        elapsed = time.perf_counter() - started
+        for aconn in aconns:
+            await aconn.close()
+        return elapsed
+
+    print(f"{'simulated fetch per batch':<40} {fetch:>10.3f}s {batches:>10} batches")
+    for label, pipeline in (("fetch then import", sequential), ("import_batches", pipelined)):
+        cur, conn = fresh_section(args.section)
+        postility.kill_connection(cur=cur, conn=conn)
+
+        async def scenario(pipeline=pipeline):
+            async with await apostility.create_connection(section=args.section) as aconn:
+                await pipeline(aconn, chunks[1:])
+
+        started = time.perf_counter()
+        asyncio.run(scenario())
+        print(f"{label:<40} {time.perf_counter() - started:>10.3f}s")
+    for label, connections in (
+        ("3 live resolves, 1 connection", 1),
+        ("3 live resolves, gathered", 3),
+    ):
+        print(f"{label:<40} {asyncio.run(resolves(connections)):>10.3f}s")
+
+
+BENCHMARKS = {
+    "copy": bench_copy,
+    "upsert": bench_upsert,
+    "pool": bench_pool,
+    "stream": bench_stream,
+    "resolve": bench_resolve,
+    "normalize": bench_normalize,
+    "instrument": bench_instrument,
+    "edges": bench_edges,
+    "idcache": bench_idcache,
+    "openalex": bench_openalex,
+    "prepared": bench_prepared,
+    "async": bench_async,
+    "columnar": bench_columnar,
+    "delta": bench_delta,
+    "neighborhood": bench_neighborhood,
+    "nodestats": bench_nodestats,
+    "search": bench_search,
+    "federated": bench_federated,
+    "factorize": bench_factorize,
+    "snapshot": bench_snapshot,
+    "pipeline": bench_pipeline,
+    "page": bench_page,
+}
+
+
+def main():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--config-dir", default=".", help="directory holding citegres.ini")
+    common.add_argument("--section", default="citegrestmp", help="citegres.ini section to WIPE")
+    common.add_argument("--rows", type=int, default=100_000, help="synthetic records to load")
+    common.add_argument(
+        "--cycles", type=int, default=200, help="connection cycles for pool, repeats for resolve"
+    )
+    common.add_argument(
+        "--switch-sections",
+        nargs="*",
+        default=[],
+        help="extra sections to alternate with for pool, or to federate (WIPED)",
+    )
+    common.add_argument("--itersize", type=int, default=10_000, help="stream chunk size")
+    common.add_argument("--verbose", action="store_true", help="keep postility INFO logging")
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    for name, fn in BENCHMARKS.items():
+        subparsers.add_parser(name, parents=[common], help=fn.__doc__.strip()).set_defaults(fn=fn)
+    args = parser.parse_args()
+    if not args.verbose:
+        logging.disable(logging.INFO)
+    postility.SRC = str(Path(args.config_dir).resolve())
+    args.fn(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -125,221 +125,215 @@ def chrome_query_dblp_XML(driver, query="echo chamber"):
 
 
 # EXTRACTION DEF
-def explode_query_dblp(driver, search_results, explosion_factor=10, use_nord=1):
+DBLP_PAGE_COLUMNS = [
+    "openalex_stats_urls",
+    "crossref_refs_url",
+    "opencitations_refs_url",
+    "opencitations_cite_url",
+    "semanticscholar_refs_url",
+    "semanticscholar_cite_url",
+]
+OPENALEX_COLUMNS = [
+    "openalex_id",
+    "publication_date",
+    "landing_page_url",
+    "pdf_url",
+    "cited_by_count",
+    "concepts",
+    "referenced_works_count",
+    "referenced_works",
+    "related_works",
+    "openalex_cite_url",
+]
+CROSSREF_COLUMNS = ["publisher", "ref_doi_list"]
+
+
+def parse_dblp_page(html):
     """
-    Retrieve openalex, crossref, opencitations, and semanticscholar API urls as available, request their results and store into a dataframe
+    Retrieve openalex, crossref, opencitations, and semanticscholar API urls from a DBLP record page
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    try:
+        openalex_stats_url = (
+            soup.body.find("div", id="rec-side-panel")
+            .find_all(href=re.compile("https://api.openalex.org/works/"))[0]
+            .get("href")
+        )
+    except Exception:
+        openalex_stats_url = "NULL"
+    try:
+        crossref_refs_url = (
+            soup.body.find("div", id="publ-references-section")
+            .div.header.find_all(href=re.compile("https://api.crossref.org/works/"))[0]
+            .get("href")
+        )
+    except Exception:
+        crossref_refs_url = "NULL"
+    try:
+        opencitations_refs_url = (
+            soup.body.find("div", id="publ-references-section")
+            .div.header.find_all(href=re.compile("https://opencitations.net/index/api/v1/.*json"))[
+                0
+            ]
+            .get("href")
+        )
+    except Exception:
+        opencitations_refs_url = "NULL"
+    try:
+        opencitations_cite_url = (
+            soup.body.find("div", id="publ-citations-section")
+            .div.header.find_all(href=re.compile("https://opencitations.net/index/api/v1/.*json"))[
+                0
+            ]
+            .get("href")
+        )
+    except Exception:
+        opencitations_cite_url = "NULL"
+    try:
+        semanticscholar_refs_url = (
+            soup.body.find("div", id="publ-references-section")
+            .div.header.find_all(href=re.compile("https://api.semanticscholar.org/v1/"))[0]
+            .get("href")
+        )
+    except Exception:
+        semanticscholar_refs_url = "NULL"
+    try:
+        semanticscholar_cite_url = (
+            soup.body.find("div", id="publ-citations-section")
+            .div.header.find_all(href=re.compile("https://api.semanticscholar.org/v1/"))[0]
+            .get("href")
+        )
+    except Exception:
+        semanticscholar_cite_url = "NULL"
+    return [
+        openalex_stats_url,
+        crossref_refs_url,
+        opencitations_refs_url,
+        opencitations_cite_url,
+        semanticscholar_refs_url,
+        semanticscholar_cite_url,
+    ]
+
+
+def request_openalex(unopenedalex):
+    """
+    Request an openalex work and return its OPENALEX_COLUMNS fields, "NULL" where missing
+    """
+    try:
+        r = requests.get(unopenedalex)
+        openedalex = r.json()
+    except Exception:
+        return ["NULL"] * len(OPENALEX_COLUMNS)
+    fields = [
+        lambda: openedalex["id"],
+        lambda: openedalex["publication_date"],
+        lambda: openedalex["primary_location"]["landing_page_url"],
+        lambda: openedalex["primary_location"]["pdf_url"],
+        lambda: openedalex["cited_by_count"],
+        lambda: [c["display_name"].replace("'", "''") for c in openedalex["concepts"]],
+        lambda: openedalex["referenced_works_count"],
+        lambda: openedalex["referenced_works"],
+        lambda: openedalex["related_works"],
+        lambda: openedalex["cited_by_api_url"],
+    ]
+    values = []
+    for field in fields:
+        try:
+            values.append(field())
+        except Exception:
+            values.append("NULL")
+    return values
+
+
+def request_crossref(uncrossreffed):
+    """
+    Request a crossref work and return its publisher & referenced dois, "NULL" where missing
+    """
+    try:
+        r = requests.get(uncrossreffed)
+        crossreffed = r.json()
+    except Exception:
+        return ["NULL", "NULL"]
+    try:
+        publisher = crossreffed["message"]["publisher"]
+    except Exception:
+        publisher = "NULL"
+    try:
+        ref_doi_list = []
+        for ref in crossreffed["message"]["reference"]:
+            try:
+                doi = ref["DOI"]
+            except Exception:
+                doi = "NULL"
+            ref_doi_list.append(doi)
+    except Exception:
+        ref_doi_list = "NULL"
+    return [publisher, ref_doi_list]
+
+
+def iter_explode_query_dblp(driver, search_results, explosion_factor=10, use_nord=1):
+    """
+    Yield search results explosion_factor hits at a time as dataframes enriched with openalex &
+    crossref results, so each batch can be imported while the next one is scraped
     """
     df = pd.DataFrame(search_results)
     df.rename(columns={"url": "dblp_url"}, inplace=True)
     num_hits = len(df)
-    print("num_hits")
-    print(num_hits)
-    print("raw df")
-    print(df)
+    print(f"num_hits: {num_hits}")
     tabs = explode_tabs(driver, min(explosion_factor, num_hits))
-    openalex_stats_urls = []
-    crossref_refs_urls = []
-    opencitations_refs_urls = []
-    opencitations_cite_urls = []
-    semanticscholar_refs_urls = []
-    semanticscholar_cite_urls = []
-    num_parsed = 0
-    while num_parsed < num_hits:
-        for i in range(explosion_factor):
-            _num_parsed = num_parsed + i
-            if _num_parsed < num_hits:
+    try:
+        for num_parsed in range(0, num_hits, explosion_factor):
+            batch = df.iloc[num_parsed : num_parsed + explosion_factor].copy()
+            for i, dblp_url in enumerate(batch.dblp_url):
                 driver.switch_to.window(tabs[i])
-                driver.get(df.dblp_url[num_parsed + i])
+                driver.get(dblp_url)
+            if use_nord:
+                nordility.change_vpn_server()
             else:
-                break
-        if use_nord:
-            nordility.change_vpn_server()
-        else:
-            time.sleep(5)
-        for i in range(explosion_factor):
-            _num_parsed = num_parsed + i
-            if _num_parsed < num_hits:
+                time.sleep(5)
+            pages = []
+            for i in range(len(batch)):
                 driver.switch_to.window(tabs[i])
-                html = driver.page_source
-                soup = BeautifulSoup(html, "html.parser")
-                try:
-                    openalex_stats_url = (
-                        soup.body.find("div", id="rec-side-panel")
-                        .find_all(href=re.compile("https://api.openalex.org/works/"))[0]
-                        .get("href")
-                    )
-                except Exception:
-                    openalex_stats_url = "NULL"
-                try:
-                    crossref_refs_url = (
-                        soup.body.find("div", id="publ-references-section")
-                        .div.header.find_all(href=re.compile("https://api.crossref.org/works/"))[0]
-                        .get("href")
-                    )
-                except Exception:
-                    crossref_refs_url = "NULL"
-                try:
-                    opencitations_refs_url = (
-                        soup.body.find("div", id="publ-references-section")
-                        .div.header.find_all(
-                            href=re.compile("https://opencitations.net/index/api/v1/.*json")
-                        )[0]
-                        .get("href")
-                    )
-                except Exception:
-                    opencitations_refs_url = "NULL"
-                try:
-                    opencitations_cite_url = (
-                        soup.body.find("div", id="publ-citations-section")
-                        .div.header.find_all(
-                            href=re.compile("https://opencitations.net/index/api/v1/.*json")
-                        )[0]
-                        .get("href")
-                    )
-                except Exception:
-                    opencitations_cite_url = "NULL"
-                try:
-                    semanticscholar_refs_url = (
-                        soup.body.find("div", id="publ-references-section")
-                        .div.header.find_all(
-                            href=re.compile("https://api.semanticscholar.org/v1/")
-                        )[0]
-                        .get("href")
-                    )
-                except Exception:
-                    semanticscholar_refs_url = "NULL"
-                try:
-                    semanticscholar_cite_url = (
-                        soup.body.find("div", id="publ-citations-section")
-                        .div.header.find_all(
-                            href=re.compile("https://api.semanticscholar.org/v1/")
-                        )[0]
-                        .get("href")
-                    )
-                except Exception:
-                    semanticscholar_cite_url = "NULL"
-                openalex_stats_urls.append(openalex_stats_url)
-                crossref_refs_urls.append(crossref_refs_url)
-                opencitations_refs_urls.append(opencitations_refs_url)
-                opencitations_cite_urls.append(opencitations_cite_url)
-                semanticscholar_refs_urls.append(semanticscholar_refs_url)
-                semanticscholar_cite_urls.append(semanticscholar_cite_url)
-            else:
-                break
-        num_parsed += explosion_factor
-    df["openalex_stats_urls"] = openalex_stats_urls
-    df["crossref_refs_url"] = crossref_refs_urls
-    df["opencitations_refs_url"] = opencitations_refs_urls
-    df["opencitations_cite_url"] = opencitations_cite_urls
-    df["semanticscholar_refs_url"] = semanticscholar_refs_urls
-    df["semanticscholar_cite_url"] = semanticscholar_cite_urls
-    print("url df")
-    print(df)
-    openalex_ids = []
-    publication_dates = []
-    landing_page_urls = []
-    pdf_urls = []
-    cited_by_counts = []
-    concepts = []
-    referenced_works_counts = []
-    referenced_works = []
-    related_works = []
-    cited_by_api_urls = []
-    for unopenedalex in df.openalex_stats_urls:
-        try:
-            r = requests.get(unopenedalex)
-            openedalex = r.json()
-        except Exception:
-            openalex_ids.append("NULL")
-            publication_dates.append("NULL")
-            landing_page_urls.append("NULL")
-            pdf_urls.append("NULL")
-            cited_by_counts.append("NULL")
-            concepts.append("NULL")
-            referenced_works_counts.append("NULL")
-            referenced_works.append("NULL")
-            related_works.append("NULL")
-            cited_by_api_urls.append("NULL")
-            continue
-        try:
-            openalex_ids.append(openedalex["id"])
-        except Exception:
-            openalex_ids.append("NULL")
-        try:
-            publication_dates.append(openedalex["publication_date"])
-        except Exception:
-            publication_dates.append("NULL")
-        try:
-            landing_page_urls.append(openedalex["primary_location"]["landing_page_url"])
-        except Exception:
-            landing_page_urls.append("NULL")
-        try:
-            pdf_urls.append(openedalex["primary_location"]["pdf_url"])
-        except Exception:
-            pdf_urls.append("NULL")
-        try:
-            cited_by_counts.append(openedalex["cited_by_count"])
-        except Exception:
-            cited_by_counts.append("NULL")
-        try:
-            concepts.append([c["display_name"].replace("'", "''") for c in openedalex["concepts"]])
-        except Exception:
-            concepts.append("NULL")
-        try:
-            referenced_works_counts.append(openedalex["referenced_works_count"])
-        except Exception:
-            referenced_works_counts.append("NULL")
-        try:
-            referenced_works.append(openedalex["referenced_works"])
-        except Exception:
-            referenced_works.append("NULL")
-        try:
-            related_works.append(openedalex["related_works"])
-        except Exception:
-            related_works.append("NULL")
-        try:
-            cited_by_api_urls.append(openedalex["cited_by_api_url"])
-        except Exception:
-            cited_by_api_urls.append("NULL")
-    df["openalex_id"] = openalex_ids
-    df["publication_date"] = publication_dates
-    df["landing_page_url"] = landing_page_urls
-    df["pdf_url"] = pdf_urls
-    df["cited_by_count"] = cited_by_counts
-    df["concepts"] = concepts
-    df["referenced_works_count"] = referenced_works_counts
-    df["referenced_works"] = referenced_works
-    df["related_works"] = related_works
-    df["openalex_cite_url"] = cited_by_api_urls
-    print("openalex df")
-    print(df)
-    publishers = []
-    ref_doi_lists = []
-    for uncrossreffed in df.crossref_refs_url:
-        try:
-            r = requests.get(uncrossreffed)
-            crossreffed = r.json()
-            try:
-                publishers.append(crossreffed["message"]["publisher"])
-            except Exception:
-                publishers.append("NULL")
-            try:
-                ref_doi_list = []
-                for ref in crossreffed["message"]["reference"]:
-                    try:
-                        doi = ref["DOI"]
-                    except Exception:
-                        doi = "NULL"
-                    ref_doi_list.append(doi)
-                ref_doi_lists.append(ref_doi_list)
-            except Exception:
-                ref_doi_lists.append("NULL")
-        except Exception:
-            publishers.append("NULL")
-            ref_doi_lists.append("NULL")
-    df["publisher"] = publishers
-    df["ref_doi_list"] = ref_doi_lists
+                pages.append(parse_dblp_page(driver.page_source))
+            batch[DBLP_PAGE_COLUMNS] = pd.DataFrame(
+                pages, columns=DBLP_PAGE_COLUMNS, index=batch.index
+            )
+            batch[OPENALEX_COLUMNS] = pd.DataFrame(
+                [request_openalex(url) for url in batch.openalex_stats_urls],
+                columns=OPENALEX_COLUMNS,
+                index=batch.index,
+            )
+            batch[CROSSREF_COLUMNS] = pd.DataFrame(
+                [request_crossref(url) for url in batch.crossref_refs_url],
+                columns=CROSSREF_COLUMNS,
+                index=batch.index,
+            )
+            print(f"extracted hits {num_parsed} - {num_parsed + len(batch)} of {num_hits}")
+            yield batch
+    finally:
+        reset_tabs(driver, _tabs=tabs)
+
+
+def explode_query_dblp(driver, search_results, explosion_factor=10, use_nord=1):
+    """
+    Retrieve openalex, crossref, opencitations, and semanticscholar API urls as available, request their results and store into a dataframe
+    """
+    batches = list(
+        iter_explode_query_dblp(
+            driver=driver,
+            search_results=search_results,
+            explosion_factor=explosion_factor,
+            use_nord=use_nord,
+        )
+    )
+    if not batches:
+        return pd.DataFrame(
+            columns=[*pd.DataFrame(search_results).rename(columns={"url": "dblp_url"}).columns]
+            + DBLP_PAGE_COLUMNS
+            + OPENALEX_COLUMNS
+            + CROSSREF_COLUMNS
+        )
+    df = pd.concat(batches)
     print("crossref df")
     print(df)
-    tabs = reset_tabs(driver, _tabs=tabs)
     return df
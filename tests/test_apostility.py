@@ -0,0 +1,223 @@
+"""
+Tests for citegres.apostility — the asyncio wrapper around postility.
+All tests drive mocked cursors & connections; no database or network access required.
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+import apostility
+
+# ---------------------------------------------------------------------------
+# AsyncConnection
+# ---------------------------------------------------------------------------
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestAsyncConnection:
+    def test_reader_result_and_connection_kept(self):
+        cur, conn, new_cur = MagicMock(), MagicMock(), MagicMock()
+        df = pd.DataFrame({"author": ["a"]})
+
+        async def scenario():
+            aconn = apostility.AsyncConnection(cur=cur, conn=conn)
+            with patch("postility.select_all_from_authors", return_value=((new_cur, conn), df)):
+                result = await apostility.select_all_from_authors(aconn)
+            assert aconn.cur is new_cur
+            return result
+
+        assert run(scenario()) is df
+
+    def test_calls_run_off_the_event_loop(self):
+        threads = []
+
+        def record(cur, conn, df, **kwargs):
+            threads.append(threading.current_thread().name)
+            return cur, conn
+
+        async def scenario():
+            aconn = apostility.AsyncConnection(cur=MagicMock(), conn=MagicMock())
+            with patch("postility.importXML", side_effect=record):
+                await apostility.importXML(aconn, pd.DataFrame())
+
+        run(scenario())
+        assert threads[0].startswith("apostility")
+
+    def test_close_kills_connection(self):
+        cur, conn = MagicMock(), MagicMock()
+
+        async def scenario():
+            with patch("postility.kill_connection") as kill:
+                async with apostility.AsyncConnection(cur=cur, conn=conn):
+                    pass
+            return kill
+
+        run(scenario()).assert_called_once_with(cur, conn)
+
+    def test_cancelled_call_cancels_its_statement(self):
+        conn = MagicMock(closed=False)
+        started = threading.Event()
+
+        def slow(cur, conn):
+            started.set()
+            time.sleep(0.2)
+            return (cur, conn), None
+
+        async def scenario():
+            aconn = apostility.AsyncConnection(cur=MagicMock(), conn=conn)
+            with (
+                patch("postility.select_all_from_authors", side_effect=slow),
+                pytest.raises(asyncio.TimeoutError),
+            ):
+                await asyncio.wait_for(apostility.select_all_from_authors(aconn), 0.05)
+
+        run(scenario())
+        assert started.is_set()
+        conn.cancel.assert_called_once()
+
+    def test_cancelled_call_keeps_the_connection_it_returns(self):
+        old_conn, new_cur, new_conn = MagicMock(closed=False), MagicMock(), MagicMock()
+        connections = []
+
+        def reset(cur, conn):
+            time.sleep(0.2)  # QueryCanceled, commit_prior resets the connection
+            return (new_cur, new_conn), None
+
+        def record(cur, conn):
+            connections.append(conn)
+            return (cur, conn), None
+
+        async def scenario():
+            aconn = apostility.AsyncConnection(cur=MagicMock(), conn=old_conn)
+            with (
+                patch("postility.select_all_from_authors", side_effect=reset),
+                pytest.raises(asyncio.TimeoutError),
+            ):
+                await asyncio.wait_for(apostility.select_all_from_authors(aconn), 0.05)
+            with patch("postility.select_all_from_authors", side_effect=record):
+                await apostility.select_all_from_authors(aconn)
+            return aconn
+
+        aconn = run(scenario())
+        assert connections == [new_conn]
+        assert aconn.cur is new_cur and aconn.conn is new_conn
+
+    def test_cancelling_a_queued_call_spares_the_running_one(self):
+        conn = MagicMock(closed=False)
+
+        def slow(cur, conn):
+            time.sleep(0.2)
+            return (cur, conn), None
+
+        async def scenario():
+            aconn = apostility.AsyncConnection(cur=MagicMock(), conn=conn)
+            with patch("postility.select_all_from_authors", side_effect=slow):
+                running = asyncio.ensure_future(apostility.select_all_from_authors(aconn))
+                queued = asyncio.ensure_future(apostility.select_all_from_authors(aconn))
+                await asyncio.sleep(0.05)
+                queued.cancel()
+                await running
+            return queued
+
+        assert run(scenario()).cancelled()
+        conn.cancel.assert_not_called()
+
+    def test_queued_call_cancelled_before_it_starts(self):
+        conn = MagicMock(closed=False)
+
+        async def scenario():
+            aconn = apostility.AsyncConnection(cur=MagicMock(), conn=conn)
+            task = asyncio.ensure_future(apostility.select_all_from_authors(aconn))
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        run(scenario())
+        conn.cancel.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# import_batches
+# ---------------------------------------------------------------------------
+
+
+class TestImportBatches:
+    def test_imports_overlap_the_next_fetch(self):
+        events = []
+
+        def slow_import(cur, conn, df, **kwargs):
+            events.append(("import start", len(df)))
+            time.sleep(0.05)
+            events.append(("import end", len(df)))
+            return cur, conn
+
+        async def batches():
+            for size in (1, 2):
+                events.append(("fetched", size))
+                yield pd.DataFrame({"title": ["t"] * size})
+                await asyncio.sleep(0.02)
+
+        async def scenario():
+            aconn = apostility.AsyncConnection(cur=MagicMock(), conn=MagicMock())
+            with patch("postility.importXML", side_effect=slow_import):
+                return await apostility.import_batches(aconn, batches(), bulk=True)
+
+        assert run(scenario()) == 2
+        assert events.index(("fetched", 2)) < events.index(("import end", 1))
+        assert events[-1] == ("import end", 2)
+
+    def test_accepts_plain_iterables(self):
+        imported = []
+
+        def record(cur, conn, df, **kwargs):
+            imported.append(len(df))
+            return cur, conn
+
+        async def scenario():
+            aconn = apostility.AsyncConnection(cur=MagicMock(), conn=MagicMock())
+            with patch("postility.importXML", side_effect=record):
+                return await apostility.import_batches(aconn, [pd.DataFrame({"a": [1]})] * 3)
+
+        assert run(scenario()) == 3
+        assert imported == [1, 1, 1]
+
+
+class TestSearchPapers:
+    def test_passes_search_arguments(self):
+        cur, conn = MagicMock(), MagicMock()
+        df = pd.DataFrame({"title": ["t"]})
+
+        async def scenario():
+            aconn = apostility.AsyncConnection(cur=cur, conn=conn)
+            with patch("postility.search_papers", return_value=((cur, conn), df)) as search:
+                result = await apostility.search_papers(aconn, "graphs", limit=5, fuzzy=True)
+            return search, result
+
+        search, result = run(scenario())
+        assert result is df
+        search.assert_called_once_with(cur, conn, "graphs", limit=5, offset=0, fuzzy=True)
+
+
+class TestFederatedQuery:
+    def test_runs_off_the_event_loop(self):
+        threads = []
+        merged = pd.DataFrame({"section": ["a"]})
+
+        def record(query, sections=None, **kwargs):
+            threads.append(threading.current_thread())
+            return merged
+
+        async def scenario():
+            with patch("postility.federated_query", side_effect=record):
+                return await apostility.federated_query("select_all_from_authors", ["a"])
+
+        assert run(scenario()) is merged
+        assert threads[0] is not threading.main_thread()
@@ -65,6 +65,32 @@ class TestConstructGraphFromDf:
         assert G.number_of_edges() == 0
 
 
+# ---------------------------------------------------------------------------
+# construct_graph_from_chunks
+# ---------------------------------------------------------------------------
+
+
+class TestConstructGraphFromChunks:
+    def test_matches_single_frame(self, edge_df):
+        chunks = [edge_df.iloc[:2], edge_df.iloc[2:]]
+        G = netility.construct_graph_from_chunks(chunks)
+        expected = netility.construct_graph_from_df(edge_df)
+        assert set(G.edges(data="weight")) == set(expected.edges(data="weight"))
+
+    def test_weights_accumulate_across_chunks(self, edge_df):
+        # A->B appears once in each chunk
+        G = netility.construct_graph_from_chunks([edge_df.iloc[:1], edge_df.iloc[3:]])
+        assert G["A"]["B"]["weight"] == 2
+
+    def test_undirected_returns_graph(self, edge_df):
+        G = netility.construct_graph_from_chunks([edge_df], directed=False)
+        assert not isinstance(G, nx.DiGraph)
+
+    def test_no_chunks_produces_empty_graph(self):
+        G = netility.construct_graph_from_chunks([])
+        assert G.number_of_nodes() == 0
+
+
 # ---------------------------------------------------------------------------
 # construct_static_layout
 # ---------------------------------------------------------------------------
@@ -0,0 +1,1600 @@
+"""
+Tests for citegres.postility — pure helpers that shape data for the database.
+All tests operate on in-memory DataFrames and buffers; no database or network access required.
+"""
+
+import json
+import struct
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import psycopg2.extensions
+import pytest
+
+import postility
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def staging_df():
+    """Mixed text / integer / date columns including NULL markers and COPY specials."""
+    return pd.DataFrame(
+        {
+            "title": ["plain", "tab\there", "back\\slash", "NULL", None],
+            "pdate": ["2020-01-02", "NULL", "1999-12-31", "2000-01-01", None],
+            "n": pd.array([1, None, 3, 4, 5], dtype="Int64"),
+        }
+    )
+
+
+# ---------------------------------------------------------------------------
+# dataframe_to_copy_text
+# ---------------------------------------------------------------------------
+
+
+class TestDataframeToCopyText:
+    def test_one_line_per_row(self, staging_df):
+        lines = postility.dataframe_to_copy_text(staging_df).getvalue().decode().splitlines()
+        assert len(lines) == len(staging_df)
+
+    def test_columns_tab_separated(self, staging_df):
+        first = postility.dataframe_to_copy_text(staging_df).getvalue().decode().splitlines()[0]
+        assert first == "plain\t2020-01-02\t1"
+
+    def test_null_markers_written_as_backslash_n(self, staging_df):
+        lines = postility.dataframe_to_copy_text(staging_df).getvalue().decode().splitlines()
+        assert lines[3].split("\t")[0] == "\\N"
+        assert lines[4].split("\t")[0] == "\\N"
+        assert lines[1].split("\t")[2] == "\\N"
+
+    def test_specials_escaped(self, staging_df):
+        lines = postility.dataframe_to_copy_text(staging_df).getvalue().decode().splitlines()
+        assert lines[1].split("\t")[0] == "tab\\there"
+        assert lines[2].split("\t")[0] == "back\\\\slash"
+
+    def test_utf8_encoded(self):
+        df = pd.DataFrame({"author": ["Gödel"]})
+        assert postility.dataframe_to_copy_text(df).getvalue() == "Gödel\n".encode()
+
+    def test_empty_df_produces_empty_buffer(self):
+        df = pd.DataFrame({"author": []})
+        assert postility.dataframe_to_copy_text(df).getvalue() == b""
+
+
+# ---------------------------------------------------------------------------
+# dataframe_to_copy_binary
+# ---------------------------------------------------------------------------
+
+
+class TestDataframeToCopyBinary:
+    TYPES = ["text", "date", "integer"]
+
+    def test_signature_and_trailer(self, staging_df):
+        data = postility.dataframe_to_copy_binary(staging_df, self.TYPES).getvalue()
+        assert data.startswith(b"PGCOPY\n\xff\r\n\x00")
+        assert data.endswith(struct.pack(">h", -1))
+
+    def test_first_tuple_fields(self, staging_df):
+        data = postility.dataframe_to_copy_binary(staging_df.head(1), self.TYPES).getvalue()
+        body = data[19:-2]
+        assert struct.unpack(">h", body[:2])[0] == 3
+        assert body[2:6] == struct.pack(">i", 5) and body[6:11] == b"plain"
+        # 2020-01-02 is 7306 days after the 2000-01-01 postgres epoch
+        assert body[11:19] == struct.pack(">ii", 4, 7306)
+        assert body[19:27] == struct.pack(">ii", 4, 1)
+
+    def test_nulls_have_negative_length(self, staging_df):
+        data = postility.dataframe_to_copy_binary(staging_df.iloc[[3]], self.TYPES).getvalue()
+        assert data[19 + 2 : 19 + 6] == struct.pack(">i", -1)
+
+    def test_unknown_type_raises(self, staging_df):
+        with pytest.raises(ValueError):
+            postility.dataframe_to_copy_binary(staging_df, ["text", "date", "jsonb"])
+
+
+# ---------------------------------------------------------------------------
+# copy_binary_to_arrays
+# ---------------------------------------------------------------------------
+
+
+class TestCopyBinaryToArrays:
+    def test_round_trips_integer_columns(self):
+        df = pd.DataFrame({"source": [1, 2, 2**31 - 1], "target": [3, 4, 2**40]})
+        buffer = postility.dataframe_to_copy_binary(df, ["integer", "bigint"]).getvalue()
+        source, target = postility.copy_binary_to_arrays(buffer, ["integer", "bigint"])
+        assert source.dtype == "int32" and target.dtype == "int64"
+        assert source.tolist() == [1, 2, 2**31 - 1]
+        assert target.tolist() == [3, 4, 2**40]
+
+    def test_empty_buffer_gives_empty_arrays(self):
+        buffer = postility.dataframe_to_copy_binary(
+            pd.DataFrame({"a": pd.Series([], dtype="int64")}), ["integer"]
+        ).getvalue()
+        (a,) = postility.copy_binary_to_arrays(buffer, ["integer"])
+        assert len(a) == 0
+
+    def test_nulls_raise(self):
+        df = pd.DataFrame({"a": pd.array([1, None, 3], dtype="Int64")})
+        buffer = postility.dataframe_to_copy_binary(df, ["integer"]).getvalue()
+        with pytest.raises(ValueError):
+            postility.copy_binary_to_arrays(buffer, ["integer"])
+
+    def test_variable_width_type_raises(self):
+        with pytest.raises(ValueError):
+            postility.copy_binary_to_arrays(b"", ["text"])
+
+
+# ---------------------------------------------------------------------------
+# transaction / savepoint
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def fake_conn():
+    conn = MagicMock(closed=False)
+    conn.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+    return conn
+
+
+class TestTransaction:
+    def test_commit_prior_deferred_inside_block(self, fake_conn):
+        cur = MagicMock()
+        with postility.transaction(cur, fake_conn):
+            postility.commit_prior(cur, fake_conn)
+            fake_conn.commit.assert_not_called()
+        fake_conn.commit.assert_called_once()
+
+    def test_exception_rolls_back_block(self, fake_conn):
+        cur = MagicMock()
+        with pytest.raises(RuntimeError), postility.transaction(cur, fake_conn):
+            raise RuntimeError("boom")
+        fake_conn.rollback.assert_called_once()
+        fake_conn.commit.assert_not_called()
+
+    def test_nested_block_joins_outer(self, fake_conn):
+        cur = MagicMock()
+        with postility.transaction(cur, fake_conn), postility.transaction(cur, fake_conn):
+            pass
+        fake_conn.commit.assert_called_once()
+
+    def test_commit_prior_commits_outside_block(self, fake_conn):
+        cur = MagicMock()
+        postility.commit_prior(cur, fake_conn)
+        fake_conn.commit.assert_called_once()
+
+
+class TestSavepoint:
+    def executed(self, cur):
+        return [c.args[0] for c in cur.execute.call_args_list]
+
+    def test_released_on_success(self, fake_conn):
+        cur = MagicMock()
+        with postility.savepoint(cur, fake_conn, "authors"):
+            pass
+        assert self.executed(cur) == ["SAVEPOINT authors;", "RELEASE SAVEPOINT authors;"]
+
+    def test_failed_transaction_rolls_back_to_savepoint(self, fake_conn):
+        cur = MagicMock()
+        with postility.transaction(cur, fake_conn) as rolled_back:
+            with postility.savepoint(cur, fake_conn, "citations"):
+                fake_conn.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INERROR
+            assert rolled_back == ["citations"]
+        assert "ROLLBACK TO SAVEPOINT citations;" in self.executed(cur)
+
+    def test_exception_rolls_back_and_reraises(self, fake_conn):
+        cur = MagicMock()
+        with pytest.raises(ValueError), postility.savepoint(cur, fake_conn, "papers"):
+            raise ValueError("bad row")
+        assert self.executed(cur)[-1] == "ROLLBACK TO SAVEPOINT papers;"
+
+
+# ---------------------------------------------------------------------------
+# connection pools & reconnects
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def pool():
+    pool = MagicMock(maxconn=2, closed=False)
+    with (
+        patch("postility.get_pool", return_value=pool) as get_pool,
+        patch.dict(vars(postility)["__pools"], {"networking": pool}),
+        patch("postility.POOL_HEALTH_CHECK", False),
+    ):
+        pool.get_pool = get_pool
+        yield pool
+
+
+class TestConnectionPools:
+    def test_section_pool_settings_split_from_connect_params(self):
+        section = {"dbname": "x", "pool_minconn": "2", "pool_maxconn": "8"}
+        with patch("postility.config", return_value=section):
+            params, settings = vars(postility)["__connect_params"]()
+        assert params == {"dbname": "x"}
+        assert settings == {"pool_minconn": 2, "pool_maxconn": 8}
+
+    def test_closed_connection_discarded_on_checkout(self, pool):
+        broken, healthy = MagicMock(closed=True), MagicMock(closed=False)
+        pool.getconn.side_effect = [broken, healthy]
+        _, conn = postility.checkout_connection(section="networking")
+        assert conn is healthy
+        pool.putconn.assert_called_once_with(broken, close=True)
+
+    def test_killed_connection_rolled_back_into_its_pool(self, pool, fake_conn):
+        pool.getconn.return_value = fake_conn
+        cur, conn = postility.checkout_connection(section="networking")
+        postility.kill_connection(cur, conn)
+        fake_conn.rollback.assert_called_once()
+        fake_conn.close.assert_not_called()
+        pool.putconn.assert_called_once_with(fake_conn, close=False)
+
+    def test_reset_reconnects_pooled_connection_to_its_section(self, pool, fake_conn):
+        fresh = MagicMock(closed=False)
+        pool.getconn.side_effect = [fake_conn, fresh]
+        with patch("postility.POOLING", True):
+            cur, conn = postility.checkout_connection(section="networking")
+            _, conn = postility.reset_connection(cur, conn)
+        assert conn is fresh
+        assert [c.kwargs["section"] for c in pool.get_pool.call_args_list] == ["networking"] * 2
+
+    def test_reset_reconnects_plain_connection_to_its_section(self):
+        with (
+            patch("postility.config", return_value={"dbname": "x"}) as config,
+            patch("psycopg2.connect", side_effect=lambda **params: MagicMock()),
+        ):
+            cur, conn = postility.create_connection(section="networking")
+            postility.reset_connection(cur, conn)
+        assert [c.kwargs["section"] for c in config.call_args_list] == ["networking"] * 2
+
+
+# ---------------------------------------------------------------------------
+# statement timeouts / cancellation
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def timeout_cur():
+    cur = MagicMock()
+    cur.fetchone.return_value = ("0",)
+    return cur
+
+
+class TestStatementTimeout:
+    def settings(self, cur):
+        return [c.args[1] for c in cur.execute.call_args_list if "set_config" in c.args[0]]
+
+    def test_sets_and_restores_session_timeout(self, timeout_cur, fake_conn):
+        fake_conn.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        with postility.statement_timeout(timeout_cur, fake_conn, 5000):
+            assert self.settings(timeout_cur) == [("5000", False)]
+        assert self.settings(timeout_cur) == [("5000", False), ("0", False)]
+        assert fake_conn.commit.call_count == 2
+
+    def test_pending_work_is_not_committed(self, timeout_cur, fake_conn):
+        with postility.statement_timeout(timeout_cur, fake_conn, 5000):
+            fake_conn.commit.assert_not_called()
+            assert self.settings(timeout_cur) == [("5000", True)]
+        assert self.settings(timeout_cur) == [("5000", True), ("0", True)]
+        fake_conn.commit.assert_not_called()
+
+    def test_local_timeout_ends_with_committed_pending_work(self, timeout_cur, fake_conn):
+        with postility.statement_timeout(timeout_cur, fake_conn, 5000):
+            fake_conn.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        assert self.settings(timeout_cur) == [("5000", True)]
+
+    def test_local_to_an_enclosing_transaction_block(self, timeout_cur, fake_conn):
+        with (
+            postility.transaction(timeout_cur, fake_conn),
+            postility.statement_timeout(timeout_cur, fake_conn, "30s"),
+        ):
+            fake_conn.commit.assert_not_called()
+        assert self.settings(timeout_cur) == [("30s", True), ("0", True)]
+
+    def test_failed_statement_rolled_back_before_restoring(self, timeout_cur, fake_conn):
+        fake_conn.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        with postility.statement_timeout(timeout_cur, fake_conn, 100):
+            fake_conn.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INERROR
+        fake_conn.rollback.assert_called_once()
+        assert self.settings(timeout_cur)[-1] == ("0", False)
+
+    def test_section_timeout_becomes_connection_option(self):
+        with (
+            patch("postility.config", return_value={"dbname": "x", "statement_timeout": "2s"}),
+            patch("psycopg2.connect") as connect,
+        ):
+            postility.create_connection()
+        assert connect.call_args.kwargs == {"dbname": "x", "options": "-c statement_timeout=2s"}
+
+    def test_global_timeout_applies_without_section_override(self):
+        with (
+            patch("postility.STATEMENT_TIMEOUT", 1500),
+            patch("postility.config", return_value={"dbname": "x"}),
+            patch("psycopg2.connect") as connect,
+        ):
+            postility.create_connection()
+        assert connect.call_args.kwargs["options"] == "-c statement_timeout=1500"
+
+
+class TestCancelHandle:
+    def test_cancels_from_another_thread(self):
+        conn = MagicMock(closed=False)
+        handle = postility.CancelHandle(conn)
+        canceller = threading.Thread(target=handle.cancel)
+        canceller.start()
+        canceller.join()
+        conn.cancel.assert_called_once()
+        assert handle.cancelled
+
+    def test_closed_connection_is_left_alone(self):
+        conn = MagicMock(closed=True)
+        handle = postility.CancelHandle(conn)
+        assert handle.cancel() is False
+        conn.cancel.assert_not_called()
+        assert not handle.cancelled
+
+
+# ---------------------------------------------------------------------------
+# migrate
+# ---------------------------------------------------------------------------
+
+
+class TestMigrate:
+    def recorded_versions(self, cur):
+        return [
+            c.args[1][0]
+            for c in cur.execute.call_args_list
+            if "INSERT INTO schema_version" in c.args[0]
+        ]
+
+    def test_applies_pending_migrations_in_order(self, fake_conn):
+        cur = MagicMock()
+        cur.fetchone.return_value = (0,)
+        postility.migrate(cur, fake_conn)
+        assert self.recorded_versions(cur) == list(range(1, postility.SCHEMA_VERSION + 1))
+
+    def test_applied_migrations_skipped(self, fake_conn):
+        cur = MagicMock()
+        cur.fetchone.return_value = (postility.SCHEMA_VERSION,)
+        postility.migrate(cur, fake_conn)
+        assert self.recorded_versions(cur) == []
+
+    def test_target_zero_applies_nothing(self, fake_conn):
+        cur = MagicMock()
+        cur.fetchone.return_value = (0,)
+        postility.migrate(cur, fake_conn, target=0)
+        assert self.recorded_versions(cur) == []
+
+    def test_failed_migration_rolled_back(self, fake_conn):
+        cur = MagicMock()
+        cur.fetchone.return_value = (0,)
+
+        def execute(sql, *args):
+            if sql.startswith("CREATE INDEX"):
+                raise RuntimeError("boom")
+
+        cur.execute.side_effect = execute
+        postility.migrate(cur, fake_conn)
+        fake_conn.rollback.assert_called_once()
+
+
+class TestCheckSchemaVersion:
+    @pytest.fixture(autouse=True)
+    def unchecked(self):
+        with patch("postility.__schema_checked", set()):
+            yield
+
+    def check(self, fake_conn, *fetched, migrate_on_connect=False):
+        cur = MagicMock()
+        cur.fetchone.side_effect = fetched
+        with (
+            patch("postility.MIGRATE_ON_CONNECT", migrate_on_connect),
+            patch("postility.migrate", return_value=(cur, fake_conn)) as migrate,
+        ):
+            postility.check_schema_version(cur, fake_conn)
+        return migrate
+
+    def test_behind_schema_warns_once_per_database(self, fake_conn, caplog):
+        self.check(fake_conn, (True, True), (3,))
+        self.check(fake_conn)
+        warnings = [r for r in caplog.records if r.levelname == "WARNING"]
+        assert len(warnings) == 1
+        assert f"schema version 3 is behind {postility.SCHEMA_VERSION}" in warnings[0].message
+
+    def test_latest_schema_is_silent(self, fake_conn, caplog):
+        self.check(fake_conn, (True, True), (postility.SCHEMA_VERSION,))
+        assert not [r for r in caplog.records if r.levelname == "WARNING"]
+
+    def test_behind_schema_migrated_when_asked(self, fake_conn):
+        migrate = self.check(fake_conn, (False, True), migrate_on_connect=True)
+        migrate.assert_called_once()
+
+    def test_unbuilt_database_never_migrated(self, fake_conn):
+        migrate = self.check(fake_conn, (False, False), migrate_on_connect=True)
+        migrate.assert_not_called()
+
+    def test_checked_on_connect(self):
+        with (
+            patch("postility.config", return_value={"dbname": "x"}),
+            patch("psycopg2.connect"),
+            patch(
+                "postility.check_schema_version", side_effect=lambda cur, conn: (cur, conn)
+            ) as check,
+        ):
+            postility.create_connection(section="networking")
+        check.assert_called_once()
+
+
+# ---------------------------------------------------------------------------
+# statement instrumentation
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def clean_stats():
+    postility.reset_statement_stats()
+    yield
+    postility.reset_statement_stats()
+
+
+class TestStatementStats:
+    def test_str_template_is_statement(self):
+        assert postility.statement_template("SELECT %s;") == "SELECT %s;"
+
+    def test_inlined_values_collapsed(self):
+        sql = b"INSERT INTO authors (author) VALUES ('a'),('b') ON CONFLICT DO NOTHING"
+        assert postility.statement_template(sql) == "INSERT INTO authors (author) VALUES (...)"
+
+    def test_counts_rows_and_errors(self, clean_stats):
+        postility.record_statement("SELECT 1;", rows=3, seconds=0.002)
+        postility.record_statement("SELECT 1;", rows=-1)
+        postility.record_statement("SELECT 1;", error=True)
+        (record,) = postility.statement_stats()
+        assert (record["calls"], record["errors"], record["rows"], record["timed"]) == (3, 1, 3, 1)
+
+    def test_histogram_buckets_sampled_latency(self, clean_stats):
+        for seconds in (0.00005, 0.002, 0.002, 10.0):
+            postility.record_statement("SELECT 1;", seconds=seconds)
+        (record,) = postility.statement_stats()
+        assert sum(record["histogram"]) == 4
+        assert record["histogram"][0] == 1 and record["histogram"][-1] == 1
+        assert record["p50_ms"] == pytest.approx(5.0)
+        assert record["max_ms"] == pytest.approx(10_000.0)
+
+    def test_overflow_quantiles_report_max(self, clean_stats):
+        for seconds in (0.002, 8.0, 12.0):
+            postility.record_statement("SELECT 1;", seconds=seconds)
+        (record,) = postility.statement_stats()
+        assert record["p50_ms"] == pytest.approx(12_000.0)
+        assert record["p95_ms"] == pytest.approx(12_000.0)
+
+    def test_json_dump_round_trips(self, clean_stats):
+        postility.record_statement("SELECT\n    1;", seconds=0.001)
+        summary = json.loads(postility.dump_statement_stats(fmt="json"))
+        assert summary["statements"][0]["statement"] == "SELECT 1;"
+
+    def test_session_resets_stats(self, clean_stats):
+        postility.record_statement("SELECT 1;")
+        with postility.statement_session():
+            assert postility.statement_stats() == []
+
+
+# ---------------------------------------------------------------------------
+# openalex works
+# ---------------------------------------------------------------------------
+
+
+class TestOpenalexWorks:
+    def test_parses_urls_and_bare_ids(self):
+        assert postility.openalex_work("https://openalex.org/W2741809807") == 2741809807
+        assert postility.openalex_work("W7") == 7
+        assert postility.openalex_url(7) == "https://openalex.org/W7"
+
+    def test_unparsable_values_are_missing(self):
+        works = postility.openalex_works(["https://openalex.org/W1", "NULL", None, "A5"])
+        assert works.tolist()[0] == 1
+        assert works.isna().tolist() == [False, True, True, True]
+        assert postility.openalex_work("NULL") is None
+
+    @pytest.mark.parametrize(
+        "reader, kwargs",
+        [
+            ("select_all_from_openalex", {}),
+            ("select_openalex_url_from_openalex", {}),
+            ("query_citationlist_full_resolve_openalex", {"materialized": False}),
+            ("select_top_cited", {"materialized": False}),
+            ("query_citation_neighborhood", {"seed": "W1"}),
+            ("refresh_resolved_citations", {}),
+            ("refresh_node_stats", {}),
+        ],
+    )
+    def test_urls_rebuilt_from_prefix_parameter(self, reader, kwargs):
+        cur = MagicMock()
+        cur.fetchall.return_value = []
+        getattr(postility, reader)(cur, MagicMock(), **kwargs)
+        rebuilt = [c for c in cur.execute.call_args_list if "|| " in c.args[0]]
+        assert rebuilt
+        for c in rebuilt:
+            assert "openalex.org" not in c.args[0]
+            assert c.args[1]["openalex_url_prefix"] == postility.OPENALEX_URL_PREFIX
+
+    def test_url_page_binds_prefix_ahead_of_filters(self):
+        cur = page_of()
+        postility.select_page(cur, MagicMock(), "openalex", filters={"id": 3}, limit=5)
+        query, args = cur.execute.call_args.args
+        assert "openalex.org" not in query
+        assert args == [postility.OPENALEX_URL_PREFIX, 3, 5]
+
+
+# ---------------------------------------------------------------------------
+# record_fingerprints
+# ---------------------------------------------------------------------------
+
+
+class TestRecordFingerprints:
+    def records(self, **changes):
+        record = {
+            "title": "A paper",
+            "key": "journals/x/A1",
+            "openalex_id": "https://openalex.org/W1",
+            "referenced_works": ["https://openalex.org/W2", "https://openalex.org/W3"],
+            "authors": ["Ada", "Alan"],
+            "concepts": ["graphs", "logic"],
+            "doi": "10.1/a",
+        }
+        record.update(changes)
+        return pd.DataFrame([record])
+
+    def fingerprint(self, **changes):
+        return postility.record_fingerprints(self.records(**changes)).fingerprint[0]
+
+    def test_keyed_by_title(self):
+        fingerprints = postility.record_fingerprints(self.records())
+        assert fingerprints.columns.tolist() == ["title", "fingerprint"]
+        assert fingerprints.title[0] == "A paper"
+
+    def test_reference_order_does_not_matter(self):
+        reordered = ["https://openalex.org/W3", "https://openalex.org/W2"]
+        assert self.fingerprint() == self.fingerprint(referenced_works=reordered)
+
+    def test_author_order_matters(self):
+        assert self.fingerprint() != self.fingerprint(authors=["Alan", "Ada"])
+
+    def test_changed_references_change_fingerprint(self):
+        assert self.fingerprint() != self.fingerprint(referenced_works=["https://openalex.org/W2"])
+
+    def test_insert_only_fields_do_not_change_fingerprint(self):
+        assert self.fingerprint() == self.fingerprint(doi="10.1/b", key="journals/x/A2")
+
+    def test_only_titles_in_papers_are_recorded(self):
+        cur = MagicMock()
+        postility.insert_fingerprints(cur, MagicMock(), self.records())
+        insert = next(c.args[0] for c in cur.execute.call_args_list if "INSERT" in c.args[0])
+        assert "JOIN papers ON papers.title = stage.title" in insert
+
+    def test_rolled_back_stage_skips_fingerprints(self, fake_conn):
+        def failing(cur, conn, **kwargs):
+            conn.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INERROR
+            return cur, conn
+
+        cur = MagicMock()
+        passing = MagicMock(side_effect=lambda cur, conn, **kwargs: (cur, conn))
+        changed = ((cur, fake_conn), self.records())
+        with (
+            patch("postility.select_changed_records", return_value=changed),
+            patch.multiple(
+                "postility",
+                copy_authors=failing,
+                copy_concepts=passing,
+                copy_openalexs=passing,
+                copy_papers_raw=passing,
+                insert_supports=passing,
+                insert_paper_concepts=passing,
+                insert_citations=passing,
+                refresh_paper_search=passing,
+                refresh_resolved_citations=passing,
+            ),
+            patch("postility.insert_fingerprints") as fingerprints,
+        ):
+            postility.importXML(
+                cur, fake_conn, self.records(), bulk=True, transactional=True, delta=True
+            )
+        assert passing.call_count == 8
+        fingerprints.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# factorize_records
+# ---------------------------------------------------------------------------
+
+
+class TestFactorizeRecords:
+    def records(self):
+        return pd.DataFrame(
+            {
+                "title": ["A", "B", "NULL"],
+                "authors": [["Ada", "Alan"], "NULL", ["Alan"]],
+                "concepts": [["graphs", "logic"], ["logic", "NULL"], "NULL"],
+                "doi": ["10.1/a", "NULL", "10.1/c"],
+                "publication_date": ["2020-01-01", "NULL", "NULL"],
+                "publisher": ["P", "P", "NULL"],
+                "type": ["T", "NULL", "T"],
+                "venue": ["V", "W", "V"],
+                "openalex_id": [
+                    "https://openalex.org/W1",
+                    "https://openalex.org/W2",
+                    "NULL",
+                ],
+                "referenced_works": [
+                    [
+                        "https://openalex.org/W2",
+                        "https://openalex.org/W3",
+                        "https://openalex.org/W2",
+                    ],
+                    ["https://openalex.org/W1", "NULL"],
+                    ["https://openalex.org/W9"],
+                ],
+            },
+            index=[7, 8, 9],
+        )
+
+    def test_dimensions_hold_every_distinct_value(self):
+        uniques, _ = postility.factorize_records(self.records())
+        assert list(uniques["authors"]) == ["Ada", "Alan"]
+        assert list(uniques["concepts"]) == ["graphs", "logic"]
+        assert list(uniques["publishers"]) == ["P"]
+        assert list(uniques["venues"]) == ["V", "W"]
+        assert list(uniques["openalex"]) == [1, 2, 3, 9]
+        assert list(uniques["papers"]) == ["A", "B"]
+
+    def test_papers_need_a_title_and_first_author(self):
+        uniques, facts = postility.factorize_records(self.records())
+        papers = facts["papers"]
+        assert [uniques["papers"][code] for code in papers.title] == ["A"]
+        assert uniques["authors"][papers.author[0]] == "Ada"
+        assert papers.openalex[0] == 0 and papers.doi[0] == "10.1/a"
+
+    def test_links_skip_the_first_author_and_concept(self):
+        _, facts = postility.factorize_records(self.records())
+        assert facts["supports"].values.tolist() == [[0, 1]]
+        assert facts["paper_concepts"].values.tolist() == [[0, 1]]
+
+    def test_citations_are_distinct_and_complete(self):
+        uniques, facts = postility.factorize_records(self.records())
+        works = uniques["openalex"]
+        cited = [(works[s], works[t]) for s, t in facts["citations"].values.tolist()]
+        assert cited == [(1, 2), (1, 3), (2, 1)]
+
+
+# ---------------------------------------------------------------------------
+# query_citation_neighborhood
+# ---------------------------------------------------------------------------
+
+
+class TestQueryCitationNeighborhood:
+    def query(self, **kwargs):
+        cur = MagicMock()
+        cur.fetchall.return_value = []
+        (_, _), hood = postility.query_citation_neighborhood(cur, MagicMock(), **kwargs)
+        (sql, params), _ = cur.execute.call_args
+        return sql, params, hood
+
+    def test_forward_steps_follow_references(self):
+        sql, params, hood = self.query(seed="https://openalex.org/W42", depth=3, fanout=10)
+        assert "WHERE citations.source = hood.node" in sql
+        assert "WHERE citations.target = hood.node" not in sql
+        assert params == {
+            "openalex_url_prefix": postility.OPENALEX_URL_PREFIX,
+            "seed": 42,
+            "depth": 3,
+            "fanout": 10,
+            "max_edges": None,
+        }
+        assert hood.columns.tolist() == ["source", "target", "depth"]
+
+    def test_both_directions_union_steps(self):
+        sql, _, _ = self.query(seed="https://openalex.org/W42", direction="both")
+        assert "WHERE citations.source = hood.node" in sql
+        assert "WHERE citations.target = hood.node" in sql
+
+    def test_author_seed_keeps_name(self):
+        sql, params, _ = self.query(seed="Ada", seed_type="author", resolve="author")
+        assert "WHERE authors.author = %(seed)s" in sql
+        assert params["seed"] == "Ada"
+
+    def test_author_seed_includes_first_authored_papers(self):
+        sql, _, _ = self.query(seed="Ada", seed_type="author")
+        assert "JOIN papers ON papers.author = authors.id" in sql
+        assert "JOIN supports ON supports.author = authors.id" in sql
+
+    def test_unknown_direction_raises(self):
+        with pytest.raises(ValueError):
+            self.query(seed="https://openalex.org/W1", direction="sideways")
+
+
+# ---------------------------------------------------------------------------
+# node stats
+# ---------------------------------------------------------------------------
+
+
+class TestNodeStats:
+    def test_top_cited_reads_node_stats(self):
+        cur = MagicMock()
+        cur.fetchall.return_value = [("Ada", 3, 1, 1)]
+        (_, _), top = postility.select_top_cited(cur, MagicMock(), kind="author", n=5)
+        (sql, params), _ = cur.execute.call_args
+        assert "FROM node_stats" in sql and params == ("author", 5)
+        assert top.columns.tolist() == ["author", "in_citations", "out_citations", "rank"]
+
+    def test_live_top_cited_aggregates_citations(self):
+        cur = MagicMock()
+        cur.fetchall.return_value = []
+        postility.select_top_cited(cur, MagicMock(), kind="paper", materialized=False)
+        (sql, _), _ = cur.execute.call_args
+        assert "FROM node_stats" not in sql and "GROUP BY target" in sql
+
+    def test_refresh_replaces_every_kind(self):
+        cur = MagicMock()
+        postility.refresh_node_stats(cur, MagicMock())
+        executed = [c.args[0] for c in cur.execute.call_args_list]
+        assert executed[0].strip() == "DELETE FROM node_stats;"
+        assert len(executed) == 1 + len(postility.NODE_STATS_KINDS)
+
+    def test_unknown_kind_raises(self):
+        with pytest.raises(ValueError):
+            postility.select_top_cited(MagicMock(), MagicMock(), kind="venue")
+
+    def test_authors_credited_for_first_authored_papers(self):
+        cur = MagicMock()
+        postility.refresh_node_stats(cur, MagicMock())
+        author = next(c.args[0] for c in cur.execute.call_args_list if "'author'" in c.args[0])
+        assert "SELECT id AS paper, author FROM papers" in author
+        assert "SELECT paper, author FROM supports" in author
+
+    @pytest.mark.parametrize("node_stats, recounts", [(False, 0), (True, 1)])
+    def test_import_recounts_only_when_asked(self, node_stats, recounts):
+        stage = MagicMock(side_effect=lambda cur, conn, **kwargs: (cur, conn))
+        stages = {
+            name: stage
+            for name in (
+                "copy_authors",
+                "copy_concepts",
+                "copy_openalexs",
+                "copy_papers_raw",
+                "insert_supports",
+                "insert_paper_concepts",
+                "insert_citations",
+                "refresh_paper_search",
+                "refresh_resolved_citations",
+            )
+        }
+        with (
+            patch.multiple("postility", **stages),
+            patch("postility.refresh_node_stats", side_effect=stage) as refresh,
+        ):
+            postility.importXML(
+                MagicMock(),
+                MagicMock(),
+                pd.DataFrame({"title": ["t"], "openalex_id": [None]}),
+                bulk=True,
+                node_stats=node_stats,
+            )
+        assert refresh.call_count == recounts
+
+
+# ---------------------------------------------------------------------------
+# search_papers & refresh_paper_search
+# ---------------------------------------------------------------------------
+
+
+class TestPaperSearch:
+    def test_search_uses_the_tsvector_index(self):
+        cur = MagicMock()
+        cur.fetchall.return_value = [("A Title", "10.1/x", None, 0.5)]
+        (_, _), results = postility.search_papers(cur, MagicMock(), "graph -neural", limit=10)
+        (sql, params), _ = cur.execute.call_args
+        assert "papers.search @@ query" in sql and "websearch_to_tsquery" in sql
+        assert params == {"query": "graph -neural", "limit": 10, "offset": 0}
+        assert results.columns.tolist() == ["title", "doi", "pdate", "rank"]
+
+    def test_fuzzy_search_uses_trigram_similarity(self):
+        cur = MagicMock()
+        cur.fetchall.return_value = []
+        postility.search_papers(cur, MagicMock(), "grpah", fuzzy=True)
+        (sql, _), _ = cur.execute.call_args
+        assert "similarity(papers.title" in sql and "papers.search" not in sql
+
+    def test_failed_search_returns_sentinel(self):
+        cur = MagicMock()
+        cur.execute.side_effect = Exception("no pg_trgm")
+        (_, _), results = postility.search_papers(cur, MagicMock(), "x", fuzzy=True)
+        assert results == postility.ERROR_FAILED_TO_EXECUTE
+
+    def test_refresh_indexes_unindexed_papers(self):
+        cur = MagicMock()
+        postility.refresh_paper_search(cur, MagicMock())
+        assert "WHERE papers.search IS NULL" in cur.execute.call_args.args[0]
+        cur.copy_expert.assert_not_called()
+
+    @pytest.mark.parametrize("kwargs", [{}, {"rebuild": True}, {"titles": ["A paper"]}])
+    def test_concepts_indexed_in_a_fixed_order(self, kwargs, fake_conn):
+        cur = MagicMock()
+        postility.refresh_paper_search(cur, fake_conn, **kwargs)
+        document = next(c.args[0] for c in cur.execute.call_args_list if "string_agg" in c.args[0])
+        assert "string_agg(concepts.concept, ' ' ORDER BY concepts.concept)" in document
+
+    def test_refresh_titles_stages_them(self, fake_conn):
+        cur = MagicMock()
+        postility.refresh_paper_search(cur, fake_conn, titles=["a", "a", "b"])
+        assert "FROM search_stage" in cur.execute.call_args.args[0]
+        cur.copy_expert.assert_called_once()
+
+    def test_rebuild_reindexes_every_paper(self):
+        cur = MagicMock()
+        postility.refresh_paper_search(cur, MagicMock(), titles=["a"], rebuild=True)
+        sql = cur.execute.call_args.args[0]
+        assert "search_stage" not in sql and "IS NULL" not in sql
+
+
+# ---------------------------------------------------------------------------
+# select_page
+# ---------------------------------------------------------------------------
+
+
+def page_of(*rows):
+    cur = MagicMock()
+    cur.fetchall.return_value = list(rows)
+    return cur
+
+
+class TestSelectPage:
+    def test_first_page_seeks_nothing(self):
+        cur = page_of((1, "a"), (2, "b"))
+        (_, _), (page, after) = postility.select_page(cur, MagicMock(), "authors", limit=2)
+        query, args = cur.execute.call_args.args
+        assert "WHERE TRUE" in query and "ORDER BY authors.id\n" in query
+        assert args == [2]
+        assert page.author.tolist() == ["a", "b"]
+        assert after == (2,)
+
+    def test_resumes_after_sort_columns_then_key(self):
+        cur = page_of((5, 9, "paper", "zed"))
+        (_, _), (page, after) = postility.select_page(
+            cur, MagicMock(), "supports_resolved", after=(8, 4), limit=1, sort="author_id"
+        )
+        query, args = cur.execute.call_args.args
+        assert "(S.author, S.paper) > (%s, %s)" in query
+        assert "ORDER BY S.author, S.paper\n" in query
+        assert args == [8, 4, 1]
+        assert page.author.tolist() == ["zed"]
+        assert after == (9, 5)
+
+    @pytest.mark.parametrize("relation", postility.PAGE_RELATIONS)
+    def test_never_seeks_on_a_subquery(self, relation):
+        cur = page_of()
+        sortable = vars(postility)["__pages"][relation]["sortable"]
+        keyset = postility.page_keyset(relation, sort=sortable)
+        postility.select_page(cur, MagicMock(), relation, after=(0,) * len(keyset), sort=sortable)
+        query, _ = cur.execute.call_args.args
+        seek_and_order = query.split("\nWHERE ", 1)[1]
+        assert "(SELECT" not in seek_and_order
+
+    def test_descending_flips_seek_and_order(self):
+        cur = page_of()
+        postility.select_page(cur, MagicMock(), "citations", after=(3, 7), descending=True)
+        query, _ = cur.execute.call_args.args
+        assert "(citations.source, citations.target) < (%s, %s)" in query
+        assert "ORDER BY citations.source DESC, citations.target DESC" in query
+
+    def test_short_page_ends_paging(self):
+        cur = page_of((1, "a"))
+        (_, _), (_, after) = postility.select_page(cur, MagicMock(), "authors", limit=2)
+        assert after is None
+
+    def test_filters_match_values_and_lists(self):
+        cur = page_of()
+        postility.select_page(
+            cur,
+            MagicMock(),
+            "paper_concepts_resolved",
+            filters={"concept": ["x", "y"], "paper_id": 4},
+        )
+        query, args = cur.execute.call_args.args
+        assert "PC.concept) = ANY(%s) AND PC.paper = %s" in query
+        assert args == [["x", "y"], 4, postility.PAGE_SIZE]
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"relation": "nope"},
+            {"relation": "openalex", "sort": "openalex_url"},
+            {"relation": "supports_resolved", "sort": "author"},
+            {"relation": "paper_concepts_resolved", "sort": "concept"},
+            {"relation": "authors", "filters": {"name": "a"}},
+            {"relation": "citations", "after": (1,)},
+        ],
+    )
+    def test_rejects_invalid_arguments(self, kwargs):
+        cur = MagicMock()
+        with pytest.raises(ValueError):
+            postility.select_page(cur, MagicMock(), **kwargs)
+        cur.execute.assert_not_called()
+
+    def test_failed_query_returns_error_sentinel(self):
+        cur = MagicMock()
+        cur.execute.side_effect = psycopg2.OperationalError("gone")
+        (_, _), (page, after) = postility.select_page(cur, MagicMock(), "authors")
+        assert page == postility.ERROR_FAILED_TO_EXECUTE
+        assert after is None
+
+
+# ---------------------------------------------------------------------------
+# stream_query
+# ---------------------------------------------------------------------------
+
+
+class TestStreamQuery:
+    def stream(self, fake_conn, *chunks):
+        fake_conn.cursor.return_value.fetchmany.side_effect = [*chunks, []]
+        return postility.stream_query(
+            MagicMock(), fake_conn, "SELECT 1;", columns=["n"], params={"n": 1}
+        )
+
+    def drain(self, stream):
+        chunks = []
+        while True:
+            try:
+                chunks.append(next(stream))
+            except StopIteration as stop:
+                return chunks, stop.value
+
+    def test_chunks_then_returns_committed_pair(self, fake_conn):
+        chunks, (_, conn) = self.drain(self.stream(fake_conn, [(1,), (2,)], [(3,)]))
+        assert [chunk.n.tolist() for chunk in chunks] == [[1, 2], [3]]
+        assert conn is fake_conn
+        fake_conn.cursor.return_value.execute.assert_called_once_with("SELECT 1;", {"n": 1})
+        fake_conn.commit.assert_called_once()
+
+    def test_failed_commit_returns_reset_pair(self, fake_conn):
+        fresh = (MagicMock(), MagicMock())
+        fake_conn.commit.side_effect = psycopg2.OperationalError("gone")
+        with patch("postility.reset_connection", return_value=fresh):
+            _, pair = self.drain(self.stream(fake_conn, [(1,)]))
+        assert pair == fresh
+
+
+# ---------------------------------------------------------------------------
+# import_pipeline
+# ---------------------------------------------------------------------------
+
+
+class TestImportPipeline:
+    def test_imports_every_batch_in_order(self):
+        imported = []
+
+        def record(cur, conn, df, **kwargs):
+            imported.append((df.title.tolist(), kwargs))
+            return cur, conn
+
+        batches = (pd.DataFrame({"title": [f"t{i}"]}) for i in range(4))
+        with patch("postility.importXML", side_effect=record):
+            postility.import_pipeline(MagicMock(), MagicMock(), batches, queue_size=1, bulk=True)
+        assert [titles for titles, _ in imported] == [["t0"], ["t1"], ["t2"], ["t3"]]
+        assert all(kwargs == {"bulk": True} for _, kwargs in imported)
+
+    def test_producer_runs_ahead_of_the_importer(self):
+        events = []
+
+        def batches():
+            for i in range(3):
+                events.append(("produced", i))
+                yield pd.DataFrame({"title": [i]})
+
+        def slow_import(cur, conn, df, **kwargs):
+            time.sleep(0.05)
+            events.append(("imported", df.title[0]))
+            return cur, conn
+
+        with patch("postility.importXML", side_effect=slow_import):
+            postility.import_pipeline(MagicMock(), MagicMock(), batches(), queue_size=2)
+        assert events.index(("produced", 2)) < events.index(("imported", 1))
+
+    def test_failing_producer_keeps_imported_batches(self):
+        imported = []
+
+        def batches():
+            yield pd.DataFrame({"title": ["t0"]})
+            raise RuntimeError("scrape failed")
+
+        def record(cur, conn, df, **kwargs):
+            imported.append(len(df))
+            return cur, conn
+
+        with patch("postility.importXML", side_effect=record):
+            postility.import_pipeline(MagicMock(), MagicMock(), batches())
+        assert imported == [1]
+
+    def test_node_stats_recounted_once_after_the_last_batch(self):
+        calls = []
+
+        def record(cur, conn, df, **kwargs):
+            calls.append("import")
+            return cur, conn
+
+        def recount(cur, conn):
+            calls.append("recount")
+            return cur, conn
+
+        batches = (pd.DataFrame({"title": [f"t{i}"]}) for i in range(3))
+        with (
+            patch("postility.importXML", side_effect=record),
+            patch("postility.refresh_node_stats", side_effect=recount),
+        ):
+            postility.import_pipeline(MagicMock(), MagicMock(), batches)
+        assert calls == ["import", "import", "import", "recount"]
+
+    def test_failing_import_stops_the_producer(self):
+        produced = []
+
+        def batches():
+            for i in range(100):
+                produced.append(i)
+                yield pd.DataFrame({"title": [i]})
+
+        with (
+            patch("postility.importXML", side_effect=RuntimeError("db down")),
+            pytest.raises(RuntimeError),
+        ):
+            postility.import_pipeline(MagicMock(), MagicMock(), batches(), queue_size=1)
+        assert len(produced) < 100
+
+
+# ---------------------------------------------------------------------------
+# federated_query
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def sections():
+    """Connections that remember their section; one reader result per section."""
+    with (
+        patch("postility.create_connection", side_effect=lambda section: (section, section)),
+        patch("postility.kill_connection") as kill,
+    ):
+        yield kill
+
+
+def edges_by_section(results):
+    def reader(cur, conn):
+        result = results[conn]
+        if isinstance(result, Exception):
+            raise result
+        return (cur, conn), result
+
+    return reader
+
+
+class TestFederatedQuery:
+    def test_merges_and_dedupes_in_section_order(self, sections):
+        reader = edges_by_section(
+            {
+                "a": pd.DataFrame({"source": ["x", "y"], "target": ["y", "z"]}),
+                "b": pd.DataFrame({"source": ["y", "z"], "target": ["z", "x"]}),
+            }
+        )
+        merged = postility.federated_query(reader, sections=["a", "b"])
+        assert merged.values.tolist() == [["x", "y", "a"], ["y", "z", "a"], ["z", "x", "b"]]
+        assert sections.call_count == 2
+
+    def test_keeps_duplicates_without_dedupe(self, sections):
+        edges = pd.DataFrame({"source": ["x"], "target": ["y"]})
+        reader = edges_by_section({"a": edges, "b": edges})
+        merged = postility.federated_query(reader, sections=["a", "b"], dedupe=False)
+        assert merged.section.tolist() == ["a", "b"]
+
+    def test_failed_sections_are_skipped(self, sections):
+        reader = edges_by_section(
+            {
+                "a": RuntimeError("down"),
+                "b": postility.ERROR_FAILED_TO_EXECUTE,
+                "c": pd.DataFrame({"source": ["x"], "target": ["y"]}),
+            }
+        )
+        merged = postility.federated_query(reader, sections=["a", "b", "c"])
+        assert merged.section.tolist() == ["c"]
+        assert sections.call_count == 3
+
+    def test_all_sections_failing_returns_sentinel(self, sections):
+        reader = edges_by_section({"a": RuntimeError("down")})
+        result = postility.federated_query(reader, sections=["a"])
+        assert result == postility.ERROR_FAILED_TO_EXECUTE
+
+    def test_reader_by_name_and_defaults_to_configured_sections(self, sections):
+        reader = MagicMock(return_value=((None, None), pd.DataFrame({"author": ["a"]})))
+        with (
+            patch("postility.config_sections", return_value=["a", "b"]),
+            patch.dict(postility.__dict__, {"select_all_from_authors": reader}),
+        ):
+            merged = postility.federated_query("select_all_from_authors")
+        assert merged.values.tolist() == [["a", "a"]]
+        assert reader.call_count == 2
+
+    def test_unknown_reader_raises(self):
+        with pytest.raises(ValueError):
+            postility.federated_query("select_everything")
+
+
+# ---------------------------------------------------------------------------
+# papers_raw staging
+# ---------------------------------------------------------------------------
+
+
+class TestPapersRaw:
+    def records(self):
+        return pd.DataFrame(
+            {
+                "doi": ["10.1/a"],
+                "title": ["A paper"],
+                "publication_date": ["2020-01-02"],
+                "authors": [["Ada", "Alan"]],
+                "publisher": ["NULL"],
+                "type": ["article"],
+                "venue": ["NULL"],
+                "openalex_id": ["https://openalex.org/W1"],
+            }
+        )
+
+    def executed(self, cur):
+        return [c.args[0].strip() for c in cur.execute.call_args_list]
+
+    @pytest.mark.parametrize("stage", ["copy_papers_raw", "insert_papers_raw"])
+    def test_staged_in_session_temp_table(self, stage, fake_conn):
+        cur = MagicMock()
+        with patch("postility.execute_prepared_batch"):
+            getattr(postility, stage)(cur, fake_conn, self.records())
+        executed = self.executed(cur)
+        create = executed.index(postility.__dict__["__create_papers_raw"][1])
+        assert "CREATE TEMP TABLE papers_raw" in executed[create]
+        assert executed[create].endswith("ON COMMIT DROP;")
+        assert executed[create - 1] == "DROP TABLE IF EXISTS pg_temp.papers_raw;"
+
+    @pytest.mark.parametrize("stage", ["copy_papers_raw", "insert_papers_raw"])
+    def test_normalized_before_commit_drops_stage(self, stage, fake_conn):
+        cur = MagicMock()
+        order = MagicMock()
+        order.attach_mock(cur.execute, "execute")
+        order.attach_mock(fake_conn.commit, "commit")
+        with patch("postility.execute_prepared_batch"):
+            getattr(postility, stage)(cur, fake_conn, self.records())
+        calls = [c[0] if c[0] == "commit" else c.args[0].strip() for c in order.mock_calls]
+        normalize = next(
+            n for n, call in enumerate(calls) if call.startswith("INSERT INTO papers ")
+        )
+        assert calls.index("commit") > normalize
+        assert calls.count("commit") == 1
+
+    def test_failed_staging_skips_normalization(self, fake_conn):
+        cur = MagicMock()
+        cur.copy_expert.side_effect = psycopg2.OperationalError("copy failed")
+        postility.copy_papers_raw(cur, fake_conn, self.records())
+        assert not any(sql.startswith("INSERT INTO") for sql in self.executed(cur))
+
+    def test_first_author_staged(self, fake_conn):
+        with patch("postility.copy_from_df") as copy:
+            postility.copy_papers_raw(MagicMock(), fake_conn, self.records())
+        staged = copy.call_args.kwargs["df"]
+        assert copy.call_args.kwargs["table"] == "papers_raw"
+        assert staged.author.tolist() == ["Ada"]
+        assert staged.openalex.tolist() == ["https://openalex.org/W1"]
+
+
+# ---------------------------------------------------------------------------
+# upsert
+# ---------------------------------------------------------------------------
+
+
+class TestUpsert:
+    def test_new_values_inserted_on_conflict_do_nothing(self, fake_conn):
+        with patch("psycopg2.extras.execute_values", return_value=[(7,)]) as execute_values:
+            (_, _), inserted = postility.upsert_dimension(
+                MagicMock(), fake_conn, "authors", "author", ["Bob", "NULL", "Ada", None, "Bob"]
+            )
+        _, sql, values = execute_values.call_args.args
+        assert "ON CONFLICT (author) DO NOTHING RETURNING id" in sql
+        assert values == [("Ada",), ("Bob",)]
+        assert inserted == [7]
+
+    def test_failed_upsert_returns_sentinel(self, fake_conn):
+        with patch("psycopg2.extras.execute_values", side_effect=psycopg2.OperationalError("gone")):
+            (_, _), inserted = postility.upsert_dimension(
+                MagicMock(), fake_conn, "concepts", "concept", ["graphs"]
+            )
+        assert inserted is postility.ERROR_FAILED_TO_EXECUTE
+
+    def test_openalex_upserted_as_works(self, fake_conn):
+        df = pd.DataFrame(
+            {
+                "openalex_id": ["https://openalex.org/W1"],
+                "referenced_works": [["https://openalex.org/W2"]],
+            }
+        )
+        with patch("postility.upsert_dimension", return_value=((None, None), [])) as upsert:
+            postility.upsert_openalexs(MagicMock(), fake_conn, df)
+        assert upsert.call_args.kwargs["column"] == "work"
+        assert sorted(upsert.call_args.kwargs["values"]) == [1, 2]
+
+    @pytest.mark.parametrize("mode", ["bulk", "factorize"])
+    def test_upsert_refused_with_copy_modes(self, mode):
+        cur = MagicMock()
+        with pytest.raises(ValueError):
+            postility.importXML(cur, MagicMock(), pd.DataFrame(), upsert=True, **{mode: True})
+        cur.execute.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# link tables
+# ---------------------------------------------------------------------------
+
+
+class TestLinkTables:
+    def records(self):
+        return pd.DataFrame(
+            {
+                "title": ["A paper", "B paper"],
+                "authors": [["Ada", "Alan", "NULL", "Alan"], ["Grace"]],
+                "concepts": [["graphs", "logic", "sets"], "NULL"],
+                "openalex_id": ["https://openalex.org/W1", "https://openalex.org/W2"],
+                "referenced_works": [["https://openalex.org/W2", "W3"], "NULL"],
+            }
+        )
+
+    def staged(self, stage):
+        cur = MagicMock()
+        with patch("postility.copy_from_df") as copy:
+            getattr(postility, stage)(cur, MagicMock(), self.records())
+        executed = [c.args[0] for c in cur.execute.call_args_list]
+        return copy.call_args.kwargs["df"], executed
+
+    def test_supports_skip_first_author_and_nulls(self):
+        staged, executed = self.staged("insert_supports")
+        assert staged.values.tolist() == [["A paper", "Alan"]]
+        assert "JOIN papers ON papers.title = supports_stage.title" in executed[-1]
+
+    def test_paper_concepts_skip_first_concept(self):
+        staged, _ = self.staged("insert_paper_concepts")
+        assert staged.values.tolist() == [["A paper", "logic"], ["A paper", "sets"]]
+
+    def test_citations_staged_as_works(self):
+        staged, executed = self.staged("insert_citations")
+        assert staged.values.tolist() == [[1, 2], [1, 3]]
+        assert "JOIN openalex sources ON sources.work = citations_stage.source" in executed[-1]
+
+    def test_one_set_based_insert_per_table(self):
+        _, executed = self.staged("insert_supports")
+        assert [sql.split("(")[0].strip() for sql in executed if "INSERT" in sql] == [
+            "INSERT INTO authors",
+            "INSERT INTO supports",
+        ]
+
+
+# ---------------------------------------------------------------------------
+# refresh_resolved_citations
+# ---------------------------------------------------------------------------
+
+
+class TestRefreshResolvedCitations:
+    def inserts(self, cur):
+        return [
+            c.args[0]
+            for c in cur.execute.call_args_list
+            if c.args[0].lstrip().startswith("INSERT INTO citations_resolved_")
+        ]
+
+    def test_full_refresh_reads_citations(self, fake_conn):
+        cur = MagicMock()
+        postility.refresh_resolved_citations(cur, fake_conn)
+        inserts = self.inserts(cur)
+        assert len(inserts) == len(postility.RESOLVED_CITATION_TABLES)
+        assert all("FROM citations citations" in sql for sql in inserts)
+
+    def test_delta_refresh_reads_staged_edges(self, fake_conn):
+        cur = MagicMock()
+        postility.refresh_resolved_citations(
+            cur, fake_conn, openalex_urls=["https://openalex.org/W1", "NULL"]
+        )
+        assert all("FROM resolve_delta citations" in sql for sql in self.inserts(cur))
+        cur.copy_expert.assert_called_once()
+
+    def test_rebuild_truncates_and_ignores_delta(self, fake_conn):
+        cur = MagicMock()
+        postility.refresh_resolved_citations(
+            cur, fake_conn, openalex_urls=["https://openalex.org/W1"], rebuild=True
+        )
+        executed = [c.args[0] for c in cur.execute.call_args_list]
+        assert [sql for sql in executed if sql.startswith("TRUNCATE")] == [
+            f"TRUNCATE {table};" for table in postility.RESOLVED_CITATION_TABLES
+        ]
+        assert all("FROM citations citations" in sql for sql in self.inserts(cur))
+
+
+# ---------------------------------------------------------------------------
+# id cache
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def id_cache():
+    postility.clear_id_cache()
+    size = postility.ID_CACHE_SIZE
+    yield
+    postility.update_id_cache_settings(caching=True, size=size)
+    postility.clear_id_cache()
+
+
+class TestIdCache:
+    def test_hit_skips_database(self, id_cache):
+        cur, conn = MagicMock(), MagicMock()
+        cur.fetchone.return_value = (7,)
+        postility.select_id_from_authors_where_author_is(cur, conn, "Gödel")
+        calls = cur.execute.call_count
+        (_, _), author_id = postility.select_id_from_authors_where_author_is(cur, conn, "Gödel")
+        assert author_id == 7
+        assert cur.execute.call_count == calls
+
+    def test_counters(self, id_cache):
+        conn = MagicMock()
+        before = postility.id_cache_stats()["concepts"]
+        postility.id_cache_get(conn, "concepts", "graphs")
+        postility.id_cache_put(conn, "concepts", "graphs", 3)
+        postility.id_cache_get(conn, "concepts", "graphs")
+        after = postility.id_cache_stats()["concepts"]
+        assert after["hits"] - before["hits"] == 1
+        assert after["misses"] - before["misses"] == 1
+        assert after["size"] == 1
+
+    def test_least_recently_used_evicted(self, id_cache):
+        conn = MagicMock()
+        postility.update_id_cache_settings(size=2)
+        postility.id_cache_put(conn, "papers", "a", 1)
+        postility.id_cache_put(conn, "papers", "b", 2)
+        postility.id_cache_get(conn, "papers", "a")
+        postility.id_cache_put(conn, "papers", "c", 3)
+        assert postility.id_cache_get(conn, "papers", "b") is None
+        assert postility.id_cache_get(conn, "papers", "a") == 1
+
+    def test_failed_lookups_not_cached(self, id_cache):
+        conn = MagicMock()
+        postility.id_cache_put(conn, "papers", "missing", postility.ERROR_FAILED_TO_EXECUTE)
+        assert postility.id_cache_get(conn, "papers", "missing") is None
+
+    def test_database_switch_invalidates(self, id_cache):
+        conn = MagicMock()
+        postility.id_cache_put(conn, "openalex", "https://openalex.org/W1", 1)
+        postility.update_db_selection(section=postility.DB_SELECTION)
+        assert postility.id_cache_get(conn, "openalex", "https://openalex.org/W1") is None
+
+    def test_rolled_back_transaction_invalidates(self, id_cache, fake_conn):
+        with pytest.raises(RuntimeError), postility.transaction(MagicMock(), fake_conn):
+            postility.id_cache_put(fake_conn, "authors", "Noether", 9)
+            raise RuntimeError("boom")
+        assert postility.id_cache_get(fake_conn, "authors", "Noether") is None
+
+    def test_databases_cached_apart(self, id_cache):
+        citegres, networking = MagicMock(dsn="dbname=citegres"), MagicMock(dsn="dbname=networking")
+        postility.id_cache_put(citegres, "authors", "Hopper", 1)
+        assert postility.id_cache_get(networking, "authors", "Hopper") is None
+        assert postility.id_cache_get(citegres, "authors", "Hopper") == 1
+
+    def test_commit_of_failed_transaction_invalidates(self, id_cache, fake_conn):
+        postility.id_cache_put(fake_conn, "papers", "Lost", 4)
+        fake_conn.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INERROR
+        postility.commit_prior(MagicMock(), fake_conn)
+        assert postility.id_cache_get(fake_conn, "papers", "Lost") is None
+
+    def test_failed_commit_invalidates(self, id_cache, fake_conn):
+        postility.id_cache_put(fake_conn, "papers", "Lost", 4)
+        fake_conn.commit.side_effect = psycopg2.OperationalError("gone")
+        with patch("postility.reset_connection", return_value=(None, None)):
+            postility.commit_prior(MagicMock(), fake_conn)
+        assert postility.id_cache_get(fake_conn, "papers", "Lost") is None
+
+    def test_returned_connection_with_open_work_invalidates(self, id_cache, fake_conn):
+        postility.id_cache_put(fake_conn, "concepts", "Lost", 4)
+        postility.return_connection(MagicMock(), fake_conn)
+        fake_conn.rollback.assert_called_once()
+        assert postility.id_cache_get(fake_conn, "concepts", "Lost") is None
+
+    def test_warm_loads_rows(self, id_cache):
+        cur = MagicMock()
+        cur.fetchall.return_value = [("Euler", 1), ("Gauss", 2)]
+        conn = MagicMock()
+        (_, _), loaded = postility.warm_id_cache(cur, conn, "authors", ["Euler", "Gauss"])
+        assert loaded == 2
+        assert postility.id_cache_get(conn, "authors", "Gauss") == 2
+
+
+# ---------------------------------------------------------------------------
+# prepared statements
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture()
+def prepared():
+    enabled, page_size = postility.PREPARED_STATEMENTS, postility.PREPARED_PAGE_SIZE
+    postility.update_prepared_statements(enabled=True)
+    yield
+    postility.update_prepared_statements(enabled=enabled, page_size=page_size)
+
+
+class TestExecutePrepared:
+    def executed(self, cur):
+        return [c.args[0] for c in cur.execute.call_args_list]
+
+    def test_prepares_once_per_connection(self, prepared):
+        cur = MagicMock()
+        for value in ("a", "b"):
+            postility.execute_prepared(cur, "SELECT id FROM authors WHERE author = %s;", (value,))
+        prepare, *executes = self.executed(cur)
+        assert prepare.startswith("PREPARE citegres_")
+        assert prepare.endswith(" AS SELECT id FROM authors WHERE author = $1;")
+        assert executes == [f"EXECUTE {prepare.split()[1]} (%s);"] * 2
+        other = MagicMock()
+        postility.execute_prepared(other, "SELECT id FROM authors WHERE author = %s;", ("a",))
+        assert self.executed(other)[0].startswith("PREPARE")
+
+    def test_numbers_parameters(self, prepared):
+        cur = MagicMock()
+        postility.execute_prepared(
+            cur, "INSERT INTO supports (paper, author) VALUES (%s, %s);", (1, 2)
+        )
+        assert self.executed(cur)[0].endswith("VALUES ($1, $2);")
+
+    def test_disabled_executes_template(self, prepared):
+        postility.update_prepared_statements(enabled=False)
+        cur = MagicMock()
+        postility.execute_prepared(cur, "SELECT 1 WHERE 1 = %s;", (1,))
+        assert self.executed(cur) == ["SELECT 1 WHERE 1 = %s;"]
+
+    def test_batched_executes_share_a_statement_key(self):
+        first = postility.statement_template(b"EXECUTE citegres_0 (1);EXECUTE citegres_0 (2)")
+        second = postility.statement_template(b"EXECUTE citegres_0 ('x')")
+        assert first == second == "EXECUTE citegres_0 (...)"
+
+
+# ---------------------------------------------------------------------------
+# snapshots
+# ---------------------------------------------------------------------------
+
+
+class TestParquetCopySink:
+    def test_chunks_become_row_groups(self, tmp_path):
+        pa = pytest.importorskip("pyarrow")
+        pq = pytest.importorskip("pyarrow.parquet")
+        schema = pa.schema([("id", pa.int32()), ("title", pa.string()), ("pdate", pa.date32())])
+        sink = postility.ParquetCopySink(tmp_path / "papers.parquet", schema, chunk_size=1)
+        for row in (b'1,"",2020-01-02\n', b"2,,\n", b'3,"tab\there, ""quoted""\n",1999-12-31\n'):
+            sink.write(row)
+        sink.close()
+        snapshot = pq.ParquetFile(tmp_path / "papers.parquet")
+        assert snapshot.metadata.num_row_groups == 3 and sink.rows == 3
+        rows = snapshot.read().to_pylist()
+        assert [row["title"] for row in rows] == ["", None, 'tab\there, "quoted"\n']
+        assert rows[1]["pdate"] is None
+
+
+class SnapshotCursor:
+    """A cursor over in-memory COPY csv tables, enough for export_snapshot & load_snapshot."""
+
+    def __init__(self, tables, columns, schema_version, occupied=()):
+        self.tables = dict(tables)
+        self.columns = columns
+        self.schema_version = schema_version
+        self.occupied = set(occupied)
+        self.result = []
+
+    def execute(self, sql, args=None):
+        if "to_regclass" in sql:
+            self.result = [(table,) for table in args[0] if table in self.columns]
+        elif "pg_attribute" in sql:
+            self.result = self.columns[args[0]]
+        elif "SELECT EXISTS" in sql:
+            self.result = [(any(table in sql for table in self.occupied),)]
+        elif "schema_version" in sql:
+            self.result = [(self.schema_version,)]
+        else:
+            self.result = []
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+    def copy_expert(self, sql, file):
+        table = sql.split()[1]
+        if "TO STDOUT" in sql:
+            file.write(self.tables[table])
+        else:
+            self.tables[table] = file.read()
+
+
+@pytest.fixture()
+def snapshot_tables():
+    pytest.importorskip("pyarrow")
+    columns = {
+        "authors": [("id", "integer"), ("author", "text")],
+        "papers": [("id", "integer"), ("title", "text"), ("pdate", "date"), ("author", "integer")],
+    }
+    tables = {
+        "authors": b'1,"Ada"\n2,"Lovelace, Ada"\n',
+        "papers": b'1,"tab\there ""quoted""",2020-01-02,1\n2,"",,2\n3,,1999-12-31,2\n',
+    }
+    return tables, columns
+
+
+class TestSnapshots:
+    def test_export_load_round_trip(self, tmp_path, snapshot_tables):
+        tables, columns = snapshot_tables
+        source = SnapshotCursor(tables, columns, postility.SCHEMA_VERSION)
+        (_, _), manifest = postility.export_snapshot(source, MagicMock(), tmp_path)
+        assert manifest["tables"]["papers"]["rows"] == 3
+        target = SnapshotCursor({}, columns, postility.SCHEMA_VERSION)
+        with (
+            patch("postility.db_init", side_effect=lambda cur, conn, **kwargs: (cur, conn)),
+            patch("postility.migrate", side_effect=lambda cur, conn: (cur, conn)) as migrate,
+        ):
+            (_, _), loaded = postility.load_snapshot(target, MagicMock(), tmp_path)
+        assert loaded == manifest
+        assert target.tables == tables
+        migrate.assert_called_once()
+
+    def test_occupied_database_is_refused(self, tmp_path, snapshot_tables):
+        tables, columns = snapshot_tables
+        postility.export_snapshot(
+            SnapshotCursor(tables, columns, postility.SCHEMA_VERSION), MagicMock(), tmp_path
+        )
+        target = SnapshotCursor({}, columns, postility.SCHEMA_VERSION, occupied=["papers"])
+        with patch("postility.db_init") as db_init, pytest.raises(ValueError, match="papers"):
+            postility.load_snapshot(target, MagicMock(), tmp_path)
+        db_init.assert_not_called()
+
+    def test_database_migrated_past_snapshot_is_refused(self, tmp_path, snapshot_tables):
+        tables, columns = snapshot_tables
+        postility.export_snapshot(SnapshotCursor(tables, columns, 5), MagicMock(), tmp_path)
+        target = SnapshotCursor({}, columns, 6)
+        with patch("postility.db_init") as db_init, pytest.raises(ValueError):
+            postility.load_snapshot(target, MagicMock(), tmp_path)
+        db_init.assert_not_called()
+
+    def test_failed_load_returns_error_sentinel(self, tmp_path, snapshot_tables):
+        tables, columns = snapshot_tables
+        postility.export_snapshot(
+            SnapshotCursor(tables, columns, postility.SCHEMA_VERSION), MagicMock(), tmp_path
+        )
+        target = SnapshotCursor({}, columns, postility.SCHEMA_VERSION)
+        target.copy_expert = MagicMock(side_effect=psycopg2.DataError("bad row"))
+        with (
+            patch("postility.db_init", side_effect=lambda cur, conn, **kwargs: (cur, conn)),
+            patch("postility.migrate") as migrate,
+        ):
+            (_, _), loaded = postility.load_snapshot(target, MagicMock(), tmp_path)
+        assert loaded == postility.ERROR_FAILED_TO_EXECUTE
+        migrate.assert_not_called()
+
+    def test_missing_pyarrow_raises(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(postility, "pa", None)
+        with pytest.raises(ImportError):
+            postility.export_snapshot(MagicMock(), MagicMock(), tmp_path)
+
+    def test_newer_snapshot_is_refused(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        manifest = {"schema_version": postility.SCHEMA_VERSION + 1, "tables": {}}
+        (tmp_path / postility.SNAPSHOT_MANIFEST).write_text(json.dumps(manifest))
+        cur = MagicMock()
+        with pytest.raises(ValueError):
+            postility.load_snapshot(cur, MagicMock(), tmp_path)
+        cur.execute.assert_not_called()